@@ -0,0 +1,78 @@
+"""
+Peak memory of a training step (forward and backward) of a stack of complex matmul + activation layers:
+    - 'autodiff': the activation written op by op, autodiff keeps its intermediates for the backward pass
+    - 'cvnn': cvnn.activations, with custom gradients that only keep the input (or the output)
+Run from the repository root with `python benchmarks/activation_memory.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn import activations
+
+BATCH_SIZE = 4096
+UNITS = 256
+DEPTH = 8
+DEVICE = 'CPU:0'
+
+
+def _polar(z, amp_fun):
+    amp, pha = amp_fun(tf.math.abs(z)), tf.math.angle(z)
+    return tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha))
+
+
+def _cart(z, fun):
+    return tf.complex(fun(tf.math.real(z)), fun(tf.math.imag(z)))
+
+
+ACTIVATIONS = {
+    'modrelu': (lambda z: tf.cast(tf.nn.relu(tf.math.abs(z) + 1.), z.dtype) * z / tf.cast(tf.math.abs(z) + 1e-3,
+                                                                                           z.dtype),
+                activations.modrelu),
+    'zrelu': (lambda z: tf.complex(
+        tf.nn.relu(tf.math.imag(z)) * tf.nn.relu(tf.math.real(z)) / (tf.nn.relu(tf.math.imag(z)) + 1e-7),
+        tf.nn.relu(tf.math.imag(z)) * tf.nn.relu(tf.math.real(z)) / (tf.nn.relu(tf.math.real(z)) + 1e-7)),
+        activations.zrelu),
+    'georgiou_cdbp': (lambda z: z / tf.cast(1e-3 + tf.math.abs(z), z.dtype), activations.georgiou_cdbp),
+    'pol_tanh': (lambda z: _polar(z, tf.math.tanh), activations.pol_tanh),
+    'pol_selu': (lambda z: _polar(z, tf.keras.activations.selu), activations.pol_selu),
+    'cart_relu': (lambda z: _cart(z, tf.nn.relu), activations.cart_relu),
+    'cart_hard_sigmoid': (lambda z: _cart(z, lambda x: tf.clip_by_value(0.2 * x + 0.5, 0., 1.)),
+                          activations.cart_hard_sigmoid),
+    'cart_softplus': (lambda z: _cart(z, tf.keras.activations.softplus), activations.cart_softplus),
+}
+
+
+def measure(activation, kernels, x):
+    @tf.function
+    def train_step(inputs):
+        with tf.GradientTape() as tape:
+            outputs = inputs
+            for kernel in kernels:
+                outputs = activation(tf.matmul(outputs, kernel))
+            loss = tf.reduce_sum(tf.math.abs(outputs))
+        return tape.gradient(loss, kernels)
+
+    train_step(x)   # Trace and warm up
+    tf.config.experimental.reset_memory_stats(DEVICE)
+    start_time = perf_counter()
+    _ = [g.numpy() for g in train_step(x)]
+    elapsed = perf_counter() - start_time
+    return tf.config.experimental.get_memory_info(DEVICE)['peak'], elapsed
+
+
+def run_benchmark():
+    tf.config.threading.set_inter_op_parallelism_threads(1)     # Deterministic op order, so peak memory is too
+    x = tf.complex(tf.random.normal((BATCH_SIZE, UNITS)), tf.random.normal((BATCH_SIZE, UNITS)))
+    kernels = [tf.Variable(tf.complex(tf.random.normal((UNITS, UNITS)), tf.random.normal((UNITS, UNITS))) / UNITS)
+               for _ in range(DEPTH)]
+    activation_mb = x.shape.num_elements() * 8 / 2 ** 20
+    print(f"{DEPTH} layers, each activation is {activation_mb:.0f} MB")
+    print(f"{'activation':>18} {'autodiff (MB)':>14} {'cvnn (MB)':>10} {'autodiff (ms)':>14} {'cvnn (ms)':>10}")
+    for name, (autodiff, cvnn_activation) in ACTIVATIONS.items():
+        autodiff_peak, autodiff_time = measure(autodiff, kernels, x)
+        cvnn_peak, cvnn_time = measure(cvnn_activation, kernels, x)
+        print(f"{name:>18} {autodiff_peak / 2 ** 20:>14.0f} {cvnn_peak / 2 ** 20:>10.0f} "
+              f"{autodiff_time * 1e3:>14.1f} {cvnn_time * 1e3:>10.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,42 @@
+"""
+Microbenchmark of the ComplexConv algorithms for growing kernel sizes:
+    - 'direct': tf.nn.convolution based complex convolution
+    - 'fft': pointwise product in the frequency domain
+Run from the repository root with `python benchmarks/conv_fft.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn.layers import ComplexConv1D, ComplexConv2D
+
+CONFIGURATIONS = [
+    (ComplexConv1D, (16, 1024, 16), [3, 9, 33, 65, 129]),
+    (ComplexConv2D, (8, 64, 64, 8), [3, 5, 9, 15])
+]
+REPETITIONS = 20
+
+
+def time_layer(layer, x, repetitions=REPETITIONS):
+    forward = tf.function(layer)
+    forward(x)      # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        outputs = forward(x)
+    _ = outputs.numpy()
+    return (perf_counter() - start_time) / repetitions
+
+
+def run_benchmark():
+    print(f"{'layer':>14} {'kernel':>7} {'direct (ms)':>12} {'fft (ms)':>10} {'speedup':>8}")
+    for conv_class, input_shape, kernel_sizes in CONFIGURATIONS:
+        x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        for kernel_size in kernel_sizes:
+            results = {}
+            for algorithm in ('direct', 'fft'):
+                layer = conv_class(input_shape[-1], kernel_size, padding='same', algorithm=algorithm)
+                results[algorithm] = time_layer(layer, x)
+            print(f"{conv_class.__name__:>14} {kernel_size:>7} {results['direct'] * 1e3:>12.3f} "
+                  f"{results['fft'] * 1e3:>10.3f} {results['direct'] / results['fft']:>8.2f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,85 @@
+"""
+Latency and peak memory of the `fused_epilogue` option of ComplexDense and ComplexConv2D against the default
+    path and the single real product modes ('block_real' and 'stacked'), for an inference call and a training step
+    (forward and backward) of a stack of layers with cart_relu activations.
+Run from the repository root with `python benchmarks/fused_epilogue.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn import layers
+
+REPETITIONS = 10
+DEPTH = 4
+DEVICE = 'CPU:0'
+DENSE_BATCH_SIZE = 2048
+DENSE_UNITS = 256
+CONV_BATCH_SIZE = 32
+CONV_IMAGE_SIZE = 64
+CONV_FILTERS = 16
+
+CONFIGURATIONS = {
+    'dense': {
+        'default': lambda: layers.ComplexDense(DENSE_UNITS, activation='cart_relu'),
+        'block_real': lambda: layers.ComplexDense(DENSE_UNITS, activation='cart_relu', execution='block_real'),
+        'fused': lambda: layers.ComplexDense(DENSE_UNITS, activation='cart_relu', fused_epilogue=True)
+    },
+    'conv': {
+        'default': lambda: layers.ComplexConv2D(CONV_FILTERS, 3, padding='same', activation='cart_relu'),
+        'stacked': lambda: layers.ComplexConv2D(CONV_FILTERS, 3, padding='same', activation='cart_relu',
+                                                complex_mult='stacked'),
+        'fused': lambda: layers.ComplexConv2D(CONV_FILTERS, 3, padding='same', activation='cart_relu',
+                                              fused_epilogue=True)
+    }
+}
+
+
+def _time(function, x) -> float:
+    function(x)     # Trace and warm up
+    best = float('inf')
+    for _ in range(REPETITIONS):
+        start_time = perf_counter()
+        outputs = function(x)
+        _ = [o.numpy() for o in tf.nest.flatten(outputs)]
+        best = min(best, perf_counter() - start_time)
+    return best
+
+
+def measure(model, x):
+    predict = tf.function(lambda inputs: model(inputs))
+
+    @tf.function
+    def train_step(inputs):
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(tf.math.abs(model(inputs)))
+        return tape.gradient(loss, model.trainable_variables)
+
+    predict_time = _time(predict, x)
+    train_time = _time(train_step, x)
+    tf.config.experimental.reset_memory_stats(DEVICE)
+    _ = [g.numpy() for g in train_step(x)]
+    return predict_time, train_time, tf.config.experimental.get_memory_info(DEVICE)['peak']
+
+
+def run_benchmark():
+    tf.config.threading.set_inter_op_parallelism_threads(1)     # Deterministic op order, so peak memory is too
+    inputs = {
+        'dense': (DENSE_BATCH_SIZE, DENSE_UNITS),
+        'conv': (CONV_BATCH_SIZE, CONV_IMAGE_SIZE, CONV_IMAGE_SIZE, CONV_FILTERS)
+    }
+    print(f"{'layer':>6} {'mode':>11} {'predict (ms)':>13} {'train step (ms)':>16} {'train peak (MB)':>16}")
+    for layer_type, modes in CONFIGURATIONS.items():
+        x = tf.complex(tf.random.normal(inputs[layer_type]), tf.random.normal(inputs[layer_type]))
+        weights = None
+        for mode, get_layer in modes.items():
+            model = tf.keras.Sequential([layers.ComplexInput(input_shape=x.shape[1:])] +
+                                        [get_layer() for _ in range(DEPTH)])
+            if weights is None:
+                weights = model.get_weights()
+            model.set_weights(weights)
+            predict_time, train_time, peak = measure(model, x)
+            print(f"{layer_type:>6} {mode:>11} {predict_time * 1e3:>13.2f} {train_time * 1e3:>16.2f} "
+                  f"{peak / 2 ** 20:>16.0f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
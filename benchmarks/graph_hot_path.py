@@ -0,0 +1,75 @@
+"""
+Step time of an MLP (ComplexDense + ComplexDropout) and a CNN (ComplexConv2D + ComplexBatchNormalization) inside
+    tf.function, together with the number of host print ops left in the traced graphs.
+The inference step calls the model without `training`, the case where layers used to resolve it inside the graph.
+Run from the repository root with `python benchmarks/graph_hot_path.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn import layers
+
+BATCH_SIZE = 128
+REPETITIONS = 50
+
+
+def get_mlp():
+    return tf.keras.Sequential([
+        layers.ComplexDense(256, activation='cart_relu'), layers.ComplexDropout(0.5),
+        layers.ComplexDense(256, activation='cart_relu'), layers.ComplexDropout(0.5),
+        layers.ComplexDense(10, activation='convert_to_real_with_abs')
+    ]), (BATCH_SIZE, 128)
+
+
+def get_cnn():
+    return tf.keras.Sequential([
+        layers.ComplexConv2D(16, 3, activation='cart_relu'), layers.ComplexBatchNormalization(),
+        layers.ComplexAvgPooling2D(),
+        layers.ComplexConv2D(32, 3, activation='cart_relu'), layers.ComplexBatchNormalization(),
+        layers.ComplexFlatten(), layers.ComplexDropout(0.5),
+        layers.ComplexDense(10, activation='convert_to_real_with_abs')
+    ]), (BATCH_SIZE, 28, 28, 1)
+
+
+def count_print_ops(concrete_function):
+    graphs = [concrete_function.graph] + [f.graph for f in concrete_function.graph._functions.values()
+                                          if hasattr(f, 'graph')]
+    return sum(op.type == 'PrintV2' for graph in graphs for op in graph.get_operations())
+
+
+def time_step(step, *args, repetitions=REPETITIONS):
+    step(*args)     # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        result = step(*args)
+    _ = [r.numpy() for r in tf.nest.flatten(result)]
+    return (perf_counter() - start_time) / repetitions
+
+
+def run_benchmark():
+    print(f"{'model':>6} {'step':>10} {'time (ms)':>10} {'print ops':>10}")
+    for name, get_model in [('mlp', get_mlp), ('cnn', get_cnn)]:
+        model, input_shape = get_model()
+        x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        y = tf.one_hot(tf.random.uniform((BATCH_SIZE,), maxval=10, dtype=tf.int32), 10)
+        model(x)
+        optimizer = tf.keras.optimizers.SGD(learning_rate=0.01)
+
+        @tf.function
+        def train_step(inputs, labels):
+            with tf.GradientTape() as tape:
+                loss = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(labels, model(inputs, training=True)))
+            optimizer.apply_gradients(zip(tape.gradient(loss, model.trainable_variables), model.trainable_variables))
+            return loss
+
+        @tf.function
+        def inference_step(inputs):
+            return model(inputs)
+
+        for step_name, step, args in [('train', train_step, (x, y)), ('inference', inference_step, (x,))]:
+            step_time = time_step(step, *args)
+            print(f"{name:>6} {step_name:>10} {step_time * 1e3:>10.3f} "
+                  f"{count_print_ops(step.get_concrete_function(*args)):>10}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,50 @@
+"""
+Cost of the complex initializers:
+    - 'two draws': one random op per part (of the real dtype), as the layers initialized the real and imaginary
+        parts before.
+    - 'one draw': a single random op for both parts (`ComplexInitializer.__call__` with a complex dtype).
+And the build time of a large ComplexDense and ComplexConv2D with each weight storage and initializer.
+Run from the repository root with `python benchmarks/initializers.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn import layers
+from cvnn.initializers import ComplexGlorotUniform, ComplexGlorotNormal, ComplexRayleigh
+
+REPETITIONS = 5
+KERNEL_SHAPE = (4096, 4096)
+DENSE_INPUT_SHAPE = (1, 4096)
+CONV_INPUT_SHAPE = (1, 16, 16, 512)
+
+
+def _best_time(function) -> float:
+    function()      # Warm up
+    best = float('inf')
+    for _ in range(REPETITIONS):
+        start_time = perf_counter()
+        function()
+        best = min(best, perf_counter() - start_time)
+    return best
+
+
+def run_benchmark():
+    print(f"Kernel {KERNEL_SHAPE}")
+    print(f"{'initializer':>22} {'two draws (ms)':>15} {'one draw (ms)':>14}")
+    for initializer in (ComplexGlorotUniform(), ComplexGlorotNormal()):
+        two_draws = _best_time(lambda: [initializer(KERNEL_SHAPE, dtype=tf.float32).numpy() for _ in range(2)])
+        one_draw = _best_time(lambda: initializer(KERNEL_SHAPE, dtype=tf.complex64).numpy())
+        print(f"{initializer.__name__:>22} {two_draws * 1e3:>15.1f} {one_draw * 1e3:>14.1f}")
+    print(f"{'layer':>6} {'initializer':>22} {'storage':>12} {'build (ms)':>11}")
+    for layer_name, get_layer, input_shape in [
+        ('dense', lambda **kwargs: layers.ComplexDense(DENSE_INPUT_SHAPE[-1], **kwargs), DENSE_INPUT_SHAPE),
+        ('conv', lambda **kwargs: layers.ComplexConv2D(CONV_INPUT_SHAPE[-1], 3, **kwargs), CONV_INPUT_SHAPE)
+    ]:
+        for initializer in (ComplexGlorotUniform(), ComplexRayleigh()):
+            for weight_storage in ('split', 'interleaved'):
+                build_time = _best_time(lambda: get_layer(kernel_initializer=initializer,
+                                                          weight_storage=weight_storage).build(input_shape))
+                print(f"{layer_name:>6} {initializer.__name__:>22} {weight_storage:>12} {build_time * 1e3:>11.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,49 @@
+"""
+Microbenchmark of ComplexLowRankDense against ComplexDense for wide layers (forward and backward pass).
+Run from the repository root with `python benchmarks/low_rank_dense.py` (cvnn must be importable).
+"""
+import numpy as np
+import tensorflow as tf
+from time import perf_counter
+from cvnn.layers import ComplexDense, ComplexLowRankDense
+
+BATCH_SIZE = 256
+UNITS = [1024, 2048, 4096]
+RANKS = [32, 128]
+REPETITIONS = 20
+
+
+def time_layer(layer, x, repetitions=REPETITIONS):
+    @tf.function
+    def train_step(inputs):
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(tf.math.abs(layer(inputs)))
+        return tape.gradient(loss, layer.trainable_variables)
+
+    train_step(x)   # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        grads = train_step(x)
+    _ = [g.numpy() for g in grads]
+    return (perf_counter() - start_time) / repetitions
+
+
+def count_weights(layer):
+    return sum(int(np.prod(w.shape)) for w in layer.trainable_weights)
+
+
+def run_benchmark():
+    print(f"{'units':>6} {'rank':>6} {'dense (ms)':>11} {'low rank (ms)':>14} {'speedup':>8} {'weights ratio':>14}")
+    for units in UNITS:
+        x = tf.complex(tf.random.normal((BATCH_SIZE, units)), tf.random.normal((BATCH_SIZE, units)))
+        dense = ComplexDense(units)
+        dense_time = time_layer(dense, x)
+        for rank in RANKS:
+            low_rank = ComplexLowRankDense(units, rank=rank)
+            low_rank_time = time_layer(low_rank, x)
+            print(f"{units:>6} {rank:>6} {dense_time * 1e3:>11.3f} {low_rank_time * 1e3:>14.3f} "
+                  f"{dense_time / low_rank_time:>8.2f} {count_weights(dense) / count_weights(low_rank):>14.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
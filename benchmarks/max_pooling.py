@@ -0,0 +1,52 @@
+"""
+Microbenchmark of ComplexMaxPooling2D against its previous implementation:
+    - 'abs_flat': ranks with tf.math.abs and gathers from the input flattened over the whole batch
+    - 'layer': ranks with |z|^2 (no square root) and gathers each batch element from its own flattened input
+Forward pass and train step (forward and backward) are timed.
+Run from the repository root with `python benchmarks/max_pooling.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn.layers import ComplexMaxPooling2D
+
+INPUT_SHAPES = [(32, 32, 32, 16), (32, 64, 64, 32), (16, 128, 128, 64)]
+REPETITIONS = 20
+
+
+def abs_flat_max_pool(inputs, pool_size=(2, 2)):
+    abs_in = tf.math.abs(inputs)
+    output, argmax = tf.nn.max_pool_with_argmax(input=abs_in, ksize=pool_size, strides=pool_size,
+                                                padding='VALID', include_batch_in_index=True)
+    return tf.reshape(tf.gather(tf.reshape(inputs, [-1]), argmax), tf.shape(output))
+
+
+def time_function(pool_function, x, backward: bool = True, repetitions=REPETITIONS):
+    @tf.function
+    def train_step(inputs):
+        with tf.GradientTape() as tape:
+            tape.watch(inputs)
+            loss = tf.reduce_sum(tf.math.real(pool_function(inputs)))
+        return tape.gradient(loss, inputs)
+
+    step = train_step if backward else tf.function(pool_function)
+    step(x)   # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        outputs = step(x)
+    _ = outputs.numpy()
+    return (perf_counter() - start_time) / repetitions
+
+
+def run_benchmark():
+    print(f"{'input shape':>20} {'pass':>8} {'abs_flat (ms)':>14} {'layer (ms)':>11} {'speedup':>8}")
+    for input_shape in INPUT_SHAPES:
+        x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        for backward in (False, True):
+            old = time_function(abs_flat_max_pool, x, backward=backward)
+            new = time_function(ComplexMaxPooling2D(), x, backward=backward)
+            print(f"{str(input_shape):>20} {'train' if backward else 'forward':>8} {old * 1e3:>14.3f} "
+                  f"{new * 1e3:>11.3f} {old / new:>8.2f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark of the polar activations (forward and backward pass, nanoseconds per element):
+    - 'trig': previous implementation with tf.math.angle (atan2), cos and sin or exp(j angle)
+    - 'phasor': current implementation with the unit phasor z / |z| (cvnn.activations._unit_phasor)
+Run from the repository root with `python benchmarks/polar_activations.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn import activations
+
+SIZES = [2 ** 16, 2 ** 20]
+REPETITIONS = 20
+
+
+def _trig_pol(z, amp_fun):
+    amp = amp_fun(tf.math.abs(z))
+    pha = tf.math.angle(z)
+    return tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha))
+
+
+def _trig_phasor(z):
+    return tf.math.exp(tf.complex(tf.zeros(tf.shape(z), dtype=z.dtype.real_dtype), tf.math.angle(z)))
+
+
+ACTIVATIONS = {
+    'pol_tanh': (lambda z: _trig_pol(z, tf.keras.activations.tanh), activations.pol_tanh),
+    'pol_selu': (lambda z: _trig_pol(z, tf.keras.activations.selu), activations.pol_selu),
+    'complex_cardioid': (lambda z: tf.cast(1 + tf.math.cos(tf.math.angle(z)), dtype=z.dtype) * z / 2.,
+                         activations.complex_cardioid),
+    'complex_signum': (_trig_phasor, activations.complex_signum),
+    'mvn_activation': (_trig_phasor, activations.mvn_activation),
+}
+
+
+def time_activation(activation, z, repetitions=REPETITIONS):
+    @tf.function
+    def forward(inputs):
+        return activation(inputs)
+
+    @tf.function
+    def backward(inputs):
+        with tf.GradientTape() as tape:
+            tape.watch(inputs)
+            loss = tf.reduce_sum(tf.math.real(activation(inputs)))
+        return tape.gradient(loss, inputs)
+
+    results = []
+    for step in (forward, backward):
+        step(z)     # Trace and warm up
+        start_time = perf_counter()
+        for _ in range(repetitions):
+            outputs = step(z)
+        outputs.numpy()
+        results.append((perf_counter() - start_time) / repetitions / z.shape.num_elements() * 1e9)
+    return results
+
+
+def run_benchmark():
+    print(f"{'activation':>17} {'elements':>9} {'trig fwd':>9} {'phasor fwd':>11} {'trig bwd':>9} "
+          f"{'phasor bwd':>11} {'speedup fwd/bwd':>16}")
+    for size in SIZES:
+        z = tf.complex(tf.random.normal((size,)), tf.random.normal((size,)))
+        for name, (trig, phasor) in ACTIVATIONS.items():
+            trig_forward, trig_backward = time_activation(trig, z)
+            phasor_forward, phasor_backward = time_activation(phasor, z)
+            print(f"{name:>17} {size:>9} {trig_forward:>9.2f} {phasor_forward:>11.2f} {trig_backward:>9.2f} "
+                  f"{phasor_backward:>11.2f} {trig_forward / phasor_forward:>8.2f}/{trig_backward / phasor_backward:.2f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,70 @@
+"""
+Accuracy, latency and weight size of int8 post-training quantized models (`cvnn.quantization`) against float.
+An MLP and a CNN are trained on a synthetic task (classify the frequency of noisy complex exponentials), quantized
+    with a representative set of the training data and evaluated on a test set.
+Run from the repository root with `python benchmarks/quantization.py` (cvnn must be importable).
+"""
+import numpy as np
+import tensorflow as tf
+from cvnn import layers
+from cvnn.quantization import quantize_model, quantization_report
+
+CLASSES = 4
+TRAIN_SAMPLES = 2048
+TEST_SAMPLES = 512
+CALIBRATION_SAMPLES = 256
+BATCH_SIZE = 128
+EPOCHS = 5
+
+
+def get_data(samples, shape):
+    labels = np.random.randint(CLASSES, size=samples)
+    grid = np.stack(np.meshgrid(*[np.arange(size) for size in shape], indexing='ij'), axis=-1)
+    frequencies = (labels + 1)[:, None] * np.ones(len(shape)) / (2 * max(shape))
+    phase = 2 * np.pi * np.einsum('...d,nd->n...', grid, frequencies) + np.random.uniform(0, 2 * np.pi, samples).reshape(
+        (-1,) + (1,) * len(shape))
+    noise = np.random.randn(samples, *shape) + 1j * np.random.randn(samples, *shape)
+    x = (np.exp(1j * phase) + 0.5 * noise).astype(np.complex64)
+    return x, tf.one_hot(labels, CLASSES).numpy()
+
+
+def get_mlp():
+    return tf.keras.Sequential([
+        layers.ComplexInput(input_shape=(64,)),
+        layers.ComplexDense(256, activation='cart_relu'),
+        layers.ComplexDense(256, activation='cart_relu'),
+        layers.ComplexDense(CLASSES, activation='softmax_real_with_abs')
+    ]), (64,)
+
+
+def get_cnn():
+    return tf.keras.Sequential([
+        layers.ComplexInput(input_shape=(16, 16, 1)),
+        layers.ComplexConv2D(16, 3, activation='cart_relu'),
+        layers.ComplexAvgPooling2D(),
+        layers.ComplexConv2D(32, 3, activation='cart_relu'),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(CLASSES, activation='softmax_real_with_abs')
+    ]), (16, 16)
+
+
+def run_benchmark():
+    print(f"{'model':>6} {'':>10} {'accuracy':>9} {'latency (ms)':>13} {'weights (kB)':>13}")
+    for name, get_model in [('mlp', get_mlp), ('cnn', get_cnn)]:
+        model, shape = get_model()
+        x_train, y_train = get_data(TRAIN_SAMPLES, shape)
+        x_test, y_test = get_data(TEST_SAMPLES, shape)
+        if len(shape) == 2:
+            x_train, x_test = x_train[..., None], x_test[..., None]
+        model.compile(optimizer='adam', loss='categorical_crossentropy')
+        model.fit(x_train, y_train, batch_size=BATCH_SIZE, epochs=EPOCHS, verbose=0)
+        quantized = quantize_model(model, x_train[:CALIBRATION_SAMPLES])
+        report = quantization_report(model, quantized, x_test, y_test, batch_size=BATCH_SIZE)
+        for key in ('float', 'quantized'):
+            print(f"{name:>6} {key:>10} {report[key]['accuracy']:>9.3f} {report[key]['latency'] * 1e3:>13.3f} "
+                  f"{report[key]['weights_bytes'] / 1024:>13.1f}")
+        print(f"{name:>6} SQNR {report['sqnr_db']:.1f} dB, max abs error {report['max_abs_error']:.2e}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
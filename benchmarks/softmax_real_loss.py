@@ -0,0 +1,57 @@
+"""
+Loss and gradient of a 1000-class softmax_real head: categorical cross-entropy of the activation output against
+    `cvnn.losses.SoftmaxRealCrossEntropy` computed from the logits.
+Also prints both losses for confident (scaled) logits, where the probabilities underflow and the clipped log of
+    categorical_crossentropy saturates.
+Run from the repository root with `python benchmarks/softmax_real_loss.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from tensorflow.keras.losses import categorical_crossentropy
+from cvnn.activations import SOFTMAX_REAL_LOG_PROBABILITIES
+from cvnn.losses import SoftmaxRealCrossEntropy
+
+BATCH_SIZE = 512
+CLASSES = 1000
+REPETITIONS = 50
+CONFIDENT_SCALE = 50.
+
+
+def _loss_and_gradient(loss_fun):
+    @tf.function
+    def step(y_true, logits):
+        with tf.GradientTape() as tape:
+            tape.watch(logits)
+            loss = tf.reduce_mean(loss_fun(y_true, logits))
+        return loss, tape.gradient(loss, logits)
+    return step
+
+
+def _time(step, y_true, logits) -> float:
+    step(y_true, logits)    # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(REPETITIONS):
+        loss, _ = step(y_true, logits)
+    loss.numpy()
+    return (perf_counter() - start_time) / REPETITIONS
+
+
+def run_benchmark():
+    logits = tf.complex(tf.random.normal((BATCH_SIZE, CLASSES)), tf.random.normal((BATCH_SIZE, CLASSES)))
+    y_true = tf.one_hot(tf.random.uniform((BATCH_SIZE,), maxval=CLASSES, dtype=tf.int32), CLASSES)
+    print(f"{'activation':>34} {'probs + CE (ms)':>16} {'fused (ms)':>11} "
+          f"{'confident CE':>13} {'confident fused':>16}")
+    for activation in SOFTMAX_REAL_LOG_PROBABILITIES:
+        unfused = _loss_and_gradient(lambda y, z: categorical_crossentropy(y, activation(z)))
+        fused = _loss_and_gradient(SoftmaxRealCrossEntropy(activation, reduction='none'))
+        unfused_time = _time(unfused, y_true, logits)
+        fused_time = _time(fused, y_true, logits)
+        confident_logits = CONFIDENT_SCALE * logits
+        unfused_loss, _ = unfused(y_true, confident_logits)
+        fused_loss, _ = fused(y_true, confident_logits)
+        print(f"{activation.__name__:>34} {unfused_time * 1e3:>16.3f} {fused_time * 1e3:>11.3f} "
+              f"{unfused_loss.numpy():>13.2f} {fused_loss.numpy():>16.2f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
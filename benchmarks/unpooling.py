@@ -0,0 +1,54 @@
+"""
+Microbenchmark of ComplexUnPooling2D against its baseline implementation:
+    - 'baseline': a single tf.scatter_nd of the flattened values (colliding values are summed)
+    - 'last_write': the layer, a single tf.tensor_scatter_nd_update
+    - 'max_magnitude': the layer, which resolves the collisions with segment reductions before the scatter
+The argmax comes from ComplexMaxPooling2DWithArgmax with 2x2 windows.
+Latency and peak memory of the forward pass are measured.
+Run from the repository root with `python benchmarks/unpooling.py` (cvnn must be importable).
+"""
+import tensorflow as tf
+from time import perf_counter
+from cvnn.layers import ComplexMaxPooling2DWithArgmax, ComplexUnPooling2D
+
+INPUT_SHAPES = [(32, 32, 32, 16), (32, 64, 64, 16), (16, 128, 128, 32)]
+REPETITIONS = 20
+DEVICE = 'CPU:0'
+
+
+def baseline_unpool(inputs_values, unpool_mat, output_shape):
+    flat_output_shape = tf.reduce_prod(output_shape)
+    shape = (tf.shape(inputs_values, out_type=unpool_mat.dtype)[0] * flat_output_shape,)
+    ret = tf.scatter_nd(tf.expand_dims(tf.reshape(unpool_mat, [-1]), axis=-1), tf.reshape(inputs_values, [-1]),
+                        shape=shape)
+    return tf.reshape(ret, tf.concat([[tf.shape(inputs_values, out_type=unpool_mat.dtype)[0]], output_shape], axis=0))
+
+
+def measure(unpool_function, inputs_values, unpool_mat, repetitions=REPETITIONS):
+    step = tf.function(unpool_function)
+    step(inputs_values, unpool_mat)   # Trace and warm up
+    tf.config.experimental.reset_memory_stats(DEVICE)
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        outputs = step(inputs_values, unpool_mat)
+    _ = outputs.numpy()
+    return (perf_counter() - start_time) / repetitions, tf.config.experimental.get_memory_info(DEVICE)['peak']
+
+
+def run_benchmark():
+    print(f"{'input shape':>20} {'method':>14} {'time (ms)':>10} {'peak (MiB)':>11}")
+    for input_shape in INPUT_SHAPES:
+        x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        pooled, argmax = ComplexMaxPooling2DWithArgmax()(x)
+        output_shape = tf.constant(input_shape[1:], dtype=argmax.dtype)
+        methods = {'baseline': lambda values, mat: baseline_unpool(values, mat, output_shape)}
+        for collision in ('last_write', 'max_magnitude'):
+            unpool = ComplexUnPooling2D(input_shape[1:], collision=collision)
+            methods[collision] = lambda values, mat, unpool=unpool: unpool([values, mat])
+        for method, unpool_function in methods.items():
+            elapsed, peak = measure(unpool_function, pooled, argmax)
+            print(f"{str(input_shape):>20} {method:>14} {elapsed * 1e3:>10.3f} {peak / 2 ** 20:>11.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
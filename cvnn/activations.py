@@ -1,8 +1,9 @@
 import tensorflow as tf
 from tensorflow.keras.layers import Activation
-from typing import Union, Callable, Optional
+from typing import Union, Callable, Optional, Tuple
 from tensorflow import Tensor
 from numpy import pi
+from cvnn.utils import view_as_real, view_as_complex
 
 """
 This module contains many complex-valued activation functions to be used by CVNN class.
@@ -10,6 +11,81 @@ This module contains many complex-valued activation functions to be used by CVNN
 
 # logger = logging.getLogger(cvnn.__name__)
 t_activation = Union[str, Callable]  # TODO: define better
+SELU_SCALE = 1.0507009873554804934193349852946
+HARD_SIGMOID_SLOPE = 0.2
+
+
+def _unit_phasor(z: Tensor) -> Tuple[Tensor, Tensor, Tensor]:
+    """
+    Polar decomposition z = |z| (cos + j sin) without trigonometric functions: cos = Re(z)/|z| and sin = Im(z)/|z|.
+    The phase of z = 0 is 0 (as tf.math.angle), i.e. cos = 1 and sin = 0. The division is guarded so the
+        gradients are finite at zero too.
+    For real z it gives cos = sign(z) (1 at zero) and sin = 0.
+    :return: Tuple (|z|, cos, sin) of real tensors
+    """
+    abs_z = tf.math.abs(z)
+    nonzero = abs_z > 0
+    safe_abs_z = tf.where(nonzero, abs_z, tf.ones_like(abs_z))
+    cos = tf.where(nonzero, tf.math.real(z) / safe_abs_z, tf.ones_like(abs_z))
+    sin = tf.math.imag(z) / safe_abs_z      # Im(z) = 0 where z = 0
+    return abs_z, cos, sin
+
+
+def _from_polar(magnitude: Tensor, cos: Tensor, sin: Tensor, dtype) -> Tensor:
+    """
+    Magnitude rescale primitive: the number of magnitude `magnitude` with the phase given by `_unit_phasor`.
+        magnitude * (cos + j sin)
+    :param dtype: Dtype of the input of `_unit_phasor`. If real, the output is real (magnitude * cos).
+    """
+    if not tf.as_dtype(dtype).is_complex:
+        return magnitude * cos
+    return tf.complex(magnitude * cos, magnitude * sin)
+
+
+def _after(upstream: Tensor, x: Tensor) -> Tensor:
+    """
+    Returns x once `upstream` is computed.
+    The gradient functions recompute their intermediates from the kept input. Without this dependency the graph
+        executor can compute them during the forward pass (they don't need the upstream gradient) and keep them
+        in memory until the backward pass, which is what the custom gradients avoid.
+    """
+    with tf.control_dependencies([upstream]):
+        return tf.identity(x)
+
+
+def _radial_gradient(z: Tensor, upstream: Tensor, scale: Tensor, radial_derivative: Tensor) -> Tensor:
+    """
+    Wirtinger gradient of the phase preserving function w = s(|z|) z.
+    With g = dL/dRe(w) + j dL/dIm(w) the upstream gradient (TensorFlow convention) and u = z / |z|:
+        dL/dRe(z) + j dL/dIm(z) = conj(g) dw/dconj(z) + g conj(dw/dz) = s g + s'(|z|) |z| / 2 (g + conj(g) u^2)
+    :param scale: s(|z|)
+    :param radial_derivative: s'(|z|) |z|
+    """
+    if not z.dtype.is_complex:      # u^2 = 1
+        return (scale + radial_derivative) * upstream
+    _, cos, sin = _unit_phasor(z)
+    squared_phasor = tf.complex(cos * cos - sin * sin, 2 * cos * sin)
+    return tf.cast(scale, z.dtype) * upstream + \
+        tf.cast(radial_derivative / 2, z.dtype) * (upstream + tf.math.conj(upstream) * squared_phasor)
+
+
+def _apply_radial(z: Tensor, scale_fun: Callable[[Tensor], Tensor],
+                  radial_derivative_fun: Callable[[Tensor, Tensor], Tensor]) -> Tensor:
+    """
+    Phase preserving activation s(|z|) z with a custom gradient (see `_radial_gradient`) that only keeps z for the
+        backward pass instead of |z|, the casts and every intermediate of s.
+    :param scale_fun: s, function of |z|
+    :param radial_derivative_fun: Function of (|z|, s(|z|)) returning s'(|z|) |z|
+    """
+    @tf.custom_gradient
+    def activation(z):
+        def grad(upstream):
+            kept_z = _after(upstream, z)
+            abs_z = tf.math.abs(kept_z)
+            scale = scale_fun(abs_z)
+            return _radial_gradient(kept_z, upstream, scale, radial_derivative_fun(abs_z, scale))
+        return tf.cast(scale_fun(tf.math.abs(z)), z.dtype) * z, grad
+    return activation(z)
 
 
 # Regression
@@ -32,9 +108,10 @@ def modrelu(z: Tensor, b: float = 1., c: float = 1e-3) -> Tensor:
     value of a complex number, defined:
         modReLU(z) = ReLU(|z|+b)*z/|z|
     TODO: See how to check the non zero abs.
+    The gradient is computed analytically from z (see `_apply_radial`).
     """
-    abs_z = tf.math.abs(z)
-    return tf.cast(tf.keras.activations.relu(abs_z + b), dtype=z.dtype) * z / tf.cast(abs_z + c, dtype=z.dtype)
+    return _apply_radial(z, lambda abs_z: tf.nn.relu(abs_z + b) / (abs_z + c),
+                         lambda abs_z, scale: abs_z * (tf.cast(abs_z + b > 0, abs_z.dtype) - scale) / (abs_z + c))
 
 
 def zrelu(z: Tensor, epsilon=1e-7) -> Tensor:
@@ -44,13 +121,28 @@ def zrelu(z: Tensor, epsilon=1e-7) -> Tensor:
     This methods let's the output as the input if both real and imaginary parts are positive.
 
     https://stackoverflow.com/questions/49412717/advanced-custom-activation-function-in-keras-tensorflow
-    """
-    imag_relu = tf.nn.relu(tf.math.imag(z))
-    real_relu = tf.nn.relu(tf.math.real(z))
-    ret_real = imag_relu*real_relu / (imag_relu + epsilon)
-    ret_imag = imag_relu*real_relu / (real_relu + epsilon)
-    ret_val = tf.complex(ret_real, ret_imag)
-    return ret_val
+    The gradient is computed analytically from z so only z is kept for the backward pass.
+    """
+    @tf.custom_gradient
+    def activation(z):
+        def grad(upstream):
+            kept_z = _after(upstream, z)
+            real_relu, imag_relu = tf.nn.relu(tf.math.real(kept_z)), tf.nn.relu(tf.math.imag(kept_z))
+            real_step = tf.cast(real_relu > 0, real_relu.dtype)
+            imag_step = tf.cast(imag_relu > 0, imag_relu.dtype)
+            real_denominator, imag_denominator = real_relu + epsilon, imag_relu + epsilon
+            upstream_r, upstream_i = tf.math.real(upstream), tf.math.imag(upstream)
+            grad_r = real_step * imag_relu * (upstream_r / imag_denominator +
+                                              upstream_i * epsilon / tf.math.square(real_denominator))
+            grad_i = imag_step * real_relu * (upstream_r * epsilon / tf.math.square(imag_denominator) +
+                                              upstream_i / real_denominator)
+            return tf.complex(grad_r, grad_i) if z.dtype.is_complex else grad_r
+        imag_relu = tf.nn.relu(tf.math.imag(z))
+        real_relu = tf.nn.relu(tf.math.real(z))
+        ret_real = imag_relu*real_relu / (imag_relu + epsilon)
+        ret_imag = imag_relu*real_relu / (real_relu + epsilon)
+        return tf.complex(ret_real, ret_imag), grad
+    return activation(z)
 
 
 def crelu(z: Tensor, alpha: float = 0.0, max_value: Optional[float] = None, threshold: float = 0) -> Tensor:
@@ -68,7 +160,8 @@ def complex_cardioid(z: Tensor) -> Tensor:
     This function maintains the phase information while attenuating the magnitude based on the phase itself. 
     For real-valued inputs, it reduces to the ReLU.
     """
-    return tf.cast(1 + tf.math.cos(tf.math.angle(z)), dtype=z.dtype) * z / 2.
+    abs_z, cos, sin = _unit_phasor(z)
+    return _from_polar(abs_z * (1 + cos) / 2, cos, sin, z.dtype)
 
             
 """
@@ -112,8 +205,8 @@ def softmax_real_with_avg(z: Tensor, axis=-1) -> Tensor:
     :return: Real-valued tensor of the applied activation function
     """
     if z.dtype.is_complex:
-        return 0.5 * (tf.keras.activations.softmax(tf.math.real(z), axis) + tf.keras.activations.softmax(
-            tf.math.real(z), axis))
+        return 0.5 * (tf.keras.activations.softmax(tf.math.real(z), axis) +
+                      tf.keras.activations.softmax(tf.math.imag(z), axis))
     else:
         return tf.keras.activations.softmax(z, axis)
 
@@ -130,7 +223,7 @@ def softmax_real_with_mult(z: Tensor, axis=-1) -> Tensor:
     :return: Real-valued tensor of the applied activation function
     """
     if z.dtype.is_complex:
-        return tf.keras.activations.softmax(tf.math.real(z), axis) * tf.keras.activations.softmax(tf.math.real(z), axis)
+        return tf.keras.activations.softmax(tf.math.real(z), axis) * tf.keras.activations.softmax(tf.math.imag(z), axis)
     else:
         return tf.keras.activations.softmax(z, axis)
 
@@ -148,7 +241,7 @@ def softmax_of_softmax_real_with_mult(z: Tensor, axis=-1) -> Tensor:
     """
     if z.dtype.is_complex:
         return tf.keras.activations.softmax(
-            tf.keras.activations.softmax(tf.math.real(z), axis) * tf.keras.activations.softmax(tf.math.real(z), axis),
+            tf.keras.activations.softmax(tf.math.real(z), axis) * tf.keras.activations.softmax(tf.math.imag(z), axis),
             axis)
     else:
         return tf.keras.activations.softmax(z, axis)
@@ -167,7 +260,7 @@ def softmax_of_softmax_real_with_avg(z: Tensor, axis=-1) -> Tensor:
     """
     if z.dtype.is_complex:
         return tf.keras.activations.softmax(
-            tf.keras.activations.softmax(tf.math.real(z), axis) + tf.keras.activations.softmax(tf.math.real(z), axis),
+            tf.keras.activations.softmax(tf.math.real(z), axis) + tf.keras.activations.softmax(tf.math.imag(z), axis),
             axis)
     else:
         return tf.keras.activations.softmax(z, axis)
@@ -224,6 +317,59 @@ def softmax_real_with_polar(z: Tensor, axis=-1) -> Tensor:
         return tf.keras.activations.softmax(z, axis)
 
 
+"""
+Log probabilities of the softmax_real activations, computed from their input (the logits) in the log domain with
+    log_softmax instead of taking the log of the (possibly underflowed) probabilities.
+They are the log of the normalized probabilities, as categorical cross-entropy normalizes its input.
+    Only softmax_real_with_mult is not normalized: sigma(x) * sigma(y) / sum(sigma(x) * sigma(y)) = sigma(x + y)
+Used by `cvnn.losses.SoftmaxRealCrossEntropy`.
+"""
+
+
+def _log_average(log_a: Tensor, log_b: Tensor) -> Tensor:
+    """
+    log((a + b) / 2) from log(a) and log(b) without overflow: log(a) + softplus(log(b) - log(a)) - log(2)
+    """
+    return log_a + tf.math.softplus(log_b - log_a) - tf.math.log(tf.constant(2., dtype=log_a.dtype))
+
+
+def log_softmax_real_with_abs(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        return tf.nn.log_softmax(tf.math.abs(z), axis)
+    return tf.nn.log_softmax(z, axis)
+
+
+def log_softmax_real_with_avg(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        return _log_average(tf.nn.log_softmax(tf.math.real(z), axis), tf.nn.log_softmax(tf.math.imag(z), axis))
+    return tf.nn.log_softmax(z, axis)
+
+
+def log_softmax_real_with_mult(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        return tf.nn.log_softmax(tf.math.real(z) + tf.math.imag(z), axis)
+    return tf.nn.log_softmax(z, axis)
+
+
+def log_softmax_of_softmax_real_with_mult(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        # The inner softmax outputs are in [0, 1], so the outer log_softmax is stable on them
+        return tf.nn.log_softmax(tf.nn.softmax(tf.math.real(z), axis) * tf.nn.softmax(tf.math.imag(z), axis), axis)
+    return tf.nn.log_softmax(z, axis)
+
+
+def log_softmax_of_softmax_real_with_avg(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        return tf.nn.log_softmax(tf.nn.softmax(tf.math.real(z), axis) + tf.nn.softmax(tf.math.imag(z), axis), axis)
+    return tf.nn.log_softmax(z, axis)
+
+
+def log_softmax_real_with_polar(z: Tensor, axis=-1) -> Tensor:
+    if z.dtype.is_complex:
+        return _log_average(tf.nn.log_softmax(tf.math.abs(z), axis), tf.nn.log_softmax(tf.math.angle(z), axis))
+    return tf.nn.log_softmax(z, axis)
+
+
 """
 etf Functions
 """
@@ -270,12 +416,26 @@ Phasor Networks
 """
 
 
+def _sector_phasor(z: Tensor, k: int, offset: float) -> Tensor:
+    """
+    Unit phasor exp(j 2 pi (m + offset) / k) of the sector m = floor(angle(z) k / (2 pi)) of z.
+    The k phasors are a constant table, gathered by sector instead of computing exp per element.
+    """
+    real_dtype = z.dtype.real_dtype
+    sector = tf.math.floor(tf.math.angle(z) * (k / (2 * pi)))
+    sector = tf.math.floormod(tf.cast(sector, tf.int32), k)     # angle in (-pi, pi] gives sectors in [-k/2, k/2]
+    phases = (tf.range(k, dtype=real_dtype) + offset) * (2 * pi / k)
+    return tf.gather(tf.complex(tf.math.cos(phases), tf.math.sin(phases)), sector)
+
+
 def georgiou_cdbp(z:Tensor, r: float = 1, c: float = 1e-3) -> Tensor:
     """
     Activation function proposed by G. M. Georgioy and C. Koutsougeras in
         https://ieeexplore.ieee.org/abstract/document/142037
+    The gradient is computed analytically from z (see `_apply_radial`).
     """
-    return z / tf.cast(c + tf.math.abs(z)/r, dtype=z.dtype)
+    return _apply_radial(z, lambda abs_z: 1. / (c + abs_z / r),
+                         lambda abs_z, scale: -abs_z * tf.math.square(scale) / r)
 
 
 def complex_signum(z: Tensor, k: Optional[int] = None) -> Tensor:
@@ -285,13 +445,9 @@ def complex_signum(z: Tensor, k: Optional[int] = None) -> Tensor:
         https://ieeexplore.ieee.org/abstract/document/548176
     """
     if k:
-        # values = np.linspace(pi / k, 2 * pi - pi / k, k)
-        angle_cast = tf.math.floor(tf.math.angle(z) * k / (2 * pi))
-        # import pdb; pdb.set_trace()
-        return tf.math.exp(tf.complex(
-            tf.zeros(tf.shape(z), dtype=z.dtype.real_dtype), angle_cast * 2 * pi / k))
-    else:
-        return tf.math.exp(tf.complex(tf.zeros(tf.shape(z), dtype=z.dtype.real_dtype), tf.math.angle(z)))
+        return _sector_phasor(z, k, offset=0.)
+    _, cos, sin = _unit_phasor(z)
+    return tf.complex(cos, sin)
 
 
 def mvn_activation(z: Tensor, k: Optional[int] = None) -> Tensor:
@@ -304,13 +460,9 @@ def mvn_activation(z: Tensor, k: Optional[int] = None) -> Tensor:
         http://pefmath2.etf.rs/files/93/399.pdf
     """
     if k:
-        # values = np.linspace(pi / k, 2 * pi - pi / k, k)
-        angle_cast = tf.math.floor(tf.math.angle(z) * k / (2 * pi))
-        # import pdb; pdb.set_trace()
-        return tf.math.exp(tf.complex(
-            tf.zeros(tf.shape(z), dtype=z.dtype.real_dtype), (angle_cast + 0.5) * 2 * pi / k))
-    else:
-        return tf.math.exp(tf.complex(tf.zeros(tf.shape(z), dtype=z.dtype.real_dtype), tf.math.angle(z)))
+        return _sector_phasor(z, k, offset=0.5)
+    _, cos, sin = _unit_phasor(z)
+    return tf.complex(cos, sin)
 
 
 """
@@ -323,6 +475,41 @@ TYPE A: Cartesian form.
 # nn has leaky relu, activation doesn't
 
 
+def _apply_cart(z: Tensor, fun: Callable[[Tensor], Tensor],
+                derivative: Optional[Callable[[Tensor], Tensor]] = None) -> Tensor:
+    """
+    Applies the real-valued element-wise function `fun` to both the real and imag part of z with a single op
+        on the interleaved view of z.
+    :param derivative: Optional function of the output y = fun(x) that gives fun'(x).
+        If given, the backward pass only keeps the output, which the next layer normally keeps anyway,
+        instead of the input and intermediates of `fun`. Only worth it where the TensorFlow gradient of `fun` keeps
+        its input (softplus, softsign, leaky relu, hard sigmoid). The gradients of relu, sigmoid, tanh, elu, selu and
+        exp already only keep the output with a single fused kernel, and a custom gradient would prevent Grappler
+        from fusing them with the preceding MatMul or Conv.
+    """
+    if derivative is not None:
+        fun = _with_output_gradient(fun, derivative)
+    if not z.dtype.is_complex:
+        return fun(z)
+    return view_as_complex(fun(view_as_real(z)))
+
+
+def _with_output_gradient(fun: Callable[[Tensor], Tensor], derivative: Callable[[Tensor], Tensor]):
+    @tf.custom_gradient
+    def activation(x):
+        y = fun(x)
+
+        def grad(upstream):
+            return upstream * derivative(_after(upstream, y))
+        return y, grad
+    return activation
+
+
+def _hard_sigmoid(x: Tensor) -> Tensor:
+    # Defined here as the slope of tf.keras.activations.hard_sigmoid depends on the Keras version
+    return tf.clip_by_value(HARD_SIGMOID_SLOPE * x + 0.5, 0., 1.)
+
+
 def cart_sigmoid(z: Tensor) -> Tensor:
     """
     Applies the function (1.0 / (1.0 + exp(-x))) + j * (1.0 / (1.0 + exp(-y))) where z = x + j * y
@@ -330,9 +517,7 @@ def cart_sigmoid(z: Tensor) -> Tensor:
     :param z: Tensor to be used as input of the activation function
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.sigmoid(tf.math.real(z)),
-                              tf.keras.activations.sigmoid(tf.math.imag(z))), 
-                   dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.sigmoid)
 
 
 def cart_elu(z: Tensor, alpha=1.0) -> Tensor:
@@ -344,8 +529,7 @@ def cart_elu(z: Tensor, alpha=1.0) -> Tensor:
     :param alpha: A scalar, slope of negative section.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.elu(tf.math.real(z), alpha),
-                              tf.keras.activations.elu(tf.math.imag(z), alpha)), dtype=z.dtype)
+    return _apply_cart(z, lambda x: tf.keras.activations.elu(x, alpha))
 
 
 def cart_exponential(z: Tensor) -> Tensor:
@@ -355,8 +539,7 @@ def cart_exponential(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.exponential(tf.math.real(z)),
-                              tf.keras.activations.exponential(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.exponential)
 
 
 def cart_hard_sigmoid(z: Tensor) -> Tensor:
@@ -370,8 +553,9 @@ def cart_hard_sigmoid(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.hard_sigmoid(tf.math.real(z)),
-                              tf.keras.activations.hard_sigmoid(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, _hard_sigmoid,
+                       lambda y: tf.where(tf.logical_and(y > 0, y < 1), HARD_SIGMOID_SLOPE * tf.ones_like(y),
+                                          tf.zeros_like(y)))
 
 
 def cart_relu(z: Tensor, alpha: float = 0.0, max_value: Optional[float] = None, threshold: float = 0) -> Tensor:
@@ -390,8 +574,9 @@ def cart_relu(z: Tensor, alpha: float = 0.0, max_value: Optional[float] = None,
         values will be damped or set to zero (default 0).
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.relu(tf.math.real(z), alpha, max_value, threshold),
-                              tf.keras.activations.relu(tf.math.imag(z), alpha, max_value, threshold)), dtype=z.dtype)
+    if alpha == 0 and max_value is None and threshold == 0:
+        return _apply_cart(z, tf.nn.relu)
+    return _apply_cart(z, lambda x: tf.keras.activations.relu(x, alpha, max_value, threshold))
 
 
 def cart_leaky_relu(z: Tensor, alpha=0.2, name=None) -> Tensor:
@@ -404,8 +589,10 @@ def cart_leaky_relu(z: Tensor, alpha=0.2, name=None) -> Tensor:
     :param name: A name for the operation (optional).
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.nn.leaky_relu(tf.math.real(z), alpha, name),
-                              tf.nn.leaky_relu(tf.math.imag(z), alpha, name)), dtype=z.dtype)
+    if alpha < 0:       # The sign of the output does not tell the branch
+        return _apply_cart(z, lambda x: tf.nn.leaky_relu(x, alpha, name))
+    return _apply_cart(z, lambda x: tf.nn.leaky_relu(x, alpha, name),
+                       lambda y: tf.where(y > 0, tf.ones_like(y), alpha * tf.ones_like(y)))
 
 
 def cart_selu(z: Tensor) -> Tensor:
@@ -417,8 +604,7 @@ def cart_selu(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.selu(tf.math.real(z)),
-                              tf.keras.activations.selu(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.selu)
 
 
 def cart_softplus(z: Tensor) -> Tensor:
@@ -429,8 +615,7 @@ def cart_softplus(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.softplus(tf.math.real(z)),
-                              tf.keras.activations.softplus(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.softplus, lambda y: -tf.math.expm1(-y))     # sigmoid(x)
 
 
 def cart_softsign(z: Tensor) -> Tensor:
@@ -441,8 +626,7 @@ def cart_softsign(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.softsign(tf.math.real(z)),
-                              tf.keras.activations.softsign(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.softsign, lambda y: tf.math.square(1 - tf.math.abs(y)))
 
 
 def cart_tanh(z: Tensor) -> Tensor:
@@ -454,8 +638,7 @@ def cart_tanh(z: Tensor) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.tanh(tf.math.real(z)),
-                              tf.keras.activations.tanh(tf.math.imag(z))), dtype=z.dtype)
+    return _apply_cart(z, tf.keras.activations.tanh)
 
 
 # Classification
@@ -470,8 +653,10 @@ def cart_softmax(z: Tensor, axis=-1) -> Tensor:
     :param z: Input tensor.
     :return: Tensor result of the applied activation function
     """
-    return tf.cast(tf.complex(tf.keras.activations.softmax(tf.math.real(z), axis),
-                              tf.keras.activations.softmax(tf.math.imag(z), axis)), dtype=z.dtype)
+    if not z.dtype.is_complex:
+        return tf.keras.activations.softmax(z, axis)
+    # The interleaved view adds a trailing axis
+    return view_as_complex(tf.keras.activations.softmax(view_as_real(z), axis - 1 if axis < 0 else axis))
 
 
 """
@@ -484,11 +669,33 @@ TYPE B: Polar form.
 
 def _apply_pol(z: Tensor, amp_fun: Callable[[Tensor], Tensor],
                pha_fun: Optional[Callable[[Tensor], Tensor]] = None) -> Tensor:
-    amp = amp_fun(tf.math.abs(z))
-    pha = tf.math.angle(z)
+    """
+    Applies `amp_fun` to the amplitude of z and `pha_fun` (if given) to its phase.
+    Without `pha_fun` the phase is kept with the unit phasor z / |z| (see `_unit_phasor`), no trigonometric function
+        is computed, and the gradient is computed from z (see `_radial_gradient` with s(|z|) = amp_fun(|z|) / |z|).
+        At z = 0, where the phase is not defined, s is taken as amp_fun'(0).
+    """
     if pha_fun is not None:
-        pha = pha_fun(pha)
-    return tf.cast(tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha)), dtype=z.dtype)
+        amp = amp_fun(tf.math.abs(z))
+        pha = pha_fun(tf.math.angle(z))
+        return tf.cast(tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha)), dtype=z.dtype)
+
+    @tf.custom_gradient
+    def activation(z):
+        def grad(upstream):
+            kept_z = _after(upstream, z)
+            abs_z = tf.math.abs(kept_z)
+            with tf.GradientTape() as tape:     # Element-wise amp_fun: its gradient is the derivative
+                tape.watch(abs_z)
+                amp = amp_fun(abs_z)
+            amp_derivative = tape.gradient(amp, abs_z)
+            nonzero = abs_z > 0
+            scale = tf.where(nonzero, amp / tf.where(nonzero, abs_z, tf.ones_like(abs_z)), amp_derivative)
+            return _radial_gradient(kept_z, upstream, scale,
+                                    tf.where(nonzero, amp_derivative - scale, tf.zeros_like(scale)))
+        abs_z, cos, sin = _unit_phasor(z)
+        return _from_polar(amp_fun(abs_z), cos, sin, z.dtype), grad
+    return activation(z)
 
 
 def pol_tanh(z: Tensor) -> Tensor:
@@ -525,10 +732,9 @@ def pol_selu(z: Tensor) -> Tensor:
     Logic:
         I must mantain the phase (angle) so: cos(theta) = x_0/r_0 = x_1/r_1.
         For real case, x_0 = r_0 so it also works.
+        As |z| >= 0, selu(|z|) = scale * |z| and the result is scale * z. Its gradient keeps no tensor.
     """
-    r_0 = tf.abs(z)
-    r_1 = tf.keras.activations.selu(r_0)
-    return tf.cast(tf.complex(tf.math.real(z) * r_1 / r_0, tf.math.imag(z) * r_1 / r_0), dtype=z.dtype)
+    return tf.cast(SELU_SCALE, z.dtype) * z
 
 
 act_dispatcher = {
@@ -580,6 +786,35 @@ act_dispatcher = {
     'complex_cardioid': complex_cardioid
 }
 
+# Cartesian activations (applied independently to the real and imaginary parts) with their default arguments and the
+#   real function they apply to both parts. It can be applied directly to a real tensor holding both parts (see the
+#   `fused_epilogue` option of ComplexDense and ComplexConv) where the built-in gradient of the real op lets Grappler fuse
+#   it with the preceding bias add.
+CARTESIAN_ACTIVATIONS = {
+    linear: tf.identity,
+    crelu: tf.nn.relu,
+    cart_relu: tf.nn.relu,
+    cart_sigmoid: tf.sigmoid,
+    cart_elu: tf.nn.elu,
+    cart_exponential: tf.exp,
+    cart_hard_sigmoid: _hard_sigmoid,
+    cart_leaky_relu: tf.nn.leaky_relu,
+    cart_selu: tf.nn.selu,
+    cart_softplus: tf.nn.softplus,
+    cart_softsign: tf.nn.softsign,
+    cart_tanh: tf.tanh
+}
+
+# Log probabilities of the softmax_real activations (see `cvnn.losses.SoftmaxRealCrossEntropy`)
+SOFTMAX_REAL_LOG_PROBABILITIES = {
+    softmax_real_with_abs: log_softmax_real_with_abs,
+    softmax_real_with_avg: log_softmax_real_with_avg,
+    softmax_real_with_mult: log_softmax_real_with_mult,
+    softmax_of_softmax_real_with_mult: log_softmax_of_softmax_real_with_mult,
+    softmax_of_softmax_real_with_avg: log_softmax_of_softmax_real_with_avg,
+    softmax_real_with_polar: log_softmax_real_with_polar
+}
+
 if __name__ == '__main__':
     x = tf.constant([-2, 1.0, 0.0, 1.0, -3, 0.8, 0.1], dtype=tf.float32)
     y = tf.constant([-2.5, -1.5, 0.0, 1.0, 2, 0.4, -0.4], dtype=tf.float32)
@@ -0,0 +1,150 @@
+import numpy as np
+from tensorflow.keras import Sequential
+from cvnn import logger
+import cvnn.layers as layers
+from cvnn.initializers import ComplexGlorotUniform, Zeros
+from cvnn.layers.convolutional import ComplexConv
+from typing import Type, Optional
+
+FOLD_TOLERANCE = 1e-6   # Relative tolerance to consider the batch norm transform a complex multiplication
+
+
+def _get_batch_norm_transform(batch_norm):
+    """
+    Inference-mode ComplexBatchNormalization as a per-channel affine transform of [Re, Im]:
+        [y_r, y_i]^T = M ([x_r, x_i]^T - mean) + beta with M = gamma * V^(-1/2)
+        where the complex gamma acts as the rotation-scale matrix [[gamma_r, -gamma_i], [gamma_i, gamma_r]]
+    :return: Tuple (m, mean_r, mean_i, beta_r, beta_i) of numpy arrays.
+        m has shape (channels, 2, 2) and the others (channels,)
+    """
+    w_rr, w_ri, w_ii = [w.numpy() for w in batch_norm._inverse_sqrt_var(batch_norm.moving_var)]
+    mean = batch_norm.moving_mean.numpy()
+    if batch_norm.my_dtype.is_complex:
+        gamma_r, gamma_i = [w.numpy() for w in batch_norm._get_complex_weight_parts('gamma')]
+        beta_r, beta_i = [w.numpy() for w in batch_norm._get_complex_weight_parts('beta')]
+    else:
+        gamma_r, gamma_i = batch_norm.gamma.numpy(), np.zeros_like(mean)
+        beta_r, beta_i = batch_norm.beta.numpy(), np.zeros_like(mean)
+    if not batch_norm.scale:
+        gamma_r, gamma_i = np.ones_like(gamma_r), np.zeros_like(gamma_i)
+    if not batch_norm.center:
+        beta_r, beta_i = np.zeros_like(beta_r), np.zeros_like(beta_i)
+    m = np.stack((np.stack((gamma_r * w_rr - gamma_i * w_ri, gamma_r * w_ri - gamma_i * w_ii), axis=-1),
+                  np.stack((gamma_i * w_rr + gamma_r * w_ri, gamma_i * w_ri + gamma_r * w_ii), axis=-1)), axis=-2)
+    return m, np.real(mean), np.imag(mean), beta_r, beta_i
+
+
+def _is_foldable(layer, next_layer) -> bool:
+    """
+    Checks `layer` is a ComplexDense or ComplexConv without activation followed by a ComplexBatchNormalization
+        normalizing its channel axis.
+    """
+    if not isinstance(next_layer, layers.ComplexBatchNormalization):
+        return False
+    if type(layer) is layers.ComplexDense:
+        channel_axis = len(layer.output_shape) - 1
+    elif isinstance(layer, ComplexConv) and not isinstance(layer, layers.ComplexConv2DTranspose):
+        channel_axis = 1 if layer.data_format == 'channels_first' else layer.rank + 1
+    else:
+        return False
+    if getattr(layer.activation, '__name__', None) != 'linear':
+        logger.warning(f"{layer.name} has a non-linear activation, {next_layer.name} will not be folded")
+        return False
+    if next_layer.axis != [channel_axis]:
+        logger.warning(f"{next_layer.name} does not normalize the channel axis of {layer.name}, it will not be folded")
+        return False
+    return True
+
+
+def _fold_layer(layer, batch_norm):
+    """
+    Folds `batch_norm` into `layer`.
+    The complex output of the layer is u = x * k + b (only the last axis of the kernel indexes the output channels).
+    Applying the batch norm gives the widely-linear y = M [u_r, u_i]^T + beta - M mean, so:
+        - If M is a rotation-scale matrix (m00 == m11 and m01 == -m10), M is the complex scalar c = m00 + j m10 and
+            the result is the same layer with kernel c * k and bias c * (b - mean) + beta.
+        - Otherwise a ComplexWidelyLinearDense or ComplexWidelyLinearConv layer is returned.
+    :return: Tuple (new_layer, weights) or None if the layer can't be folded.
+    """
+    m, mean_r, mean_i, beta_r, beta_i = _get_batch_norm_transform(batch_norm)
+    weights = layer.get_weights()
+    # Initializers are not used (weights are set afterwards) and cvnn Zeros can't be deserialized
+    config = layer.get_config()
+    config.update({'use_bias': True, 'kernel_initializer': ComplexGlorotUniform(), 'bias_initializer': Zeros(),
+                   'name': layer.name + "_folded"})
+    if not layer.my_dtype.is_complex:
+        kernel = weights[0]
+        bias = weights[1] if layer.use_bias else np.zeros(kernel.shape[-1], dtype=kernel.dtype)
+        scale = m[..., 0, 0]
+        return layer.__class__.from_config(config), [kernel * scale, scale * (bias - mean_r) + beta_r]
+    if layer.weight_storage == 'interleaved':     # Each complex weight is a single (..., 2) array
+        weights = [part for weight in weights for part in (weight[..., 0], weight[..., 1])]
+    kernel_r, kernel_i = weights[:2]
+    bias_r, bias_i = weights[2:] if layer.use_bias else (np.zeros(kernel_r.shape[-1], dtype=kernel_r.dtype),) * 2
+    centered_r, centered_i = bias_r - mean_r, bias_i - mean_i
+    bias_r = m[..., 0, 0] * centered_r + m[..., 0, 1] * centered_i + beta_r
+    bias_i = m[..., 1, 0] * centered_r + m[..., 1, 1] * centered_i + beta_i
+    if np.allclose(m[..., 0, 0], m[..., 1, 1], rtol=FOLD_TOLERANCE, atol=0) and \
+            np.allclose(m[..., 0, 1], -m[..., 1, 0], rtol=FOLD_TOLERANCE, atol=0):
+        c_r, c_i = m[..., 0, 0], m[..., 1, 0]
+        new_weights = [c_r * kernel_r - c_i * kernel_i, c_r * kernel_i + c_i * kernel_r, bias_r, bias_i]
+        if layer.weight_storage == 'interleaved':
+            new_weights = [np.stack(new_weights[:2], axis=-1), np.stack(new_weights[2:], axis=-1)]
+        return layer.__class__.from_config(config), new_weights
+    # Widely-linear: [y_r, y_i] = [x_r, x_i] * [[A, C], [B, D]]
+    a = m[..., 0, 0] * kernel_r + m[..., 0, 1] * kernel_i
+    b = m[..., 0, 1] * kernel_r - m[..., 0, 0] * kernel_i
+    c = m[..., 1, 0] * kernel_r + m[..., 1, 1] * kernel_i
+    d = m[..., 1, 1] * kernel_r - m[..., 1, 0] * kernel_i
+    block_kernel = np.concatenate((np.concatenate((a, c), axis=-1), np.concatenate((b, d), axis=-1)), axis=-2)
+    new_weights = [block_kernel, np.concatenate((bias_r, bias_i))]
+    if isinstance(layer, layers.ComplexDense):
+        return layers.ComplexWidelyLinearDense(units=layer.units, dtype=layer.my_dtype,
+                                               name=layer.name + "_folded"), new_weights
+    if layer.groups != 1:
+        logger.warning(f"{layer.name} uses groups={layer.groups}, {batch_norm.name} will not be folded")
+        return None
+    return layers.ComplexWidelyLinearConv(rank=layer.rank, filters=layer.filters, kernel_size=layer.kernel_size,
+                                          strides=layer.strides, padding=layer.padding,
+                                          data_format=layer.data_format, dilation_rate=layer.dilation_rate,
+                                          dtype=layer.my_dtype, name=layer.name + "_folded"), new_weights
+
+
+def fold_batch_normalization(model: Type[Sequential], name: Optional[str] = None):
+    """
+    Creates an inference copy of `model` where each ComplexBatchNormalization following a ComplexDense or
+        ComplexConv layer (without activation) is folded into the weights and bias of that layer.
+    If the batch norm transform is not a complex multiplication (the general case, as the whitening mixes the
+        real and imaginary parts) the pair is replaced by a single ComplexWidelyLinearDense or ComplexWidelyLinearConv
+        that costs the same as the original layer.
+    The batch normalization layers use their moving statistics, i.e. the result is equivalent to
+        `model(x, training=False)`.
+    Layers that are not folded are shared with the original model.
+    :param model: Sequential model
+    :param name: Name of the new model. Default `{model.name}_folded`
+    :return: Sequential model
+    """
+    assert isinstance(model, Sequential), "Sorry, only sequential models supported for the moment"
+    new_layers = []
+    model_layers = model.layers
+    i = 0
+    while i < len(model_layers):
+        layer = model_layers[i]
+        folded = None
+        if i + 1 < len(model_layers) and _is_foldable(layer, model_layers[i + 1]):
+            folded = _fold_layer(layer, model_layers[i + 1])
+        if folded is not None:
+            new_layers.append(folded)
+            logger.debug(f"{model_layers[i + 1].name} folded into {folded[0].name}")
+            i += 2
+        else:
+            new_layers.append((layer, None))
+            i += 1
+    if name is None:
+        name = f"{model.name}_folded"
+    folded_model = Sequential([layers.ComplexInput(input_shape=model.input_shape[1:], dtype=model.input.dtype)] +
+                              [new_layer for new_layer, _ in new_layers], name=name)
+    for new_layer, weights in new_layers:
+        if weights is not None:
+            new_layer.set_weights(weights)
+    return folded_model
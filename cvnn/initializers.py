@@ -4,12 +4,14 @@ import tensorflow as tf
 from tensorflow.python.ops import random_ops
 from tensorflow.python.ops import stateless_random_ops
 from tensorflow.keras.initializers import Initializer
+from cvnn.utils import view_as_complex
 import sys
 from pdb import set_trace
 # Typing
 from typing import Optional
 
 INIT_TECHNIQUES = {'zero_imag', 'mirror'}
+RAYLEIGH_CRITERIA = {'glorot', 'he'}
 
 
 def _compute_fans(shape):
@@ -100,11 +102,18 @@ class ComplexInitializer(Initializer):
         pass
 
     def __call__(self, shape, dtype=tf.dtypes.complex64, **kwargs):
+        """
+        :return: Tensor of shape `shape` and dtype `dtype`.
+            For complex dtypes, the real and imaginary parts are drawn with a single random op (of shape
+            `shape + (2,)`) so they are independent even when a seed is given.
+        """
         fan_in, fan_out = _compute_fans(shape)
         arg = self._compute_limit(fan_in, fan_out)
         dtype = tf.dtypes.as_dtype(dtype)
         if dtype.is_complex:
             arg = arg / np.sqrt(2)
+            return view_as_complex(self._call_random_generator(shape=tuple(shape) + (2,), arg=arg,
+                                                               dtype=dtype.real_dtype))
         return self._call_random_generator(shape=shape, arg=arg, dtype=dtype.real_dtype)
 
     def get_config(self):  # To support serialization
@@ -240,6 +249,59 @@ class ComplexHeNormal(ComplexInitializer):
         return tf.math.sqrt(2. / fan_in)
 
 
+class ComplexRayleigh(ComplexInitializer):
+    """
+    Rayleigh magnitude and uniform phase initializer.
+    Reference: Section 3.6 of Trabelsi, Chiheb et al. "Deep Complex Networks" https://arxiv.org/abs/1705.09792
+    Draws samples z = |z| exp(j phase) with:
+        - `|z| ~ Rayleigh(scale)`, drawn with the inverse CDF: `|z| = scale * sqrt(-2 log(1 - u))`, `u ~ U[0, 1)`
+        - `phase ~ U[-pi, pi)`
+    so Var(z) = 2 * scale^2 with
+        - 'glorot' criterion: `scale = 1 / sqrt(fan_in + fan_out)`, i.e. Var(z) = 2 / (fan_in + fan_out)
+        - 'he' criterion: `scale = 1 / sqrt(fan_in)`, i.e. Var(z) = 2 / fan_in
+    where `fan_in` is the number of input units in the weight tensor and `fan_out` is the number of output units.
+    The magnitudes and phases are computed from a single uniform random op.
+    For real dtypes it returns the magnitude with a random sign, which has the same variance.
+
+    ```
+    # Usage in a cvnn layer:
+    import cvnn
+    initializer = cvnn.initializers.ComplexRayleigh(criterion='he')
+    layer = cvnn.layers.ComplexDense(units=10, kernel_initializer=initializer)
+    ```
+    """
+    __name__ = "Complex Rayleigh"
+
+    def __init__(self, criterion: str = 'glorot', seed: Optional[int] = None):
+        if criterion.lower() not in RAYLEIGH_CRITERIA:
+            raise ValueError(f"Unsuported criterion {criterion}, supported criteria are {RAYLEIGH_CRITERIA}")
+        self.criterion = criterion.lower()
+        super(ComplexRayleigh, self).__init__(distribution="uniform", seed=seed)
+
+    def _compute_limit(self, fan_in, fan_out):
+        if self.criterion == 'he':
+            return 1. / tf.math.sqrt(float(fan_in))
+        return 1. / tf.math.sqrt(float(fan_in + fan_out))
+
+    def __call__(self, shape, dtype=tf.dtypes.complex64, **kwargs):
+        fan_in, fan_out = _compute_fans(shape)
+        dtype = tf.dtypes.as_dtype(dtype)
+        real_dtype = dtype.real_dtype
+        uniform = self._random_generator.random_uniform(shape=tuple(shape) + (2,), minval=0., maxval=1.,
+                                                        dtype=real_dtype)
+        magnitude = tf.cast(self._compute_limit(fan_in, fan_out), real_dtype) * \
+            tf.math.sqrt(-2. * tf.math.log1p(-uniform[..., 0]))
+        phase = np.pi * (2. * uniform[..., 1] - 1.)
+        if dtype.is_complex:
+            return tf.complex(magnitude * tf.math.cos(phase), magnitude * tf.math.sin(phase))
+        return tf.where(phase < 0, -magnitude, magnitude)
+
+    def get_config(self):
+        config = super(ComplexRayleigh, self).get_config()
+        config.update({"criterion": self.criterion})
+        return config
+
+
 class Zeros:
     """
     Creates a tensor with all elements set to zero.
@@ -263,6 +325,9 @@ class Zeros:
     def __call__(self, shape, dtype=tf.dtypes.complex64):
         return tf.zeros(shape, dtype=tf.dtypes.as_dtype(dtype).real_dtype)
 
+    def get_config(self):  # To support serialization
+        return {}
+
 
 class Ones:
     __name__ = "Ones"
@@ -270,12 +335,16 @@ class Ones:
     def __call__(self, shape, dtype=tf.dtypes.complex64):
         return tf.ones(shape, dtype=tf.dtypes.as_dtype(dtype).real_dtype)
 
+    def get_config(self):  # To support serialization
+        return {}
+
 
 init_dispatcher = {
     "ComplexGlorotUniform": ComplexGlorotUniform,
     "ComplexGlorotNormal": ComplexGlorotNormal,
     "ComplexHeUniform": ComplexHeUniform,
-    "ComplexHeNormal": ComplexHeNormal
+    "ComplexHeNormal": ComplexHeNormal,
+    "ComplexRayleigh": ComplexRayleigh
 }
 
 
@@ -5,7 +5,9 @@ from cvnn.layers.convolutional import ComplexConv2D, ComplexConv1D, ComplexConv3
 from cvnn.layers.convolutional import ComplexConv2DTranspose
 from cvnn.layers.core import ComplexInput, ComplexDense, ComplexFlatten, ComplexDropout, complex_input
 from cvnn.layers.upsampling import ComplexUpSampling2D
-from cvnn.layers.core import ComplexBatchNormalization
+from cvnn.layers.core import ComplexBatchNormalization, ComplexLowRankDense
+from cvnn.layers.widely_linear import ComplexWidelyLinearDense, ComplexWidelyLinearConv
+from cvnn.layers.quantized import ComplexQuantizedDense, ComplexQuantizedConv2D
 
 
 __author__ = 'J. Agustin BARRACHINA'
@@ -1,10 +1,11 @@
 import six
 import functools
+from time import perf_counter
+import numpy as np
 import tensorflow as tf
 from packaging import version
 
 from tensorflow.keras import activations
-from tensorflow.keras import backend
 from tensorflow.keras import constraints
 from tensorflow.keras import initializers
 from tensorflow.keras import regularizers
@@ -23,7 +24,14 @@ from tensorflow.python.ops import nn_ops
 from cvnn.layers.core import ComplexLayer
 from cvnn.initializers import ComplexGlorotUniform, Zeros, ComplexInitializer, INIT_TECHNIQUES
 from cvnn import logger
-from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.layers.core import DEFAULT_COMPLEX_TYPE, WEIGHT_STORAGES
+
+COMPLEX_MULT_METHODS = {'standard', 'gauss', 'stacked'}
+AUTOTUNE_BATCH_SIZE = 8         # Batch size used to autotune when the batch dimension is unknown at build time
+AUTOTUNE_REPETITIONS = 3
+_AUTOTUNE_CACHE = {}            # Fastest complex_mult method found for each layer configuration and input shape
+CONV_ALGORITHMS = {'direct', 'fft', 'auto'}
+FFT_KERNEL_SIZE_THRESHOLD = 64  # With algorithm='auto', FFT is used for kernels with at least this number of elements
 
 
 class ComplexConv(Layer, ComplexLayer):
@@ -74,9 +82,8 @@ class ComplexConv(Layer, ComplexLayer):
         bias_initializer: An initializer for the bias vector. If None, the default
           initializer will be used.
         kernel_regularizer: Optional regularizer for the convolution kernel.
-            ATTENTION: Not yet implemented! This parameter will have no effect.
+            For complex dtype it is applied to the real and imaginary parts.
         bias_regularizer: Optional regularizer for the bias vector.
-            ATTENTION: Not yet implemented! This parameter will have no effect.
         activity_regularizer: Optional regularizer function for the output.
         kernel_constraint: Optional projection function to be applied to the
             kernel after being updated by an `Optimizer` (e.g. used to implement
@@ -91,17 +98,44 @@ class ComplexConv(Layer, ComplexLayer):
             - 'mirror': Uses the initializer for both real and imaginary part.
                 Note that some initializers such as Glorot or He will lose it's property if initialized this way.
             - 'zero_imag': Initializer real part and let imaginary part to zero.
+        :param complex_mult: One of 'standard', 'gauss', 'stacked' or 'auto'.
+            How the complex convolution is computed with real ones.
+            - 'standard' (default): 4 real convolutions (r*r, i*i, r*i, i*r).
+            - 'gauss': Gauss' (Karatsuba) trick, 3 real convolutions for the price of some extra additions.
+            - 'stacked': A single real convolution of the input [Re, Im] concatenated on the channel axis with the
+                block kernel [[k_r, k_i], [-k_i, k_r]] of shape (..., 2*input_channels, 2*filters).
+                Only supported with groups=1.
+            - 'auto': Times the above methods at `build` and keeps the fastest one.
+                The choice is cached for each layer configuration and input shape.
+        :param algorithm: One of 'direct', 'fft' or 'auto'. Only 1D and 2D convolutions support 'fft'.
+            - 'direct' (default): Uses `tf.nn.convolution` (see `complex_mult`). O(N·K) complexity.
+            - 'fft': Computes the convolution as a pointwise product in the frequency domain. O(N·log(N)) complexity,
+                worth it for large kernels. `complex_mult` is ignored. Only supported with groups=1.
+            - 'auto': Uses 'fft' for 1D and 2D kernels of at least FFT_KERNEL_SIZE_THRESHOLD elements
+                and 'direct' otherwise.
+        :param weight_storage: One of 'split' or 'interleaved'. How the complex kernel and bias are stored.
+            Ignored if dtype is real.
+            - 'split' (default): Two real variables per weight (`kernel_r` and `kernel_i`).
+            - 'interleaved': A single real variable of shape (..., 2) per weight. The complex bias (and the kernel
+                for algorithm='fft') are read without copy instead of assembled with `tf.complex` on every call.
+                Constraints act on the interleaved variable.
+        :param fused_epilogue: If True, the convolution, bias and activation are computed on a real tensor holding
+            the real and imaginary parts of the outputs: a single real convolution of the (not copied) interleaved
+            view of the input, a real bias add and, for the Cartesian activations of
+            `cvnn.activations.CARTESIAN_ACTIVATIONS`, the real activation, which Grappler fuses with the
+            convolution (relu, elu, leaky relu on CPU). It saves the complex pre-activation buffers and the
+            packing of the input. `complex_mult` is ignored. Only supported with channels_last, groups=1 and
+            algorithm 'direct' (or 'auto', which then uses 'direct'). Ignored if dtype is real.
       """
 
     def __init__(self, rank, filters, kernel_size, dtype=DEFAULT_COMPLEX_TYPE, strides=1, padding='valid', data_format=None, dilation_rate=1,
                  groups=1, activation=None, use_bias=True,
                  kernel_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
-                 kernel_regularizer=None, bias_regularizer=None,  # TODO: Not yet working
+                 kernel_regularizer=None, bias_regularizer=None,
                  activity_regularizer=None, kernel_constraint=None, bias_constraint=None,
-                 init_technique: str = 'mirror',
-                 trainable=True, name=None, conv_op=None, **kwargs):
-        if kernel_regularizer is not None or bias_regularizer is not None:
-            logger.warning(f"Sorry, regularizers are not implemented yet, this parameter will take no effect")
+                 init_technique: str = 'mirror', complex_mult: str = 'standard', algorithm: str = 'direct',
+                 weight_storage: str = 'split', fused_epilogue: bool = False, trainable=True, name=None,
+                 conv_op=None, **kwargs):
         super(ComplexConv, self).__init__(
             trainable=trainable,
             name=name,
@@ -132,12 +166,20 @@ class ComplexConv(Layer, ComplexLayer):
         self.kernel_constraint = constraints.get(kernel_constraint)
         self.bias_constraint = constraints.get(bias_constraint)
         self.input_spec = InputSpec(min_ndim=self.rank + 2)
+        self.complex_mult = complex_mult.lower()
+        self._complex_mult = self.complex_mult     # Method actually used, 'auto' is resolved at build time
+        self.algorithm = algorithm.lower()
+        self.weight_storage = weight_storage.lower()
+        self.fused_epilogue = fused_epilogue
 
         self._validate_init()
         self._is_causal = self.padding == 'causal'
         self._channels_first = self.data_format == 'channels_first'
         self._tf_data_format = conv_utils.convert_data_format(
             self.data_format, self.rank + 2)
+        self._use_fft = self.algorithm == 'fft' or (self.algorithm == 'auto' and self.rank in (1, 2) and
+                                                   self.groups == 1 and not self.fused_epilogue and
+                                                   np.prod(self.kernel_size) >= FFT_KERNEL_SIZE_THRESHOLD)
 
         self.init_technique = init_technique.lower()
 
@@ -156,6 +198,26 @@ class ComplexConv(Layer, ComplexLayer):
             raise ValueError('Causal padding is only supported for `Conv1D`'
                              'and `SeparableConv1D`.')
 
+        if self.complex_mult not in COMPLEX_MULT_METHODS | {'auto'}:
+            raise ValueError(f"Unsuported complex_mult {self.complex_mult}, "
+                             f"supported methods are {COMPLEX_MULT_METHODS | {'auto'}}")
+        if self.complex_mult == 'stacked' and self.groups != 1:
+            raise ValueError(f"complex_mult 'stacked' is only supported with groups=1. Received groups={self.groups}")
+
+        if self.algorithm not in CONV_ALGORITHMS:
+            raise ValueError(f"Unsuported algorithm {self.algorithm}, supported algorithms are {CONV_ALGORITHMS}")
+        if self.algorithm == 'fft' and (self.rank not in (1, 2) or self.groups != 1):
+            raise ValueError(f"algorithm 'fft' is only supported for 1D and 2D convolutions with groups=1. "
+                             f"Received rank={self.rank} and groups={self.groups}")
+        if self.weight_storage not in WEIGHT_STORAGES:
+            raise ValueError(f"Unsuported weight_storage {self.weight_storage}, "
+                             f"supported storages are {WEIGHT_STORAGES}")
+        if self.fused_epilogue and (self.data_format != 'channels_last' or self.groups != 1 or
+                                    self.algorithm == 'fft'):
+            raise ValueError(f"fused_epilogue is only supported with channels_last, groups=1 and algorithm 'direct'. "
+                             f"Received data_format={self.data_format}, groups={self.groups} and "
+                             f"algorithm={self.algorithm}")
+
     def build(self, input_shape):
         input_shape = tf.TensorShape(input_shape)
         input_channel = self._get_input_channel(input_shape)
@@ -173,8 +235,8 @@ class ComplexConv(Layer, ComplexLayer):
             i_kernel_initializer = self.kernel_initializer
             i_bias_initializer = self.bias_initializer
             if not isinstance(self.kernel_initializer, ComplexInitializer):
-                tf.print(f"WARNING: you are using a Tensorflow Initializer for complex numbers. "
-                         f"Using {self.init_technique} method.")
+                logger.warning(f"{self.name} - You are using a Tensorflow Initializer for complex numbers. "
+                               f"Using {self.init_technique} method.")
                 if self.init_technique in INIT_TECHNIQUES:
                     if self.init_technique == 'zero_imag':
                         # This section is done to initialize with tf initializers, making imaginary part zero
@@ -183,30 +245,15 @@ class ComplexConv(Layer, ComplexLayer):
                 else:
                     raise ValueError(f"Unsuported init_technique {self.init_technique}, "
                                      f"supported techniques are {INIT_TECHNIQUES}")
-            self.kernel_r = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=i_kernel_dtype),
-                name='kernel_r',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer,
-            self.kernel_i = tf.Variable(
-                initial_value=i_kernel_initializer(shape=kernel_shape, dtype=i_kernel_dtype),
-                name='kernel_i',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer
+            self._add_complex_weight('kernel', 'kernel', shape=kernel_shape,
+                                     initializer=self.kernel_initializer, imag_initializer=i_kernel_initializer,
+                                     initializer_dtype=i_kernel_dtype, regularizer=self.kernel_regularizer,
+                                     constraint=self.kernel_constraint)
             if self.use_bias:
-                self.bias_r = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=i_bias_dtype),
-                    name='bias_r',
-                    trainable=True
-                )
-                self.bias_i = tf.Variable(
-                    initial_value=i_bias_initializer(shape=(self.filters,), dtype=i_bias_dtype),
-                    name='bias_i',
-                    constraint=self.bias_constraint,
-                    trainable=True
-                )  # TODO: regularizer=self.bias_regularizer
+                self._add_complex_weight('bias', 'bias', shape=(self.filters,),
+                                         initializer=self.bias_initializer, imag_initializer=i_bias_initializer,
+                                         initializer_dtype=i_bias_dtype, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint)
         else:
             self.kernel = self.add_weight(
                 name='kernel',
@@ -230,8 +277,46 @@ class ComplexConv(Layer, ComplexLayer):
         channel_axis = self._get_channel_axis()
         self.input_spec = InputSpec(min_ndim=self.rank + 2,
                                     axes={channel_axis: input_channel})
+        if self.complex_mult == 'auto' and not (self.my_dtype.is_complex and self.fused_epilogue):
+            self._complex_mult = self._autotune_complex_mult(input_shape)
         self.built = True
 
+    def _autotune_complex_mult(self, input_shape):
+        """
+        Times each method of COMPLEX_MULT_METHODS for the given input shape and returns the fastest one.
+        Results are cached in _AUTOTUNE_CACHE so layers with the same configuration are only timed once.
+        If the spatial dimensions are unknown or not executing eagerly, it falls back to 'standard'.
+        """
+        key = (self.__class__.__name__, tuple(input_shape.as_list()[1:]), self.kernel_size, self.filters,
+               self.strides, self.padding, self.data_format, self.dilation_rate, self.groups, self.my_dtype.name)
+        if key in _AUTOTUNE_CACHE:
+            return _AUTOTUNE_CACHE[key]
+        if not self.my_dtype.is_complex or not input_shape[1:].is_fully_defined() or not tf.executing_eagerly():
+            logger.debug(f"{self.name}: Could not autotune complex_mult, using 'standard'")
+            return 'standard'
+        candidates = sorted(COMPLEX_MULT_METHODS) if self.groups == 1 else ['gauss', 'standard']
+        batch_size = input_shape[0] if input_shape[0] is not None else AUTOTUNE_BATCH_SIZE
+        inputs_shape = [batch_size] + input_shape.as_list()[1:]
+        if self._is_causal:
+            inputs_shape[-1 if self._channels_first else -2] += self.dilation_rate[0] * (self.kernel_size[0] - 1)
+        inputs_r = tf.random.normal(inputs_shape, dtype=self.my_dtype.real_dtype)
+        inputs_i = tf.random.normal(inputs_shape, dtype=self.my_dtype.real_dtype)
+        kernel_r, kernel_i = self._get_complex_weight_parts('kernel')
+        timings = {}
+        for method in candidates:
+            conv_fn = tf.function(functools.partial(self._complex_convolution, complex_mult=method))
+            conv_fn(inputs_r, inputs_i, kernel_r, kernel_i)     # Trace and warm up
+            timings[method] = float('inf')
+            for _ in range(AUTOTUNE_REPETITIONS):
+                start_time = perf_counter()
+                outputs_r, _ = conv_fn(inputs_r, inputs_i, kernel_r, kernel_i)
+                outputs_r.numpy()
+                timings[method] = min(timings[method], perf_counter() - start_time)
+        best = min(timings, key=timings.get)
+        logger.debug(f"{self.name}: Autotuned complex_mult = '{best}' (timings: {timings})")
+        _AUTOTUNE_CACHE[key] = best
+        return best
+
     def convolution_op(self, inputs, kernel):
         # Convert Keras formats to TF native formats.
         if self.padding == 'causal':
@@ -250,6 +335,94 @@ class ComplexConv(Layer, ComplexLayer):
             data_format=self._tf_data_format,
             name=self.__class__.__name__)
 
+    def _complex_convolution(self, inputs_r, inputs_i, kernel_r, kernel_i, conv_op=None, complex_mult=None):
+        """
+        Computes the complex convolution (inputs_r + j inputs_i) * (kernel_r + j kernel_i) using real convolutions.
+        With 'gauss' method, the product is obtained with 3 convolutions instead of 4:
+            t1 = (inputs_r + inputs_i) * kernel_r
+            t2 = inputs_r * (kernel_i - kernel_r)
+            t3 = inputs_i * (kernel_r + kernel_i)
+            real_outputs = t1 - t3 and imag_outputs = t1 + t2
+        With 'stacked' method, a single convolution is done over the channel-stacked input [Re, Im]
+            and the block kernel [[kernel_r, kernel_i], [-kernel_i, kernel_r]].
+        :param conv_op: Real-valued (bilinear) convolution function f(inputs, kernel).
+            Defaults to `self.convolution_op`.
+        :param complex_mult: Method to be used. Defaults to the one selected for the layer.
+        :return: Tuple (real_outputs, imag_outputs)
+        """
+        if conv_op is None:
+            conv_op = self.convolution_op
+        if complex_mult is None:
+            complex_mult = self._complex_mult
+        if complex_mult == 'gauss':
+            t1 = conv_op(inputs_r + inputs_i, kernel_r)
+            t2 = conv_op(inputs_r, kernel_i - kernel_r)
+            t3 = conv_op(inputs_i, kernel_r + kernel_i)
+            return t1 - t3, t1 + t2
+        elif complex_mult == 'stacked':
+            channel_axis = self._get_channel_axis()
+            kernel = tf.concat((tf.concat((kernel_r, kernel_i), axis=-1),
+                                tf.concat((-kernel_i, kernel_r), axis=-1)), axis=-2)
+            outputs = conv_op(tf.concat((inputs_r, inputs_i), axis=channel_axis), kernel)
+            real_outputs, imag_outputs = tf.split(outputs, 2, axis=channel_axis)
+            return real_outputs, imag_outputs
+        real_outputs = conv_op(inputs_r, kernel_r) - conv_op(inputs_i, kernel_i)
+        imag_outputs = conv_op(inputs_r, kernel_i) + conv_op(inputs_i, kernel_r)
+        return real_outputs, imag_outputs
+
+    def _fft_convolution(self, inputs, kernel):
+        """
+        Computes the convolution (actually cross-correlation, as tf.nn.convolution) as a pointwise product
+            in the frequency domain. Supports 1D and 2D convolutions with 'valid' and 'same' padding
+            ('causal' padding is applied to the inputs before), strides and dilation rates.
+        :param inputs: Tensor of shape `batch_shape + (*spatial_dims, channels)` (or channels first).
+        :param kernel: Complex tensor of shape `kernel_size + (channels, filters)`.
+        :return: Complex tensor with the same shape as the direct convolution output.
+        """
+        inputs = tf.cast(inputs, kernel.dtype)
+        spatial_axes = list(range(2, self.rank + 2))
+        batch_shape = None
+        if inputs.shape.rank is not None and inputs.shape.rank > self.rank + 2:   # Merge the batch dimensions
+            batch_shape = tf.shape(inputs)[:-(self.rank + 1)]
+            inputs = tf.reshape(inputs, tf.concat(([-1], tf.shape(inputs)[-(self.rank + 1):]), axis=0))
+        if not self._channels_first:    # FFT is computed over the inner most dimensions so use (batch, channels, ...)
+            inputs = tf.transpose(inputs, [0, self.rank + 1] + list(range(1, self.rank + 1)))
+        # Dilate the kernel by inserting (dilation - 1) zeros between its elements
+        for axis, dilation in enumerate(self.dilation_rate):
+            if dilation > 1:
+                length = kernel.shape[axis]
+                paddings = [[0, 0]] * (axis + 1) + [[0, dilation - 1]] + [[0, 0]] * (kernel.shape.rank - axis - 1)
+                kernel = tf.pad(tf.expand_dims(kernel, axis=axis + 1), paddings)
+                kernel = tf.reshape(kernel, kernel.shape[:axis] + [length * dilation] + kernel.shape[axis + 2:])
+                kernel = tf.gather(kernel, tf.range(dilation * (length - 1) + 1), axis=axis)
+        dilated_kernel_size = kernel.shape[:self.rank]
+        # Cross-correlation is a convolution with the flipped kernel. Shape (channels, filters, ...)
+        kernel = tf.transpose(tf.reverse(kernel, axis=list(range(self.rank))),
+                              [self.rank, self.rank + 1] + list(range(self.rank)))
+        if self.padding == 'same':
+            paddings = [[0, 0], [0, 0]]
+            for axis, k_size, stride in zip(spatial_axes, dilated_kernel_size, self.strides):
+                length = tf.shape(inputs)[axis]
+                pad_total = tf.maximum(((length + stride - 1) // stride - 1) * stride + k_size - length, 0)
+                paddings.append([pad_total // 2, pad_total - pad_total // 2])
+            inputs = tf.pad(inputs, paddings)
+        fft_shape = tf.shape(inputs)[2:]
+        kernel = tf.pad(kernel, [[0, 0], [0, 0]] + [[0, fft_shape[i] - k_size]
+                                                    for i, k_size in enumerate(dilated_kernel_size)])
+        if self.rank == 1:
+            outputs = tf.signal.ifft(tf.einsum('bcn,cfn->bfn', tf.signal.fft(inputs), tf.signal.fft(kernel)))
+        else:
+            outputs = tf.signal.ifft2d(tf.einsum('bchw,cfhw->bfhw', tf.signal.fft2d(inputs), tf.signal.fft2d(kernel)))
+        # Circular convolution equals the linear one from index (kernel_size - 1). Strides are applied by slicing.
+        slices = [slice(None), slice(None)] + [slice(k_size - 1, None, stride)
+                                               for k_size, stride in zip(dilated_kernel_size, self.strides)]
+        outputs = outputs[tuple(slices)]
+        if not self._channels_first:
+            outputs = tf.transpose(outputs, [0] + list(range(2, self.rank + 2)) + [1])
+        if batch_shape is not None:
+            outputs = tf.reshape(outputs, tf.concat((batch_shape, tf.shape(outputs)[1:]), axis=0))
+        return outputs
+
     def call(self, inputs):
         """
         Calls convolution, this function is divided in 4:
@@ -259,30 +432,37 @@ class ComplexConv(Layer, ComplexLayer):
             4. Activation Function
         :returns: A tensor of rank 4+ representing `activation(conv2d(inputs, kernel) + bias)`.
         """
-        if inputs.dtype != self.my_dtype:
-            tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
-            if self.my_dtype.is_complex and inputs.dtype.is_floating:
-                tf.print("\tThis is normally fixed using ComplexInput() "
-                         "at the start (tf casts input automatically to real).")
-            inputs = tf.cast(inputs, self.my_dtype)
+        inputs = self._check_input_dtype(inputs)
         if self._is_causal:  # Apply causal padding to inputs for Conv1D.
             inputs = tf.pad(inputs, self._compute_causal_padding(inputs))
+        if self.my_dtype.is_complex and self.fused_epilogue:
+            outputs = self.convolution_op(self._fused_inputs(inputs), self._fused_kernel('kernel'))
+            return self._fused_epilogue(outputs, 'bias')
         # Convolution
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
         if self.my_dtype.is_complex:
-            kernel_r = self.kernel_r
-            kernel_i = self.kernel_i
             if self.use_bias:
-                bias = tf.complex(self.bias_r, self.bias_i)
+                bias = self._get_complex_weight('bias')
         else:
-            kernel_r = tf.math.real(self.kernel)
-            kernel_i = tf.math.imag(self.kernel)    # TODO: Check they are all zero
             if self.use_bias:
                 bias = self.bias
-        real_outputs = self.convolution_op(inputs_r, kernel_r) - self.convolution_op(inputs_i, kernel_i)
-        imag_outputs = self.convolution_op(inputs_r, kernel_i) + self.convolution_op(inputs_i, kernel_r)
-        outputs = tf.cast(tf.complex(real_outputs, imag_outputs), dtype=self.my_dtype)
+        if self._use_fft:
+            if self.my_dtype.is_complex:
+                kernel = self._get_complex_weight('kernel')
+            else:
+                kernel = tf.complex(self.kernel, tf.zeros_like(self.kernel))
+            outputs = self._fft_convolution(inputs, kernel)
+            if not self.my_dtype.is_complex:
+                outputs = tf.math.real(outputs)
+        else:
+            if self.my_dtype.is_complex:
+                kernel_r, kernel_i = self._get_complex_weight_parts('kernel')
+            else:
+                kernel_r = tf.math.real(self.kernel)
+                kernel_i = tf.math.imag(self.kernel)    # TODO: Check they are all zero
+            real_outputs, imag_outputs = self._complex_convolution(tf.math.real(inputs), tf.math.imag(inputs),
+                                                                   kernel_r, kernel_i)
+            outputs = tf.complex(real_outputs, imag_outputs)
+        outputs = tf.cast(outputs, dtype=self.my_dtype)
         # Add bias
         if self.use_bias:
             output_rank = outputs.shape.rank
@@ -354,7 +534,11 @@ class ComplexConv(Layer, ComplexLayer):
             'activity_regularizer': regularizers.serialize(self.activity_regularizer),
             'kernel_constraint': constraints.serialize(self.kernel_constraint),
             'bias_constraint': constraints.serialize(self.bias_constraint),
-            'dtype': self.my_dtype
+            'dtype': self.my_dtype,
+            'complex_mult': self.complex_mult,
+            'algorithm': self.algorithm,
+            'weight_storage': self.weight_storage,
+            'fused_epilogue': self.fused_epilogue
         })
         return config
 
@@ -739,6 +923,10 @@ class ComplexConv2DTranspose(ComplexConv2D):
       see `keras.constraints`).
     bias_constraint: Constraint function applied to the bias vector (
       see `keras.constraints`).
+    complex_mult: One of 'standard' (default) or 'gauss'.
+      With 'gauss', 3 real-valued transposed convolutions are used instead of 4.
+      'stacked' and 'auto' are not supported for the transposed convolution.
+    algorithm: Only 'direct' is supported for the transposed convolution.
     Input shape:
     4D tensor with shape:
     `(batch_size, channels, rows, cols)` if data_format='channels_first'
@@ -805,6 +993,14 @@ class ComplexConv2DTranspose(ComplexConv2D):
             kernel_constraint=constraints.get(kernel_constraint),
             bias_constraint=constraints.get(bias_constraint),
             **kwargs)
+        if self.complex_mult not in {'standard', 'gauss'}:
+            raise ValueError(f"Unsuported complex_mult {self.complex_mult} for {self.__class__.__name__}, "
+                             f"supported methods are 'standard' and 'gauss'")
+        if self.algorithm != 'direct':
+            raise ValueError(f"Unsuported algorithm {self.algorithm} for {self.__class__.__name__}, "
+                             f"only 'direct' is supported")
+        if self.fused_epilogue:
+            raise ValueError(f"fused_epilogue is not supported for {self.__class__.__name__}")
         self.output_padding = output_padding
         if self.output_padding is not None:
             self.output_padding = conv_utils.normalize_tuple(self.output_padding, 2, 'output_padding')
@@ -823,30 +1019,15 @@ class ComplexConv2DTranspose(ComplexConv2D):
         self.input_spec = InputSpec(ndim=4, axes={channel_axis: input_dim})
         kernel_shape = self.kernel_size + (self.filters, input_dim)
         if self.my_dtype.is_complex:
-            self.kernel_r = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=self.my_dtype),
-                name='kernel_r',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer,
-            self.kernel_i = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=self.my_dtype),
-                name='kernel_i',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer
+            self._add_complex_weight('kernel', 'kernel', shape=kernel_shape,
+                                     initializer=self.kernel_initializer, imag_initializer=self.kernel_initializer,
+                                     initializer_dtype=self.my_dtype, regularizer=self.kernel_regularizer,
+                                     constraint=self.kernel_constraint)
             if self.use_bias:
-                self.bias_r = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=self.my_dtype),
-                    name='bias_r',
-                    trainable=True
-                )
-                self.bias_i = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=self.my_dtype),
-                    name='bias_i',
-                    constraint=self.bias_constraint,
-                    trainable=True
-                )  # TODO: regularizer=self.bias_regularizer
+                self._add_complex_weight('bias', 'bias', shape=(self.filters,),
+                                         initializer=self.bias_initializer, imag_initializer=self.bias_initializer,
+                                         initializer_dtype=self.my_dtype, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint)
         else:
             self.kernel = self.add_weight(
                 name='kernel',
@@ -908,64 +1089,35 @@ class ComplexConv2DTranspose(ComplexConv2D):
                                                     output_padding=out_pad_w,
                                                     stride=stride_w,
                                                     dilation=self.dilation_rate[1])
+        # The output shape is computed only once and shared by all the real-valued transposed convolutions.
+        # tf.nn.atrous_conv2d_transpose (and conv2d_transpose on CPU) only support NHWC, so for channels_first
+        # the data is transposed here once instead of once per real-valued transposed convolution.
+        output_shape_tensor = tf.stack((batch_size, out_height, out_width, self.filters))
+        static_input_shape = inputs.shape
         if self.data_format == 'channels_first':
-            output_shape = (batch_size, self.filters, out_height, out_width)
-        else:
-            output_shape = (batch_size, out_height, out_width, self.filters)
-
-        output_shape_tensor = tf.stack(output_shape)
+            inputs = tf.transpose(inputs, (0, 2, 3, 1))  # NCHW -> NHWC
         # Deconvolution part
         inputs_r = tf.math.real(inputs)
         inputs_i = tf.math.imag(inputs)
         if self.my_dtype.is_complex:
-            kernel_r = self.kernel_r
-            kernel_i = self.kernel_i
+            kernel_r, kernel_i = self._get_complex_weight_parts('kernel')
             if self.use_bias:
-                bias = tf.complex(self.bias_r, self.bias_i)
+                bias = self._get_complex_weight('bias')
         else:
             kernel_r = tf.math.real(self.kernel)
             kernel_i = tf.math.imag(self.kernel)
             if self.use_bias:
                 bias = self.bias
-        real_outputs_ri_rk = backend.conv2d_transpose(
-            inputs_r,
-            kernel_r,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ii_ik = backend.conv2d_transpose(
-            inputs_i,
-            kernel_i,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ri_ik = backend.conv2d_transpose(
-            inputs_r,
-            kernel_i,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ii_rk = backend.conv2d_transpose(
-            inputs_i,
-            kernel_r,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs = real_outputs_ri_rk - real_outputs_ii_ik
-        imag_outputs = real_outputs_ii_rk + real_outputs_ri_ik
+        real_outputs, imag_outputs = self._complex_convolution(
+            inputs_r, inputs_i, kernel_r, kernel_i,
+            conv_op=functools.partial(self.conv_transpose_op, output_shape=output_shape_tensor))
         outputs = tf.cast(tf.complex(real_outputs, imag_outputs), dtype=self.my_dtype)
+        if self.data_format == 'channels_first':
+            outputs = tf.transpose(outputs, (0, 3, 1, 2))  # NHWC -> NCHW
 
         if not tf.executing_eagerly():
             # Infer the static output shape:
-            out_shape = self.compute_output_shape(inputs.shape)
+            out_shape = self.compute_output_shape(static_input_shape)
             outputs.set_shape(out_shape)
         # Apply bias
         if self.use_bias:
@@ -975,6 +1127,20 @@ class ComplexConv2DTranspose(ComplexConv2D):
             return self.activation(outputs)
         return outputs
 
+    def conv_transpose_op(self, inputs, kernel, output_shape):
+        """
+        Real-valued transposed convolution of NHWC inputs.
+        :param output_shape: 1D int tensor of the NHWC output shape.
+        """
+        if self.dilation_rate == (1, 1):
+            return tf.nn.conv2d_transpose(inputs, kernel, output_shape, strides=(1,) + self.strides + (1,),
+                                          padding=self.padding.upper(), data_format='NHWC')
+        if self.dilation_rate[0] != self.dilation_rate[1]:
+            raise ValueError(f"Expected the 2 dimensions of the `dilation_rate` argument to be equal to each other. "
+                             f"Received: dilation_rate={self.dilation_rate}")
+        return tf.nn.atrous_conv2d_transpose(inputs, kernel, output_shape, rate=self.dilation_rate[0],
+                                             padding=self.padding.upper())
+
     def compute_output_shape(self, input_shape):
         input_shape = tf.TensorShape(input_shape).as_list()
         output_shape = list(input_shape)
@@ -1,23 +1,34 @@
 from abc import ABC, abstractmethod
+import random
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.layers import Flatten, Dense, InputLayer, Layer
-from tensorflow.python.keras import backend as K
 from tensorflow.keras import initializers
-import tensorflow_probability as tfp
+from tensorflow.python.framework import smart_cond
 from tensorflow import TensorShape, Tensor
 # from keras.utils import control_flow_util
 # typing
 from typing import Optional, Union, List, Tuple
 # Own modules
-from cvnn.activations import t_activation
+from cvnn.activations import t_activation, CARTESIAN_ACTIVATIONS
 from cvnn.initializers import ComplexGlorotUniform, Zeros, Ones, ComplexInitializer, INIT_TECHNIQUES
+from cvnn import logger
+from cvnn.utils import view_as_real, view_as_complex
+try:
+    import tensorflow_probability as tfp      # Only needed for the reference Batch Norm covariance methods
+    TFP_AVAILABLE = True
+except ImportError as e:
+    TFP_AVAILABLE = False
+    logger.info("Tensorflow Probability not installed, ComplexBatchNormalization cov_method 1 and 2 unavailable")
 
 
 t_input = Union[Tensor, tuple, list]
 t_input_shape = Union[TensorShape, List[TensorShape]]
 
 DEFAULT_COMPLEX_TYPE = tf.as_dtype(np.complex64)
+DENSE_EXECUTION_MODES = {'complex', 'block_real'}
+BATCH_NORM_COV_METHODS = {1, 2, 3}
+WEIGHT_STORAGES = {'split', 'interleaved'}
 
 
 class ComplexLayer(ABC):
@@ -29,6 +40,140 @@ class ComplexLayer(ABC):
         """
         pass
 
+    def _check_input_dtype(self, inputs):
+        """
+        Casts the inputs to the layer dtype (self.my_dtype).
+        Dtypes are static, so the mismatch warning is logged (only once per layer) when the graph is traced and
+            the traced function contains only the cast.
+        """
+        if inputs.dtype == self.my_dtype:
+            return inputs
+        if not getattr(self, '_input_dtype_warned', False):
+            self._input_dtype_warned = True
+            message = f"{self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}. " \
+                      f"Automatic cast will be done."
+            if self.my_dtype.is_complex and inputs.dtype.is_floating:
+                message += " This is normally fixed using ComplexInput() at the start " \
+                           "(tf casts input automatically to real)."
+            logger.warning(message)
+        return tf.cast(inputs, self.my_dtype)
+
+    def _add_complex_weight(self, name: str, variable_name: str, shape, initializer, imag_initializer,
+                            initializer_dtype=None, regularizer=None, constraint=None):
+        """
+        Creates the trainable complex weight `name` with `add_weight` (so it is tracked by Keras, regularized and
+            created by the distribution strategy in scope) according to self.weight_storage:
+            - 'split': Two real variables, attributes `{name}_r` and `{name}_i`.
+            - 'interleaved': A single real variable of shape (..., 2), attribute `{name}_ri`.
+                The complex weight is a view of it (see `cvnn.utils.view_as_complex`), no tf.complex per call.
+        :param initializer: Initializer of the real part. Called as `initializer(shape=shape, dtype=initializer_dtype)`
+        :param imag_initializer: Initializer of the imaginary part.
+            If it is the same ComplexInitializer as `initializer` and `initializer_dtype` is complex, both parts are
+            taken from a single complex draw, so the initializer random op runs once and the parts are independent.
+        :param initializer_dtype: Dtype given to the initializers. Default self.my_dtype.real_dtype.
+            ComplexInitializer expects the complex dtype to scale the real and imaginary parts.
+        :param regularizer: Regularizer applied to the real and imaginary parts.
+        :param constraint: Constraint applied to the real and imaginary parts.
+        """
+        real_dtype = self.my_dtype.real_dtype
+        if initializer_dtype is None:
+            initializer_dtype = real_dtype
+        complex_draw = tf.as_dtype(initializer_dtype).is_complex      # ComplexInitializer returns a complex tensor
+        joint_draw = complex_draw and initializer is imag_initializer and isinstance(initializer, ComplexInitializer)
+        draws = []      # Complex draw of the real part variable, kept for the imaginary part one
+
+        def real_initializer(part_initializer, part: int):
+            def init(shape, dtype=None, **kwargs):     # add_weight passes the (real) variable dtype
+                if joint_draw and part == 1 and draws:
+                    value = draws.pop()
+                else:
+                    value = part_initializer(shape=shape, dtype=initializer_dtype)
+                    if joint_draw and part == 0 and tf.executing_eagerly():
+                        draws.append(value)
+                if complex_draw and isinstance(part_initializer, ComplexInitializer):
+                    value = tf.math.imag(value) if part else tf.math.real(value)
+                return tf.cast(value, real_dtype)
+            return init
+
+        def interleaved_initializer(interleaved_shape, dtype=None, **kwargs):
+            if joint_draw:
+                return view_as_real(tf.cast(initializer(shape=interleaved_shape[:-1], dtype=initializer_dtype),
+                                            self.my_dtype))
+            return tf.stack((real_initializer(initializer, 0)(interleaved_shape[:-1]),
+                             real_initializer(imag_initializer, 1)(interleaved_shape[:-1])), axis=-1)
+        if self.weight_storage == 'interleaved':
+            setattr(self, name + '_ri', self.add_weight(
+                name=variable_name, shape=tuple(shape) + (2,), dtype=real_dtype,
+                initializer=interleaved_initializer, regularizer=regularizer, constraint=constraint, trainable=True
+            ))
+        else:
+            for part, (suffix, part_initializer) in enumerate((('_r', initializer), ('_i', imag_initializer))):
+                setattr(self, name + suffix, self.add_weight(
+                    name=variable_name + suffix, shape=tuple(shape), dtype=real_dtype,
+                    initializer=real_initializer(part_initializer, part), regularizer=regularizer,
+                    constraint=constraint, trainable=True
+                ))
+
+    def _get_complex_weight(self, name: str):
+        """
+        :return: The complex weight `name` created with `_add_complex_weight`
+        """
+        if self.weight_storage == 'interleaved':
+            return view_as_complex(getattr(self, name + '_ri'))
+        return tf.complex(getattr(self, name + '_r'), getattr(self, name + '_i'))
+
+    def _get_complex_weight_parts(self, name: str):
+        """
+        :return: Tuple (real, imag) of the complex weight `name` created with `_add_complex_weight`
+        """
+        if self.weight_storage == 'interleaved':
+            weight = getattr(self, name + '_ri')
+            return weight[..., 0], weight[..., 1]
+        return getattr(self, name + '_r'), getattr(self, name + '_i')
+
+    @staticmethod
+    def _fused_inputs(inputs):
+        """
+        Real view of the complex `inputs` with the real and imaginary parts interleaved on the last axis
+            [x0_r, x0_i, x1_r, x1_i, ...] (see `cvnn.utils.view_as_real`). It is not a copy.
+        """
+        return tf.reshape(view_as_real(inputs), tf.concat((tf.shape(inputs)[:-1], [2 * inputs.shape[-1]]), axis=0))
+
+    def _fused_kernel(self, name: str, interleaved_inputs: bool = True):
+        """
+        Real kernel that computes the product by the complex weight `name` (input channels on the second to last
+            axis) as a single real product whose output holds the real and imaginary parts as [out_r | out_i]
+            on the last axis.
+        :param interleaved_inputs: Layout of the input channels of the real product.
+            - True: interleaved as given by `_fused_inputs`: rows [w_r, w_i] and [-w_i, w_r] for each input channel.
+            - False: [in_r | in_i] as the output of a previous fused product: block matrix [[w_r, w_i], [-w_i, w_r]].
+        """
+        w_r, w_i = self._get_complex_weight_parts(name)
+        rows = (tf.concat((w_r, w_i), axis=-1), tf.concat((-w_i, w_r), axis=-1))
+        if not interleaved_inputs:
+            return tf.concat(rows, axis=-2)
+        shape = w_r.shape.as_list()
+        return tf.reshape(tf.stack(rows, axis=-2), shape[:-2] + [2 * shape[-2], 2 * shape[-1]])
+
+    def _fused_epilogue(self, outputs, bias_name: str):
+        """
+        Adds the bias and applies the activation to the [out_r | out_i] real `outputs` of a `_fused_kernel` product.
+        The bias is added with a single real bias add and Cartesian activations (see
+            `cvnn.activations.CARTESIAN_ACTIVATIONS`) are applied to the real tensor, so Grappler can fuse them
+            with the product (e.g. into _FusedMatMul or _FusedConv2D for relu and elu) and the bias added and
+            complex pre-activations are not materialized. Other activations are applied to the complex output.
+        :param bias_name: Name of the complex bias (see `_add_complex_weight`), used if self.use_bias.
+        :return: The complex outputs of the layer
+        """
+        if self.use_bias:
+            outputs = tf.nn.bias_add(outputs, tf.concat(self._get_complex_weight_parts(bias_name), axis=-1))
+        real_activation = CARTESIAN_ACTIVATIONS.get(self.activation)
+        if real_activation is not None:
+            outputs = real_activation(outputs)
+        outputs_r, outputs_i = tf.split(outputs, 2, axis=-1)
+        outputs = tf.complex(outputs_r, outputs_i)
+        return outputs if real_activation is not None else self.activation(outputs)
+
 
 def complex_input(shape=None, batch_size=None, name=None, dtype=DEFAULT_COMPLEX_TYPE,
                   sparse=False, tensor=None, ragged=False, **kwargs):
@@ -173,8 +318,8 @@ class ComplexDense(Dense, ComplexLayer):
                  kernel_initializer="ComplexGlorotUniform",
                  bias_initializer="Zeros",
                  dtype=DEFAULT_COMPLEX_TYPE,  # TODO: Check typing of this.
-                 init_technique: str = 'mirror',
-                 **kwargs):
+                 init_technique: str = 'mirror', execution: str = 'complex', weight_storage: str = 'split',
+                 fused_epilogue: bool = False, **kwargs):
         """
         :param units: Positive integer, dimensionality of the output space.
         :param activation: Activation function to use.
@@ -191,6 +336,23 @@ class ComplexDense(Dense, ComplexLayer):
             - 'mirror': Uses the initializer for both real and imaginary part.
                 Note that some initializers such as Glorot or He will lose it's property if initialized this way.
             - 'zero_imag': Initializer real part and let imaginary part to zero.
+        :param execution: One of 'complex' or 'block_real'. How the complex matrix product is computed.
+            This parameter is ignored if dtype is real.
+            - 'complex' (default): A complex64/complex128 matmul with the kernel `w_r + j w_i`.
+            - 'block_real': A single real-valued matmul of the input packed as [Re, Im] and the block matrix
+                [[w_r, w_i], [-w_i, w_r]]. Numerically equivalent and faster on BLAS backends with poor complex GEMM.
+        :param weight_storage: One of 'split' or 'interleaved'. How the complex weights are stored.
+            This parameter is ignored if dtype is real.
+            - 'split' (default): Two real variables per weight (`kernel_r` and `kernel_i`), assembled with
+                `tf.complex` on every call.
+            - 'interleaved': A single real variable of shape (..., 2) per weight, read as complex without any copy.
+        :param fused_epilogue: If True, the product, bias and activation are computed on a real tensor holding the
+            real and imaginary parts of the outputs: a single real matmul of the (not copied) interleaved view of the
+            input, a real bias add and, for the Cartesian activations of `cvnn.activations.CARTESIAN_ACTIVATIONS`,
+            the real activation, which Grappler fuses with the matmul (relu, elu, leaky relu on CPU).
+            It saves the complex pre-activation buffers and the packing of the input.
+            Numerically equivalent to the default path. `execution` is ignored.
+            This parameter is ignored if dtype is real.
         """
         # TODO: verify the initializers? and that dtype complex has cvnn.activations.
         if activation is None:
@@ -201,80 +363,117 @@ class ComplexDense(Dense, ComplexLayer):
         # !Cannot override dtype of the layer because it has a read-only @property
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         self.init_technique = init_technique.lower()
+        self.execution = execution.lower()
+        if self.execution not in DENSE_EXECUTION_MODES:
+            raise ValueError(f"Unsuported execution {self.execution}, "
+                             f"supported modes are {DENSE_EXECUTION_MODES}")
+        self.weight_storage = weight_storage.lower()
+        if self.weight_storage not in WEIGHT_STORAGES:
+            raise ValueError(f"Unsuported weight_storage {self.weight_storage}, "
+                             f"supported storages are {WEIGHT_STORAGES}")
+        self.fused_epilogue = fused_epilogue
+
+    def _get_complex_initializers(self):
+        """
+        :return: Tuple (i_kernel_dtype, i_bias_dtype, i_kernel_initializer, i_bias_initializer):
+            the dtypes given to the kernel and bias initializers and the initializers of their imaginary parts.
+        """
+        i_kernel_dtype = self.my_dtype if isinstance(self.kernel_initializer,
+                                                     ComplexInitializer) else self.my_dtype.real_dtype
+        i_bias_dtype = self.my_dtype if isinstance(self.bias_initializer,
+                                                   ComplexInitializer) else self.my_dtype.real_dtype
+        i_kernel_initializer = self.kernel_initializer
+        i_bias_initializer = self.bias_initializer
+        if not isinstance(self.kernel_initializer, ComplexInitializer):
+            logger.warning(f"{self.name} - You are using a Tensorflow Initializer for complex numbers. "
+                           f"Using {self.init_technique} method.")
+            if self.init_technique in INIT_TECHNIQUES:
+                if self.init_technique == 'zero_imag':
+                    # This section is done to initialize with tf initializers, making imaginary part zero
+                    i_kernel_initializer = initializers.Zeros()
+                    i_bias_initializer = initializers.Zeros()
+            else:
+                raise ValueError(f"Unsuported init_technique {self.init_technique}, "
+                                 f"supported techniques are {INIT_TECHNIQUES}")
+        return i_kernel_dtype, i_bias_dtype, i_kernel_initializer, i_bias_initializer
 
     def build(self, input_shape):
         if self.my_dtype.is_complex:
-            i_kernel_dtype = self.my_dtype if isinstance(self.kernel_initializer,
-                                                         ComplexInitializer) else self.my_dtype.real_dtype
-            i_bias_dtype = self.my_dtype if isinstance(self.bias_initializer,
-                                                       ComplexInitializer) else self.my_dtype.real_dtype
-            i_kernel_initializer = self.kernel_initializer
-            i_bias_initializer = self.bias_initializer
-            if not isinstance(self.kernel_initializer, ComplexInitializer):
-                tf.print(f"WARNING: you are using a Tensorflow Initializer for complex numbers. "
-                         f"Using {self.init_technique} method.")
-                if self.init_technique in INIT_TECHNIQUES:
-                    if self.init_technique == 'zero_imag':
-                        # This section is done to initialize with tf initializers, making imaginary part zero
-                        i_kernel_initializer = initializers.Zeros()
-                        i_bias_initializer = initializers.Zeros()
-                else:
-                    raise ValueError(f"Unsuported init_technique {self.init_technique}, "
-                                     f"supported techniques are {INIT_TECHNIQUES}")
-            self.w_r = tf.Variable(
-                name='kernel_r',
-                initial_value=self.kernel_initializer(shape=(input_shape[-1], self.units), dtype=i_kernel_dtype),
-                trainable=True
-            )
-            self.w_i = tf.Variable(
-                name='kernel_i',
-                initial_value=i_kernel_initializer(shape=(input_shape[-1], self.units), dtype=i_kernel_dtype),
-                trainable=True
-            )
+            i_kernel_dtype, i_bias_dtype, i_kernel_initializer, i_bias_initializer = self._get_complex_initializers()
+            self._add_complex_weight('w', 'kernel', shape=(input_shape[-1], self.units),
+                                     initializer=self.kernel_initializer, imag_initializer=i_kernel_initializer,
+                                     initializer_dtype=i_kernel_dtype, regularizer=self.kernel_regularizer,
+                                     constraint=self.kernel_constraint)
             if self.use_bias:
-                self.b_r = tf.Variable(
-                    name='bias_r',
-                    initial_value=self.bias_initializer(shape=(self.units,), dtype=i_bias_dtype),
-                    trainable=self.use_bias
-                )
-                self.b_i = tf.Variable(
-                    name='bias_i',
-                    initial_value=i_bias_initializer(shape=(self.units,), dtype=i_bias_dtype),
-                    trainable=self.use_bias
-                )
+                self._add_complex_weight('b', 'bias', shape=(self.units,),
+                                         initializer=self.bias_initializer, imag_initializer=i_bias_initializer,
+                                         initializer_dtype=i_bias_dtype, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint)
         else:
             # TODO: For Complex you should probably want to use MY init for real keras. DO sth! at least error message
             self.w = self.add_weight('kernel',
                                      shape=(input_shape[-1], self.units),
                                      dtype=self.my_dtype,
                                      initializer=self.kernel_initializer,
+                                     regularizer=self.kernel_regularizer,
+                                     constraint=self.kernel_constraint,
                                      trainable=True,
                                      )
             if self.use_bias:
                 self.b = self.add_weight('bias', shape=(self.units,), dtype=self.my_dtype,
-                                         initializer=self.bias_initializer, trainable=self.use_bias)
+                                         initializer=self.bias_initializer, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint, trainable=self.use_bias)
 
     def call(self, inputs: t_input):
         # tf.print(f"inputs at ComplexDense are {inputs.dtype}")
-        if inputs.dtype != self.my_dtype:
-            tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
-            if self.my_dtype.is_complex and inputs.dtype.is_floating:
-                tf.print("\tThis is normally fixed using ComplexInput() "
-                         "at the start (tf casts input automatically to real).")
-            inputs = tf.cast(inputs, self.my_dtype)
+        inputs = self._check_input_dtype(inputs)
+        if self.my_dtype.is_complex and self.fused_epilogue:
+            return self._fused_call(inputs, ['w'])
         if self.my_dtype.is_complex:
-            w = tf.complex(self.w_r, self.w_i)
             if self.use_bias:
-                b = tf.complex(self.b_r, self.b_i)
+                b = self._get_complex_weight('b')
+            if self.execution == 'block_real':
+                out = self._block_real_matmul(inputs)
+            else:
+                out = tf.matmul(inputs, self._get_complex_weight('w'))
         else:
-            w = self.w
             if self.use_bias:
                 b = self.b
-        out = tf.matmul(inputs, w)
+            out = tf.matmul(inputs, self.w)
         if self.use_bias:
             out = out + b
         return self.activation(out)
 
+    def _block_real_matmul(self, inputs, name: str = 'w'):
+        """
+        Computes inputs * (w_r + j w_i) with a single real-valued matmul:
+            [x_r, x_i] * [[w_r, w_i], [-w_i, w_r]] = [x_r w_r - x_i w_i, x_r w_i + x_i w_r]
+        :param name: Name of the complex weight (see `_add_complex_weight`)
+        """
+        packed_inputs = tf.concat((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
+        w_r, w_i = self._get_complex_weight_parts(name)
+        block_kernel = tf.concat((tf.concat((w_r, w_i), axis=1),
+                                  tf.concat((-w_i, w_r), axis=1)), axis=0)
+        out = tf.matmul(packed_inputs, block_kernel)
+        out_r, out_i = tf.split(out, 2, axis=-1)
+        return tf.complex(out_r, out_i)
+
+    def _fused_call(self, inputs, kernel_names: List[str]):
+        """
+        `fused_epilogue` path: real matmuls by the `_fused_kernel` of each complex weight of `kernel_names` (in order)
+            followed by the `_fused_epilogue`.
+        Inputs of rank > 2 are flattened to a matrix (no copy) so the matmul can be fused with the epilogue.
+        """
+        outputs = self._fused_inputs(inputs)
+        if inputs.shape.rank != 2:
+            outputs = tf.reshape(outputs, (-1, outputs.shape[-1]))
+        for i, name in enumerate(kernel_names):
+            outputs = tf.matmul(outputs, self._fused_kernel(name, interleaved_inputs=i == 0))
+        outputs = self._fused_epilogue(outputs, 'b')
+        if inputs.shape.rank != 2:
+            outputs = tf.reshape(outputs, tf.concat((tf.shape(inputs)[:-1], [self.units]), axis=0))
+        return outputs
+
     def get_real_equivalent(self, output_multiplier=2):
         # assert self.my_dtype.is_complex, "The layer was already real!"    # TODO: Shall I check this?
         # TODO: Does it pose a problem not to re-create an object of the initializer?
@@ -287,12 +486,96 @@ class ComplexDense(Dense, ComplexLayer):
         config = super(ComplexDense, self).get_config()
         config.update({
             'dtype': self.my_dtype,
-            'init_technique': self.init_technique
-
+            'init_technique': self.init_technique,
+            'execution': self.execution,
+            'weight_storage': self.weight_storage,
+            'fused_epilogue': self.fused_epilogue
         })
         return config
 
 
+class ComplexLowRankDense(ComplexDense):
+    """
+    Fully connected complex-valued layer with the kernel factorized as the product of two rank `rank` matrices.
+
+    Implements the operation:
+        activation(input * u * v + bias)
+
+    * u of shape (input_units, rank) and v of shape (rank, units) are created by the layer,
+    * the layer has rank * (input_units + units) kernel weights instead of input_units * units and the product
+        costs O(rank * (input_units + units)) per sample instead of O(input_units * units).
+    Both factors use the kernel initializer, regularizer and constraint.
+    `cvnn.low_rank.to_low_rank_dense` factorizes a trained `ComplexDense` with a truncated SVD.
+    """
+
+    def __init__(self, units: int, rank: int, **kwargs):
+        """
+        :param units: Positive integer, dimensionality of the output space.
+        :param rank: Positive integer, inner dimension of the factorization.
+            It only reduces the size of the layer if rank < input_units * units / (input_units + units).
+        All other parameters are the same as `ComplexDense`.
+        """
+        super(ComplexLowRankDense, self).__init__(units, **kwargs)
+        if not isinstance(rank, int) or rank < 1:
+            raise ValueError(f"rank must be a positive integer. Received {rank}")
+        self.rank = rank
+
+    def build(self, input_shape):
+        if self.my_dtype.is_complex:
+            i_kernel_dtype, i_bias_dtype, i_kernel_initializer, i_bias_initializer = self._get_complex_initializers()
+            for name, shape in (('u', (input_shape[-1], self.rank)), ('v', (self.rank, self.units))):
+                self._add_complex_weight(name, 'kernel_' + name, shape=shape,
+                                         initializer=self.kernel_initializer, imag_initializer=i_kernel_initializer,
+                                         initializer_dtype=i_kernel_dtype, regularizer=self.kernel_regularizer,
+                                         constraint=self.kernel_constraint)
+            if self.use_bias:
+                self._add_complex_weight('b', 'bias', shape=(self.units,),
+                                         initializer=self.bias_initializer, imag_initializer=i_bias_initializer,
+                                         initializer_dtype=i_bias_dtype, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint)
+        else:
+            for name, shape in (('u', (input_shape[-1], self.rank)), ('v', (self.rank, self.units))):
+                setattr(self, name, self.add_weight('kernel_' + name, shape=shape, dtype=self.my_dtype,
+                                                    initializer=self.kernel_initializer,
+                                                    regularizer=self.kernel_regularizer,
+                                                    constraint=self.kernel_constraint, trainable=True))
+            if self.use_bias:
+                self.b = self.add_weight('bias', shape=(self.units,), dtype=self.my_dtype,
+                                         initializer=self.bias_initializer, regularizer=self.bias_regularizer,
+                                         constraint=self.bias_constraint, trainable=True)
+
+    def call(self, inputs: t_input):
+        inputs = self._check_input_dtype(inputs)
+        if self.my_dtype.is_complex and self.fused_epilogue:
+            return self._fused_call(inputs, ['u', 'v'])     # The intermediate product stays real
+        if self.my_dtype.is_complex:
+            if self.use_bias:
+                b = self._get_complex_weight('b')
+            if self.execution == 'block_real':
+                out = self._block_real_matmul(self._block_real_matmul(inputs, 'u'), 'v')
+            else:
+                out = tf.matmul(tf.matmul(inputs, self._get_complex_weight('u')), self._get_complex_weight('v'))
+        else:
+            if self.use_bias:
+                b = self.b
+            out = tf.matmul(tf.matmul(inputs, self.u), self.v)
+        if self.use_bias:
+            out = out + b
+        return self.activation(out)
+
+    def get_real_equivalent(self, output_multiplier=2):
+        # With twice the input and output units the real layer has the same number of kernel weights with equal rank
+        return ComplexLowRankDense(units=int(round(self.units * output_multiplier)), rank=self.rank,
+                                   activation=self.activation, use_bias=self.use_bias,
+                                   kernel_initializer=self.kernel_initializer, bias_initializer=self.bias_initializer,
+                                   dtype=self.my_dtype.real_dtype, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexLowRankDense, self).get_config()
+        config.update({'rank': self.rank})
+        return config
+
+
 class ComplexDropout(Layer, ComplexLayer):
     """
     Applies Dropout to the input.
@@ -317,7 +600,9 @@ class ComplexDropout(Layer, ComplexLayer):
             will be multiplied with the input.
             For instance, if your inputs have shape `(batch_size, timesteps, features)` and you want the dropout
             mask to be the same for all timesteps, you can use `noise_shape=(batch_size, 1, features)`.
-        :param seed: A Python integer to use as random seed.
+        :param seed: A Python integer to use as random seed. The mask of each step is drawn from a stateless RNG
+            with a seed derived from this one, so runs are reproducible without setting the global seed.
+            If None, a random seed is used.
         """
         super(ComplexDropout, self).__init__(**kwargs)  # trainable=False,
         if isinstance(rate, (int, float)) and not 0 <= rate <= 1:
@@ -339,34 +624,35 @@ class ComplexDropout(Layer, ComplexLayer):
             noise_shape.append(concrete_inputs_shape[i] if value is None else value)
         return tf.convert_to_tensor(noise_shape)
 
+    def build(self, input_shape):
+        # Generates a new seed for the stateless RNG at each step. Its state is not a weight of the layer.
+        self._seed_generator = tf.random.Generator.from_seed(self.seed if self.seed is not None
+                                                             else random.randint(1, int(1e9)))
+        self.built = True
+
     def call(self, inputs, training=None):
         """
         :param inputs: Input tensor (of any rank).
-        :param training: Python boolean indicating whether the layer should behave in training mode (adding dropout)
-            or in inference mode (doing nothing).
+        :param training: Python boolean or boolean Tensor indicating whether the layer should behave in training mode
+            (adding dropout) or in inference mode (doing nothing).
         """
         if training is None:
-            training = K.learning_phase()
-            tf.print(f"Training was None and now is {training}")
-            # This is used for my own debugging, I don't know WHEN this happens,
-            # I trust K.learning_phase() returns a correct boolean.
-
-        # def dropped_inputs():
-        #     # import pdb; pdb.set_trace()
-        #     drop_filter = tf.nn.dropout(tf.ones(tf.shape(inputs)), rate=self.rate,
-        #                                 noise_shape=self._get_noise_shape(inputs), seed=self.seed)
-        #     y_out = tf.multiply(tf.cast(drop_filter, dtype=inputs.dtype), inputs)
-        #     y_out = tf.cast(y_out, dtype=inputs.dtype)
-        #     return y_out
-        # output = control_flow_util.smart_cond(training, dropped_inputs, lambda: tf.identity(inputs))
-        # return output
-        if not training:
-            return inputs
-        drop_filter = tf.nn.dropout(tf.ones(tf.shape(inputs)), rate=self.rate,
-                                    noise_shape=self.noise_shape, seed=self.seed)
-        y_out = tf.multiply(tf.cast(drop_filter, dtype=inputs.dtype), inputs)
-        y_out = tf.cast(y_out, dtype=inputs.dtype)
-        return y_out
+            # Keras already resolved the training mode from the call context, None means inference
+            training = False
+        return smart_cond.smart_cond(training, lambda: self._dropped_inputs(inputs), lambda: tf.identity(inputs))
+
+    def _dropped_inputs(self, inputs):
+        noise_shape = self._get_noise_shape(inputs)
+        if noise_shape is None:
+            noise_shape = tf.shape(inputs)
+        # The mask has the (broadcastable) noise_shape and is applied with a single multiplication
+        keep_mask = tf.random.stateless_uniform(noise_shape, seed=self._seed_generator.make_seeds(1)[:, 0],
+                                                dtype=inputs.dtype.real_dtype) >= self.rate
+        scale = tf.math.divide_no_nan(tf.constant(1., dtype=inputs.dtype.real_dtype), 1. - self.rate)
+        mask = tf.cast(keep_mask, dtype=scale.dtype) * scale
+        if inputs.dtype.is_complex:     # Real-valued product on the interleaved view instead of a complex one
+            return view_as_complex(view_as_real(inputs) * tf.expand_dims(mask, axis=-1))
+        return inputs * mask
 
     def compute_output_shape(self, input_shape):
         return input_shape
@@ -388,16 +674,33 @@ class ComplexDropout(Layer, ComplexLayer):
 class ComplexBatchNormalization(Layer, ComplexLayer):
     """
     Complex Batch-Normalization as defined in section 3.5 of https://arxiv.org/abs/1705.09792
+    :param cov_method: How the covariance matrix is computed in training.
+        - 1 and 2: Use `tfp.stats.covariance` over a stacked copy of the real and imaginary parts
+            (requires tensorflow-probability). Kept as reference.
+        - 3 (default): Fused moments, E[Re], E[Im], E[Re²], E[Im²] and E[Re·Im] are reduced in a single pass,
+            shifted by a sample of the batch, without any stacked copy of the activations.
+    :param weight_storage: One of 'split' (default) or 'interleaved'. How the complex gamma and beta are stored,
+        see `ComplexDense`. Ignored if dtype is real.
     """
 
     def __init__(self, axis: Union[List[int], Tuple[int], int] = -1, momentum: float = 0.99,
                  center: bool = True, scale: bool = True, epsilon: float = 0.001,
                  beta_initializer=Zeros(), gamma_initializer=Ones(), dtype=DEFAULT_COMPLEX_TYPE,
-                 moving_mean_initializer=Zeros(), moving_variance_initializer=Ones(), cov_method: int = 2,  # TODO: Check inits
-                 **kwargs):
+                 moving_mean_initializer=Zeros(), moving_variance_initializer=Ones(), cov_method: int = 3,  # TODO: Check inits
+                 weight_storage: str = 'split', **kwargs):
         self.my_dtype = tf.dtypes.as_dtype(dtype)
+        self.weight_storage = weight_storage.lower()
+        if self.weight_storage not in WEIGHT_STORAGES:
+            raise ValueError(f"Unsuported weight_storage {self.weight_storage}, "
+                             f"supported storages are {WEIGHT_STORAGES}")
         self.epsilon = epsilon
         self.cov_method = cov_method
+        if self.cov_method not in BATCH_NORM_COV_METHODS:
+            raise ValueError(f"Unsuported cov_method {self.cov_method}, "
+                             f"supported methods are {BATCH_NORM_COV_METHODS}")
+        if self.cov_method in {1, 2} and not TFP_AVAILABLE:
+            raise ValueError(f"cov_method {self.cov_method} requires tensorflow-probability to be installed. "
+                             f"Use cov_method=3 instead.")
         if isinstance(axis, int):
             axis = [axis]
         self.axis = list(axis)
@@ -416,133 +719,163 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
         self.axis = [len(input_shape) + ax if ax < 0 else ax for ax in self.axis]
         self.used_axis = [ax for ax in range(0, len(input_shape)) if ax not in self.axis]
         desired_shape = [input_shape[ax] for ax in self.axis]
+        real_dtype = self.my_dtype.real_dtype
+        # Each replica updates its own moving statistics (as tf.keras BatchNormalization), averaged when read
+        moving_statistic = {'trainable': False, 'synchronization': tf.VariableSynchronization.ON_READ,
+                            'aggregation': tf.VariableAggregation.MEAN}
         if self.my_dtype.is_complex:
-            self.gamma_r = tf.Variable(
-                name='gamma_r',
-                initial_value=self.gamma_initializer(shape=tuple(desired_shape), dtype=self.my_dtype),
-                trainable=True
-            )
-            self.gamma_i = tf.Variable(
-                name='gamma_i',
-                initial_value=Zeros()(shape=tuple(desired_shape), dtype=self.my_dtype),
-                trainable=True
-            )  # I think I just need to scale with gamma, so by default I leave the imag part to zero
-            self.beta_r = tf.Variable(
-                name="beta_r",
-                initial_value=self.beta_initializer(shape=desired_shape, dtype=self.my_dtype),
-                trainable=True
-            )
-            self.beta_i = tf.Variable(
-                name="beta_i",
-                initial_value=self.beta_initializer(shape=desired_shape, dtype=self.my_dtype),
-                trainable=True
+            self._add_complex_weight('gamma', 'gamma', shape=desired_shape, initializer=self.gamma_initializer,
+                                     imag_initializer=Zeros(), initializer_dtype=self.my_dtype)
+            # I think I just need to scale with gamma, so by default I leave the imag part to zero
+            self._add_complex_weight('beta', 'beta', shape=desired_shape, initializer=self.beta_initializer,
+                                     imag_initializer=self.beta_initializer, initializer_dtype=self.my_dtype)
+            # Stored as real (interleaved), distributed variables only support the MEAN aggregation for floating dtypes
+            self.moving_mean_ri = self.add_weight(
+                name='moving_mean', shape=tuple(desired_shape) + (2,), dtype=real_dtype,
+                initializer=lambda shape, dtype=None, **kwargs: tf.stack((
+                    self.moving_mean_initializer(shape=shape[:-1], dtype=self.my_dtype),
+                    self.moving_mean_initializer(shape=shape[:-1], dtype=self.my_dtype)), axis=-1),
+                **moving_statistic
             )
-            self.moving_mean = tf.Variable(
-                name='moving_mean',
-                initial_value=tf.complex(real=self.moving_mean_initializer(shape=desired_shape,
-                                                                           dtype=self.my_dtype),
-                                         imag=self.moving_mean_initializer(shape=desired_shape,
-                                                                           dtype=self.my_dtype)),
-                trainable=False
-            )
-            self.moving_var = tf.Variable(
-                name='moving_var',
-                initial_value=tf.eye(2) * self.moving_variance_initializer(shape=tuple(desired_shape) + (2, 2),
-                                                                           dtype=self.my_dtype) / tf.math.sqrt(2.),
-                trainable=False
+            self.moving_var = self.add_weight(
+                name='moving_var', shape=tuple(desired_shape) + (2, 2), dtype=real_dtype,
+                initializer=lambda shape, dtype=None, **kwargs: tf.eye(2, dtype=real_dtype) *
+                self.moving_variance_initializer(shape=shape, dtype=self.my_dtype) / np.sqrt(2.),
+                **moving_statistic
             )
         else:
-            self.gamma = tf.Variable(
-                name='gamma',
-                initial_value=self.gamma_initializer(shape=tuple(desired_shape), dtype=self.my_dtype),
-                trainable=True
-            )
-            self.beta = tf.Variable(
-                name="beta",
-                initial_value=self.beta_initializer(shape=desired_shape, dtype=self.my_dtype),
-                trainable=True
-            )
-            self.moving_mean = tf.Variable(
-                name='moving_mean',
-                initial_value=self.moving_mean_initializer(shape=desired_shape, dtype=self.my_dtype),
-                trainable=False
-            )
-            self.moving_var = tf.Variable(
-                name='moving_var',
-                initial_value=tf.eye(2, dtype=self.my_dtype) * self.moving_variance_initializer(
-                    shape=tuple(desired_shape) + (2, 2),
-                    dtype=self.my_dtype),
-                trainable=False
+            self.gamma = self.add_weight(name='gamma', shape=desired_shape, dtype=self.my_dtype,
+                                         initializer=self.gamma_initializer, trainable=True)
+            self.beta = self.add_weight(name='beta', shape=desired_shape, dtype=self.my_dtype,
+                                        initializer=self.beta_initializer, trainable=True)
+            self._moving_mean = self.add_weight(name='moving_mean', shape=desired_shape, dtype=self.my_dtype,
+                                                initializer=self.moving_mean_initializer, **moving_statistic)
+            self.moving_var = self.add_weight(
+                name='moving_var', shape=tuple(desired_shape) + (2, 2), dtype=self.my_dtype,
+                initializer=lambda shape, dtype=None, **kwargs: tf.eye(2, dtype=self.my_dtype) *
+                self.moving_variance_initializer(shape=shape, dtype=self.my_dtype),
+                **moving_statistic
             )
 
+    @property
+    def moving_mean(self):
+        """
+        Moving mean with the layer dtype. For complex dtypes, a view of the real variable `moving_mean_ri`.
+        """
+        if self.my_dtype.is_complex:
+            return view_as_complex(self.moving_mean_ri)
+        return self._moving_mean
+
     def call(self, inputs, training=None):
-        if inputs.dtype != self.my_dtype:
-            tf.print(f"Warning: Expecting input dtype {self.my_dtype} but got {inputs.dtype}. "
-                     f"Automatic cast will be done.")
-            inputs = tf.cast(inputs, dtype=self.my_dtype)
+        inputs = self._check_input_dtype(inputs)
         if training is None:
-            training = K.learning_phase()
-            tf.print(f"Training was None and now is {training}")
-            # This is used for my own debugging, I don't know WHEN this happens,
-            # I trust K.learning_phase() returns a correct boolean.
-        if training:
-            # First get the mean and var
-            mean = tf.math.reduce_mean(inputs, axis=self.used_axis)
-            if self.cov_method == 1:
-                X_20 = tf.concat((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
-                var_20_20 = tfp.stats.covariance(X_20, sample_axis=self.used_axis, event_axis=-1)
-                valu = int(var_20_20.shape[-1] / 2)
-                indices = [([[i, i], [i, i + valu]], [[i + valu, i], [i + valu, i + valu]]) for i in range(0, valu)]
-                var = tf.gather_nd(var_20_20, indices=indices)
-            elif self.cov_method == 2:
-                X_10_2 = tf.stack((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
-                var_10_2_2 = tfp.stats.covariance(X_10_2, sample_axis=self.used_axis, event_axis=-1)
-                var = var_10_2_2
-            else:
-                raise ValueError(f"Method {self.method} not implemented")
-
-            # Now the train part with these values
-            self.moving_mean.assign(self.momentum * self.moving_mean + (1. - self.momentum) * mean)
-            self.moving_var.assign(self.moving_var * self.momentum + var * (1. - self.momentum))
-            out = self._normalize(inputs, var, mean)
-        else:
-            out = self._normalize(inputs, self.moving_var, self.moving_mean)
+            # Keras already resolved the training mode from the call context, None means inference
+            training = False
+        out = smart_cond.smart_cond(training, lambda: self._normalize_and_update(inputs),
+                                    lambda: self._normalize(inputs, self.moving_var, self.moving_mean))
         if self.scale:
             if self.my_dtype.is_complex:
-                gamma = tf.complex(self.gamma_r, self.gamma_i)
+                gamma = self._get_complex_weight('gamma')
             else:
                 gamma = self.gamma
             out = gamma * out
         if self.center:
             if self.my_dtype.is_complex:
-                beta = tf.complex(self.beta_r, self.beta_i)
+                beta = self._get_complex_weight('beta')
             else:
                 beta = self.beta
             out = out + beta
         return out
 
+    def _normalize_and_update(self, inputs):
+        """
+        Training mode: normalizes with the batch statistics and updates the moving ones.
+        """
+        # First get the mean and var
+        if self.cov_method == 3:
+            mean, var = self._fused_moments(inputs)
+        elif self.cov_method == 1:
+            mean = tf.math.reduce_mean(inputs, axis=self.used_axis)
+            X_20 = tf.concat((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
+            var_20_20 = tfp.stats.covariance(X_20, sample_axis=self.used_axis, event_axis=-1)
+            valu = int(var_20_20.shape[-1] / 2)
+            indices = [([[i, i], [i, i + valu]], [[i + valu, i], [i + valu, i + valu]]) for i in range(0, valu)]
+            var = tf.gather_nd(var_20_20, indices=indices)
+        elif self.cov_method == 2:
+            mean = tf.math.reduce_mean(inputs, axis=self.used_axis)
+            X_10_2 = tf.stack((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
+            var_10_2_2 = tfp.stats.covariance(X_10_2, sample_axis=self.used_axis, event_axis=-1)
+            var = var_10_2_2
+        else:
+            raise ValueError(f"Method {self.cov_method} not implemented")
+
+        # Now the train part with these values
+        if self.my_dtype.is_complex:
+            self.moving_mean_ri.assign(self.momentum * self.moving_mean_ri + (1. - self.momentum) * view_as_real(mean))
+        else:
+            self._moving_mean.assign(self.momentum * self._moving_mean + (1. - self.momentum) * mean)
+        self.moving_var.assign(self.moving_var * self.momentum + var * (1. - self.momentum))
+        return self._normalize(inputs, var, mean)
+
+    def _fused_moments(self, inputs):
+        """
+        Computes the mean and the (biased) covariance matrix of the real and imaginary parts in a single reduction
+            pass, without any stacked copy of the inputs. The moments are shifted by the first sample of each channel
+            of the batch, d = x - shift, and corrected with cov = E[d d^T] - E[d] E[d]^T. The shift lies within the
+            batch, so E[d] is of the order of the deviation and the correction does not cancel catastrophically
+            as the unshifted E[x x^T] - E[x] E[x]^T does when the mean is large.
+        :param inputs: Tensor
+        :return: Tuple (mean, var). mean with the inputs dtype and var of shape [..., 2, 2]
+        """
+        rank = inputs.shape.rank
+        shift = tf.stop_gradient(tf.slice(inputs, [0] * rank,
+                                          [1 if ax in self.used_axis else -1 for ax in range(rank)]))
+        shift_r = tf.math.real(shift)
+        delta_r = tf.math.real(inputs) - shift_r
+        mean_delta_r = tf.math.reduce_mean(delta_r, axis=self.used_axis)
+        var_rr = tf.math.reduce_mean(tf.math.square(delta_r), axis=self.used_axis) - tf.math.square(mean_delta_r)
+        mean_r = mean_delta_r + tf.squeeze(shift_r, axis=self.used_axis)
+        if not self.my_dtype.is_complex:     # var = [[var_rr, 0], [0, 0]]
+            zeros = tf.zeros_like(var_rr)
+            return mean_r, tf.stack((tf.stack((var_rr, zeros), axis=-1), tf.stack((zeros, zeros), axis=-1)), axis=-2)
+        shift_i = tf.math.imag(shift)
+        delta_i = tf.math.imag(inputs) - shift_i
+        mean_delta_i = tf.math.reduce_mean(delta_i, axis=self.used_axis)
+        var_ii = tf.math.reduce_mean(tf.math.square(delta_i), axis=self.used_axis) - tf.math.square(mean_delta_i)
+        var_ri = tf.math.reduce_mean(delta_r * delta_i, axis=self.used_axis) - mean_delta_r * mean_delta_i
+        mean_i = mean_delta_i + tf.squeeze(shift_i, axis=self.used_axis)
+        var = tf.stack((tf.stack((var_rr, var_ri), axis=-1), tf.stack((var_ri, var_ii), axis=-1)), axis=-2)
+        return tf.complex(mean_r, mean_i), var
+
+    def _inverse_sqrt_var(self, var):
+        """
+        Closed form of the inverse square root of the symmetric 2x2 matrix V = [[a, b], [b, c]] (+ epsilon):
+            V^(-1/2) = [[c + s, -b], [-b, a + s]] / (s * t) with s = sqrt(det(V)) and t = sqrt(a + c + 2s)
+        V is positive semi-definite, so the variances are clamped at 0 and the determinant at epsilon² (its lower
+            bound once epsilon is added) in case rounding pushed them below.
+        :param var: Tensor of shape [..., 2, 2]
+        :return: Tuple (w_rr, w_ri, w_ii) of shape [...] with the elements of the symmetric matrix V^(-1/2)
+        """
+        var_rr = tf.math.maximum(var[..., 0, 0], 0.) + self.epsilon
+        var_ii = tf.math.maximum(var[..., 1, 1], 0.) + self.epsilon
+        var_ri = var[..., 0, 1]
+        s = tf.math.sqrt(tf.math.maximum(var_rr * var_ii - tf.math.square(var_ri), self.epsilon ** 2))
+        inverse_st = tf.math.reciprocal(s * tf.math.sqrt(var_rr + var_ii + 2. * s))
+        return (var_ii + s) * inverse_st, -var_ri * inverse_st, (var_rr + s) * inverse_st
+
     def _normalize(self, inputs, var, mean):
         """
         :inputs: Tensor
         :param var: Tensor of shape [..., 2, 2], if inputs dtype is real, var[slice] = [[var_slice, 0], [0, 0]]
         :param mean: Tensor with the mean in the corresponding dtype (same shape as inputs)
         """
-        complex_zero_mean = inputs - mean
-        # Inv and sqrtm is done over 2 inner most dimension [..., M, M] so it should be [..., 2, 2] for us.
-        inv_sqrt_var = tf.linalg.sqrtm(tf.linalg.inv(var + self.epsilon_matrix))  # var^(-1/2)  # TODO: Check this exists always?
-        # Separate real and imag so I go from shape [...] to [..., 2]
-        zero_mean = tf.stack((tf.math.real(complex_zero_mean), tf.math.imag(complex_zero_mean)), axis=-1)
-        # I expand dims to make the mult of matrix [..., 2, 2] and [..., 2, 1] resulting in [..., 2, 1]
-        inputs_hat = tf.matmul(inv_sqrt_var, tf.expand_dims(zero_mean, axis=-1))
-
-        # Then I squeeze to remove the last shape so I go from [..., 2, 1] to [..., 2].
-        # Use reshape and not squeeze in case I have 1 channel for example.
-        squeeze_inputs_hat = tf.reshape(inputs_hat, shape=tf.shape(inputs_hat)[:-1])
-        # Get complex data
-        complex_inputs_hat = tf.cast(tf.complex(squeeze_inputs_hat[..., 0], squeeze_inputs_hat[..., 1]),
-                                     dtype=self.my_dtype)
-        # import pdb; pdb.set_trace()
-        return complex_inputs_hat
+        zero_mean = inputs - mean
+        w_rr, w_ri, w_ii = self._inverse_sqrt_var(var)
+        if not self.my_dtype.is_complex:     # Imaginary part is zero so only w_rr is needed
+            return w_rr * zero_mean
+        zero_mean_r = tf.math.real(zero_mean)
+        zero_mean_i = tf.math.imag(zero_mean)
+        return tf.complex(w_rr * zero_mean_r + w_ri * zero_mean_i, w_ri * zero_mean_r + w_ii * zero_mean_i)
 
     """@staticmethod
     def _normalize_real(inputs, var, mean):
@@ -555,7 +888,8 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
                                          beta_initializer=self.beta_initializer, epsilon=self.epsilon_matrix[0],
                                          gamma_initializer=self.gamma_initializer, dtype=self.my_dtype,
                                          moving_mean_initializer=self.moving_mean_initializer,
-                                         moving_variance_initializer=self.moving_variance_initializer)
+                                         moving_variance_initializer=self.moving_variance_initializer,
+                                         cov_method=self.cov_method)
 
     def get_config(self):
         config = super(ComplexBatchNormalization, self).get_config()
@@ -568,6 +902,8 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
             'gamma_initializer': self.gamma_initializer,
             'dtype': self.my_dtype,
             'moving_mean_initializer': self.moving_mean_initializer,
-            'moving_variance_initializer': self.moving_variance_initializer
+            'moving_variance_initializer': self.moving_variance_initializer,
+            'cov_method': self.cov_method,
+            'weight_storage': self.weight_storage
         })
         return config
@@ -14,6 +14,71 @@ from typing import Union, Optional, Tuple
 # Own models
 from cvnn.layers.core import ComplexLayer
 from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.utils import view_as_real, view_as_complex, in_xla_context
+from cvnn import logger
+
+UNPOOLING_COLLISIONS = {'last_write', 'max_magnitude'}
+
+
+def _linear_pool(pool, inputs, ksize, strides, padding, data_format):
+    """
+    Applies a linear pooling function (e.g. average pooling) to both the real and imag part of a complex input
+        with a single call over the interleaved view of the input (the reshapes do not copy the data):
+        - channels_last: the trailing [..., channels, 2] are merged into 2 * channels channels.
+        - channels_first: the channels are merged with the batch and the [..., 2] view is pooled as channels_last.
+    :param pool: Pooling function with the signature of tf.nn.avg_pool2d
+    :param data_format: TensorFlow data format string ('NWC', 'NCW', 'NHWC' or 'NCHW')
+    """
+    if not inputs.dtype.is_complex:
+        return pool(input=inputs, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+    interleaved = view_as_real(inputs)
+    input_shape = tf.shape(inputs)
+    if data_format.endswith('C'):
+        channels = inputs.shape[-1] if inputs.shape[-1] is not None else input_shape[-1]   # Keep the static shape
+        interleaved = tf.reshape(interleaved, tf.concat([input_shape[:-1], [2 * channels]], axis=0))
+        output = pool(input=interleaved, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+        output = tf.reshape(output, tf.concat([tf.shape(output)[:-1], [channels, 2]], axis=0))
+    else:
+        rank = len(data_format) - 2
+        ksize, strides = [x if isinstance(x, int) or len(x) != rank + 2 else (1,) + tuple(x[2:]) + (1,)
+                          for x in (ksize, strides)]
+        interleaved = tf.reshape(interleaved, tf.concat([[-1], input_shape[2:], [2]], axis=0))
+        output = pool(input=interleaved, ksize=ksize, strides=strides, padding=padding,
+                      data_format='N' + data_format[2:] + 'C')
+        output = tf.reshape(output, tf.concat([input_shape[:2], tf.shape(output)[1:]], axis=0))
+    return view_as_complex(output)
+
+
+def _max_pool_with_argmax_from_patches(inputs, ksize, strides, padding):
+    """
+    Equivalent of tf.nn.max_pool_with_argmax (NHWC, include_batch_in_index=False) built with ops supported by XLA:
+        The windows are extracted with tf.image.extract_patches and reduced with tf.math.argmax.
+    :return: A tuple of Tensor objects (output, argmax). argmax is flattened for each batch element.
+    """
+    _, pool_height, pool_width, _ = ksize
+    _, stride_height, stride_width, _ = strides
+    input_shape = tf.shape(inputs, out_type=tf.int64)
+    height, width, channels = input_shape[1], input_shape[2], input_shape[3]
+    if padding == 'SAME':   # Padded values never win the max
+        pad_height = tf.maximum((-(-height // stride_height) - 1) * stride_height + pool_height - height, 0)
+        pad_width = tf.maximum((-(-width // stride_width) - 1) * stride_width + pool_width - width, 0)
+        pad_top, pad_left = pad_height // 2, pad_width // 2
+        inputs = tf.pad(inputs, [[0, 0], [pad_top, pad_height - pad_top], [pad_left, pad_width - pad_left], [0, 0]],
+                        constant_values=inputs.dtype.min)
+    else:
+        pad_top, pad_left = tf.constant(0, tf.int64), tf.constant(0, tf.int64)
+    patches = tf.image.extract_patches(inputs, sizes=[1, pool_height, pool_width, 1],
+                                       strides=[1, stride_height, stride_width, 1], rates=[1, 1, 1, 1], padding='VALID')
+    # Patch depth is ordered as (row, column, channel)
+    patches = tf.reshape(patches, tf.concat([tf.shape(patches, out_type=tf.int64)[:3],
+                                             [pool_height * pool_width, channels]], axis=0))
+    output = tf.math.reduce_max(patches, axis=3)
+    offset = tf.math.argmax(patches, axis=3, output_type=tf.int64)
+    rows = offset // pool_width + \
+        tf.reshape(tf.range(tf.shape(output, out_type=tf.int64)[1]) * stride_height - pad_top, [-1, 1, 1])
+    cols = offset % pool_width + \
+        tf.reshape(tf.range(tf.shape(output, out_type=tf.int64)[2]) * stride_width - pad_left, [-1, 1])
+    return output, (rows * width + cols) * channels + tf.range(channels)
 
 
 class ComplexPooling2D(Layer, ComplexLayer):
@@ -114,33 +179,55 @@ class ComplexMaxPooling2D(ComplexPooling2D):
                  name: Optional[str] = None, **kwargs):
         super(ComplexMaxPooling2D, self).__init__(pool_size=pool_size, strides=strides, padding=padding,
                                                   data_format=data_format, name=name, **kwargs)
-        self.argmax = None
 
-    def pool_function(self, inputs, ksize, strides, padding, data_format):
-        # The max is calculated with the absolute value. This will still work on real values.
+    def _pool_with_argmax(self, inputs, ksize, strides, padding, data_format):
+        """
+        Max pooling using the absolute value for complex inputs.
+        Values are ranked by |z|^2 = Re^2 + Im^2 which has the same order as |z| without computing the square root.
+        :return: A tuple of Tensor objects (output, argmax).
+            - output	A Tensor. Has the same type as input.
+            - argmax	A Tensor. The indices are flattened for each batch element: (y * width + x) * channels + c
+        """
         if inputs.dtype.is_complex:
-            abs_in = tf.math.abs(inputs)
+            ranking = tf.reduce_sum(tf.math.square(view_as_real(inputs)), axis=-1)
+        else:
+            ranking = inputs
+        if in_xla_context():    # XLA has no MaxPoolWithArgmax kernel
+            output, argmax = _max_pool_with_argmax_from_patches(ranking, ksize=ksize, strides=strides,
+                                                                padding=padding)
         else:
-            abs_in = inputs
-        output, argmax = tf.nn.max_pool_with_argmax(input=abs_in, ksize=ksize, strides=strides,
-                                                    padding=padding, data_format=data_format,
-                                                    include_batch_in_index=True)
-        self.argmax = argmax
-        shape = tf.shape(output)
-        tf_res = tf.reshape(tf.gather(tf.reshape(inputs, [-1]), argmax), shape)
-        # assert np.all(tf_res == output)             # For debugging when the input is real only!
-        assert tf_res.dtype == inputs.dtype
-        return tf_res
+            output, argmax = tf.nn.max_pool_with_argmax(input=ranking, ksize=ksize, strides=strides,
+                                                        padding=padding, data_format=data_format,
+                                                        include_batch_in_index=False)
+        if inputs.dtype.is_complex:
+            # Gather each batch element from its own flattened input (reshape does not copy the data)
+            batch_size = tf.shape(inputs)[0]
+            output = tf.reshape(tf.gather(tf.reshape(inputs, [batch_size, -1]), tf.reshape(argmax, [batch_size, -1]),
+                                          batch_dims=1), tf.shape(output))
+        return output, argmax
+
+    def pool_function(self, inputs, ksize, strides, padding, data_format):
+        output, _ = self._pool_with_argmax(inputs, ksize=ksize, strides=strides, padding=padding,
+                                           data_format=data_format)
+        return output
+
+    @property
+    def argmax(self):
+        raise AttributeError(f"{self.__class__.__name__} no longer stores the argmax of its last call. "
+                             f"Use ComplexMaxPooling2DWithArgmax, which returns (output, argmax)")
+
+    def get_max_index(self):
+        """
+        Removed: the layer no longer stores the argmax of its last call (it was overwritten at each call and broke
+            inside tf.function). Use `ComplexMaxPooling2DWithArgmax`, which returns the indices with the output.
+        """
+        raise AttributeError(f"{self.__class__.__name__}.get_max_index was removed. "
+                             f"Use ComplexMaxPooling2DWithArgmax, which returns (output, argmax)")
 
     def get_real_equivalent(self):
         return ComplexMaxPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
                                    data_format=self.data_format, name=self.name + "_real_equiv")
 
-    def get_max_index(self):
-        if self.argmax is None:
-            raise AttributeError("Variable argmax did not exist, call at least once the max-pooling layer")
-        return self.argmax  # TODO: Shall I check this is use only once?
-
 
 class ComplexMaxPooling2DWithArgmax(ComplexMaxPooling2D):
     """
@@ -164,35 +251,19 @@ class ComplexMaxPooling2DWithArgmax(ComplexMaxPooling2D):
             - output	A Tensor. Has the same type as input.
             - argmax	A Tensor. The indices in argmax are flattened (Complains directly to TensorFlow)
         """
-        # The max is calculated with the absolute value. This will still work on real values.
-        if inputs.dtype.is_complex:
-            abs_in = tf.math.abs(inputs)
-        else:
-            abs_in = inputs
-        output, argmax = tf.nn.max_pool_with_argmax(input=abs_in, ksize=ksize, strides=strides,
-                                                    padding=padding, data_format=data_format,
-                                                    include_batch_in_index=True)
-        shape = tf.shape(output)
-        tf_res = tf.reshape(tf.gather(tf.reshape(inputs, [-1]), argmax), shape)
-        # assert np.all(tf_res == output)             # For debugging when the input is real only!
-        assert tf_res.dtype == inputs.dtype
-        return tf_res, argmax
+        output, argmax = self._pool_with_argmax(inputs, ksize=ksize, strides=strides, padding=padding,
+                                                data_format=data_format)
+        # Include the batch in the index as expected by ComplexUnPooling2D
+        batch_size = tf.shape(inputs, out_type=argmax.dtype)[0]
+        batch_offset = tf.range(batch_size) * tf.reduce_prod(tf.shape(inputs, out_type=argmax.dtype)[1:])
+        return output, argmax + tf.reshape(batch_offset, [-1, 1, 1, 1])
 
 
 class ComplexAvgPooling2D(ComplexPooling2D):
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        output_r = tf.nn.avg_pool2d(input=inputs_r, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        output_i = tf.nn.avg_pool2d(input=inputs_i, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_r, output_i)
-        else:
-            output = output_r
-        return output
+        return _linear_pool(tf.nn.avg_pool2d, inputs, ksize=ksize, strides=strides, padding=padding,
+                            data_format=data_format)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
@@ -201,14 +272,21 @@ class ComplexAvgPooling2D(ComplexPooling2D):
 
 class ComplexUnPooling2D(Layer, ComplexLayer):
     """
+    UnPooling of 1D, 2D and 3D inputs (the rank is given by the input or the output shape).
+        It keeps the 2D name, from when only images were supported, for backwards compatibility.
     Performs UnPooling as explained in:
     https://www.oreilly.com/library/view/hands-on-convolutional-neural/9781789130331/6476c4d5-19f2-455f-8590-c6f99504b7a5.xhtml
     This class was inspired to recreate the CV-FCN model of https://www.mdpi.com/2072-4292/11/22/2653
-    As far as I am concerned this class should work for any dimensional input but I have not tested it
-        (and you need the argmax which I only implemented the 2D case).
+    When several values are unpooled to the same index (overlapping pooling windows), the `collision` rule is used:
+        - 'last_write': A single `tf.tensor_scatter_nd_update`. On CPU the writes are sequential and the value with
+            the highest flattened input position is kept. Other devices do not define the order of duplicated writes.
+        - 'max_magnitude': The value with the largest absolute value is kept (ties keep the first one).
+            Deterministic on every device: the collisions are resolved before the scatter.
     """
 
-    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None, dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, **kwargs):
+    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
+                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, collision: str = 'last_write',
+                 include_batch_in_index: bool = True, data_format: Optional[str] = None, **kwargs):
         """
         :param desired_output_shape: tf.TensorShape (or equivalent like tuple or list).
             The expected output shape without the batch size.
@@ -216,6 +294,11 @@ class ComplexUnPooling2D(Layer, ComplexLayer):
         :param upsampling_factor: Integer. The factor to which enlarge the image, 
             For example, if upsampling_factor=2, an input image of size 32x32 will be 64x64.
             This parameter is ignored if desired_output_shape is used or if the output shape is given to the call funcion.
+        :param collision: One of UNPOOLING_COLLISIONS. Value kept when several values are unpooled to the same index.
+        :param include_batch_in_index: Whether the argmax indices are flattened including the batch
+            (as the ones of ComplexMaxPooling2DWithArgmax) or are flattened for each batch element.
+        :param data_format: A string, one of `channels_last` (default) or `channels_first`.
+            Used to know the spatial dimensions enlarged by the upsampling_factor.
         """
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         if desired_output_shape is not None:
@@ -223,26 +306,64 @@ class ComplexUnPooling2D(Layer, ComplexLayer):
                 # tf.print(f"Warning: Partially defined desired_output_shape will be casted to None")
                 # desired_output_shape = None
                 raise ValueError(f"desired_output_shape must be fully defined, got {desired_output_shape}")
-            elif len(desired_output_shape) != 3:
-                raise ValueError(f"desired_output_shape expected to be size 3 and got size {len(desired_output_shape)}")
+            elif not 2 <= len(desired_output_shape) <= 4:
+                raise ValueError(f"desired_output_shape expected to be size 2, 3 or 4 (1D, 2D or 3D) "
+                                 f"and got size {len(desired_output_shape)}")
         self.desired_output_shape = desired_output_shape
         if upsampling_factor is None or isinstance(upsampling_factor, int):
             self.upsampling_factor = upsampling_factor
         else:
              raise ValueError(f"Unsuported upsampling_factor = {upsampling_factor}")
+        if collision not in UNPOOLING_COLLISIONS:
+            raise ValueError(f"Unsuported collision {collision}, supported rules are {UNPOOLING_COLLISIONS}")
+        self.collision = collision
+        self.include_batch_in_index = include_batch_in_index
+        if data_format is None:
+            data_format = backend.image_data_format()
+        self.data_format = conv_utils.normalize_data_format(data_format)
         super(ComplexUnPooling2D, self).__init__(trainable=False, name=name, dtype=self.my_dtype.real_dtype,
                                                  dynamic=dynamic, **kwargs)
 
+    def _upsampled_shape(self, inputs_values):
+        """
+        Computes the output shape (without the batch size) multiplying the spatial dimensions by the upsampling factor.
+        :return: A tuple of integers if the input shape is known, an int32 Tensor otherwise.
+        """
+        rank = inputs_values.shape.rank - 2
+        factors = [1] + [self.upsampling_factor] * rank if self.data_format == 'channels_first' \
+            else [self.upsampling_factor] * rank + [1]
+        if inputs_values.shape[1:].is_fully_defined():
+            return tuple(dim * factor for dim, factor in zip(inputs_values.shape[1:], factors))
+        return tf.shape(inputs_values)[1:] * factors
+
+    def _unpool_flat(self, indices, updates, size):
+        """
+        Unpools the flattened updates into a flat tensor of `size` elements following the collision rule.
+        """
+        if self.collision == 'last_write':
+            return tf.tensor_scatter_nd_update(tf.zeros(tf.expand_dims(size, axis=0), dtype=updates.dtype),
+                                               tf.expand_dims(indices, axis=-1), updates)
+        num_updates = tf.shape(updates, out_type=indices.dtype)[0]
+        positions = tf.range(num_updates, dtype=indices.dtype)
+        magnitude = tf.reduce_sum(tf.math.square(view_as_real(updates)), axis=-1) if updates.dtype.is_complex \
+            else tf.math.square(updates)
+        max_magnitude = tf.math.unsorted_segment_max(magnitude, indices, num_segments=size)
+        # Ties are broken by keeping the first update
+        candidates = tf.where(magnitude >= tf.gather(max_magnitude, indices), positions, num_updates)
+        winner = tf.math.unsorted_segment_min(candidates, indices, num_segments=size)
+        # The other updates are sent to an extra element, dropped afterwards, so each output index is written once
+        indices = tf.where(tf.equal(tf.gather(winner, indices), positions), indices, size)
+        return tf.scatter_nd(tf.expand_dims(indices, axis=-1), updates, tf.expand_dims(size + 1, axis=0))[:size]
+
     def call(self, inputs, **kwargs):
         """
-        TODO: Still has a bug, if argmax has coincident indexes. Don't think this is desired (but might).
         :param inputs: A tuple of Tensor objects (input, argmax).
             - input 	A Tensor.
-            - argmax	A Tensor. The indices in argmax are flattened (Complains directly to TensorFlow)
+            - argmax	A Tensor. The indices in argmax are flattened (Complains directly to TensorFlow),
+                including the batch unless include_batch_in_index=False.
             - output_shape (Optional) A tf.TensorShape (or equivalent like tuple or list).
                 The expected output shape without the batch size.
                 Meaning that for a 2D image to be enlarged, this is size 3 of the form HxWxC or CxHxW
-            # TODO: I could make an automatic unpool mat if it is not given.
         """
         if not isinstance(inputs, list):
             raise ValueError('This layer should be called on a list of inputs.')
@@ -257,37 +378,45 @@ class ComplexUnPooling2D(Layer, ComplexLayer):
         # https://stackoverflow.com/a/42549265/5931672
         # https://github.com/tensorflow/addons/issues/632#issuecomment-482580850
         # This is for the case I don't know the expected output shape so I used the upsampling factor
-        if not tf.TensorShape(output_shape).is_fully_defined():
-            if self.upsampling_factor is None:
+        if not tf.is_tensor(output_shape):     # A Tensor output_shape (given to the call) is used as is
+            if tf.TensorShape(output_shape).is_fully_defined():
+                output_shape = tuple(tf.TensorShape(output_shape).as_list())
+                if self.upsampling_factor is not None:
+                    logger.warning(f"{self.name}: Ignoring upsampling_factor as the output shape is given")
+            elif self.upsampling_factor is None:
                 raise ValueError('output_shape should be passed as 3rd element or either desired_output_shape '
                                  'or upsampling_factor should be passed on construction')
-            if inputs_values.get_shape()[1:].is_fully_defined():
-                output_shape = tf.tile(inputs_values,
-                                       [1, self.upsampling_factor, self.upsampling_factor, 1]).get_shape()[1:]
             else:
-                output_shape = tf.shape(inputs_values)[1:]
-        elif self.upsampling_factor is not None:
-            tf.print("WARNING: Ignoring self.upsampling_factor parameter")
-            
-        flat_output_shape = tf.reduce_prod(output_shape)
-        shape = (tf.shape(inputs_values)[0]*flat_output_shape,)
-        updates = tf.reshape(inputs_values, [-1])
-        indices = tf.expand_dims(tf.reshape(unpool_mat, [-1]), axis=-1)
-        # assert indices.shape[-1] == tf.rank(shape)
-        ret = tf.scatter_nd(indices, updates, shape=shape)
-        # import pdb; pdb.set_trace()
-        desired_output_shape_with_batch = tf.concat([[tf.shape(inputs_values)[0]], output_shape], axis=0)
+                output_shape = self._upsampled_shape(inputs_values)
+
+        batch_size = tf.shape(inputs_values, out_type=unpool_mat.dtype)[0]
+        flat_output_size = tf.reduce_prod(tf.cast(output_shape, dtype=unpool_mat.dtype))
+        indices = unpool_mat
+        if not self.include_batch_in_index:
+            batch_offset = tf.range(batch_size, dtype=unpool_mat.dtype) * flat_output_size
+            indices += tf.reshape(batch_offset, [-1] + [1] * (unpool_mat.shape.rank - 1))
+        ret = self._unpool_flat(tf.reshape(indices, [-1]), tf.reshape(inputs_values, [-1]),
+                            batch_size * flat_output_size)
+        desired_output_shape_with_batch = tf.concat([[batch_size], tf.cast(output_shape, unpool_mat.dtype)], axis=0)
         ret = tf.reshape(ret, shape=desired_output_shape_with_batch)
+        if isinstance(output_shape, tuple):
+            ret.set_shape([inputs_values.shape[0]] + list(output_shape))
         return ret
 
     def get_real_equivalent(self):
         return ComplexUnPooling2D(desired_output_shape=self.desired_output_shape, name=self.name,
-                                  dtype=self.my_dtype.real_dtype, dynamic=self.dtype)
+                                  dtype=self.my_dtype.real_dtype, dynamic=self.dtype,
+                                  upsampling_factor=self.upsampling_factor, collision=self.collision,
+                                  include_batch_in_index=self.include_batch_in_index, data_format=self.data_format)
 
     def get_config(self):
         config = super(ComplexUnPooling2D, self).get_config()
         config.update({
             'desired_output_shape': self.desired_output_shape,
+            'upsampling_factor': self.upsampling_factor,
+            'collision': self.collision,
+            'include_batch_in_index': self.include_batch_in_index,
+            'data_format': self.data_format,
             'name': self.name,
             'dtype': self.my_dtype,
             'dynamic': False,
@@ -361,17 +490,8 @@ class ComplexPooling1D(Layer, ComplexLayer):
 class ComplexAvgPooling1D(ComplexPooling1D):
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        output_r = tf.nn.avg_pool1d(input=inputs_r, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        output_i = tf.nn.avg_pool1d(input=inputs_i, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_r, output_i)
-        else:
-            output = output_r
-        return output
+        return _linear_pool(tf.nn.avg_pool1d, inputs, ksize=ksize, strides=strides, padding=padding,
+                            data_format=data_format)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling1D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
@@ -0,0 +1,180 @@
+from abc import abstractmethod
+import tensorflow as tf
+from typing import Optional
+from tensorflow.keras import activations
+from tensorflow.keras.layers import Layer
+from tensorflow.python.keras.utils import conv_utils
+# Own modules
+from cvnn.layers.core import ComplexLayer, ComplexDense, DEFAULT_COMPLEX_TYPE
+from cvnn.layers.convolutional import ComplexConv2D
+from cvnn.utils import view_as_complex
+
+QUANTIZED_MAX = 127     # Symmetric int8 range [-127, 127] so the kernel can be negated without overflow
+
+
+class ComplexQuantizedLayer(Layer, ComplexLayer):
+    """
+    Base class of the inference-only int8 layers:
+        activation(x * k + bias)
+    - The kernel parts are int8 with one scale per output channel (shared by the real and imaginary parts):
+        k = kernel_scale * (q_kr + j q_ki). They are stored as a single int8 kernel [q_kr | q_ki] concatenated on
+        the output channel axis.
+    - The real and imaginary parts of the input are quantized to int8 with the per-tensor scales calibrated on a
+        representative dataset: x = input_scale_r * q_xr + j input_scale_i * q_xi.
+    - The integer products accumulate in int32 in a single product of the kernel with both input parts stacked on
+        the batch axis: [a_r | a_i] = q_xr * [q_kr | q_ki] and [b_r | b_i] = q_xi * [q_kr | q_ki].
+        They are requantized to float with the scales:
+        y = kernel_scale * (input_scale_r * a_r - input_scale_i * b_i + j (input_scale_r * a_i + input_scale_i * b_r)).
+    These layers are generated by `cvnn.quantization.quantize_model`, which keeps the config of the quantized float
+        layer in `float_config` so the real equivalent can be built from it.
+    """
+    float_class = None      # Float layer class that `float_config` configures
+
+    def __init__(self, activation=None, dtype=DEFAULT_COMPLEX_TYPE, float_config: Optional[dict] = None, **kwargs):
+        super(ComplexQuantizedLayer, self).__init__(**kwargs)
+        self.float_config = float_config
+        self.my_dtype = tf.dtypes.as_dtype(dtype)
+        if not self.my_dtype.is_complex:
+            raise ValueError(f"{self.__class__.__name__} only supports complex dtypes. Received {self.my_dtype}")
+        self.activation = activations.get(activation)
+
+    @abstractmethod
+    def _output_channels(self):
+        pass
+
+    @abstractmethod
+    def _kernel_shape(self, input_channel):
+        """
+        :return: Shape of the int8 kernel [q_kr | q_ki], with `2 * _output_channels()` output channels.
+        """
+        pass
+
+    @abstractmethod
+    def _product(self, quantized_inputs, kernel):
+        """
+        :param quantized_inputs: int32 tensor
+        :param kernel: int32 kernel of shape `_kernel_shape`
+        :return: int32 accumulators
+        """
+        pass
+
+    def build(self, input_shape):
+        input_channel = int(tf.TensorShape(input_shape)[-1])
+        self.kernel = self.add_weight(name='kernel', shape=self._kernel_shape(input_channel),
+                                      initializer='zeros', dtype=tf.int8, trainable=False)
+        self.kernel_scale = self.add_weight(name='kernel_scale', shape=(self._output_channels(),), initializer='ones',
+                                            dtype=self.my_dtype.real_dtype, trainable=False)
+        self.input_scale = self.add_weight(name='input_scale', shape=(2,), initializer='ones',
+                                           dtype=self.my_dtype.real_dtype, trainable=False)
+        self.bias = self.add_weight(name='bias', shape=(self._output_channels(), 2), initializer='zeros',
+                                    dtype=self.my_dtype.real_dtype, trainable=False)
+        self.built = True
+
+    def _quantize_inputs(self, inputs, scale):
+        # The int8 values are kept in int32, the dtype of the accumulation
+        return tf.cast(tf.clip_by_value(tf.round(inputs / scale), -QUANTIZED_MAX, QUANTIZED_MAX), tf.int32)
+
+    def call(self, inputs):
+        inputs = self._check_input_dtype(inputs)
+        real_dtype = self.my_dtype.real_dtype
+        # The quantized real and imaginary parts are stacked on the batch axis for a single integer product
+        #   with the kernel, cast once: [a; b] = [q_xr; q_xi] * [q_kr | q_ki]
+        quantized_inputs = tf.concat((self._quantize_inputs(tf.math.real(inputs), self.input_scale[0]),
+                                      self._quantize_inputs(tf.math.imag(inputs), self.input_scale[1])), axis=0)
+        from_real, from_imag = tf.split(tf.cast(self._product(quantized_inputs, tf.cast(self.kernel, tf.int32)),
+                                                real_dtype), 2, axis=0)
+        from_real_r, from_real_i = tf.split(self.input_scale[0] * from_real, 2, axis=-1)
+        from_imag_r, from_imag_i = tf.split(self.input_scale[1] * from_imag, 2, axis=-1)
+        outputs = tf.complex((from_real_r - from_imag_i) * self.kernel_scale,
+                             (from_real_i + from_imag_r) * self.kernel_scale)
+        return self.activation(outputs + view_as_complex(self.bias))
+
+    def get_real_equivalent(self, **kwargs):
+        """
+        :return: The real equivalent of the float layer this layer was quantized from (see `float_config`).
+        """
+        if self.float_config is None:
+            raise ValueError(f"{self.name} is an inference-only int8 layer without the config of its float layer. "
+                             f"Get the real equivalent of the float model before `cvnn.quantization.quantize_model`")
+        return self.float_class.from_config(self.float_config).get_real_equivalent(**kwargs)
+
+    def get_config(self):
+        config = super(ComplexQuantizedLayer, self).get_config()
+        config.update({
+            'activation': activations.serialize(self.activation),
+            'dtype': self.my_dtype,
+            'float_config': self.float_config
+        })
+        return config
+
+
+class ComplexQuantizedDense(ComplexQuantizedLayer):
+    """
+    Int8 fully connected layer. Kernel of shape (input_units, 2 * units).
+    """
+    float_class = ComplexDense
+
+    def __init__(self, units: int, **kwargs):
+        super(ComplexQuantizedDense, self).__init__(**kwargs)
+        self.units = units
+
+    def _output_channels(self):
+        return self.units
+
+    def _kernel_shape(self, input_channel):
+        return input_channel, 2 * self.units
+
+    def _product(self, quantized_inputs, kernel):
+        return tf.matmul(quantized_inputs, kernel)
+
+    def compute_output_shape(self, input_shape):
+        return tf.TensorShape(input_shape)[:-1].concatenate([self.units])
+
+    def get_config(self):
+        config = super(ComplexQuantizedDense, self).get_config()
+        config.update({'units': self.units})
+        return config
+
+
+class ComplexQuantizedConv2D(ComplexQuantizedLayer):
+    """
+    Int8 2D convolution. Kernel of shape kernel_size + (input_channels, 2 * filters).
+    Padding, strides and dilation behave as in `ComplexConv2D`. Only channels_last and `groups=1` are supported.
+    """
+    float_class = ComplexConv2D
+
+    def __init__(self, filters: int, kernel_size, strides=1, padding='valid', dilation_rate=1, **kwargs):
+        super(ComplexQuantizedConv2D, self).__init__(**kwargs)
+        self.filters = filters
+        self.kernel_size = conv_utils.normalize_tuple(kernel_size, 2, 'kernel_size')
+        self.strides = conv_utils.normalize_tuple(strides, 2, 'strides')
+        self.padding = conv_utils.normalize_padding(padding)
+        self.dilation_rate = conv_utils.normalize_tuple(dilation_rate, 2, 'dilation_rate')
+
+    def _output_channels(self):
+        return self.filters
+
+    def _kernel_shape(self, input_channel):
+        return self.kernel_size + (input_channel, 2 * self.filters)
+
+    def _product(self, quantized_inputs, kernel):
+        return tf.nn.convolution(quantized_inputs, kernel, strides=list(self.strides), padding=self.padding.upper(),
+                                 dilations=list(self.dilation_rate))
+
+    def compute_output_shape(self, input_shape):
+        input_shape = tf.TensorShape(input_shape).as_list()
+        spatial = [conv_utils.conv_output_length(length, self.kernel_size[i], padding=self.padding,
+                                                 stride=self.strides[i], dilation=self.dilation_rate[i])
+                   for i, length in enumerate(input_shape[1:3])]
+        return tf.TensorShape(input_shape[:1] + spatial + [self.filters])
+
+    def get_config(self):
+        config = super(ComplexQuantizedConv2D, self).get_config()
+        config.update({
+            'filters': self.filters,
+            'kernel_size': self.kernel_size,
+            'strides': self.strides,
+            'padding': self.padding,
+            'dilation_rate': self.dilation_rate
+        })
+        return config
@@ -4,6 +4,7 @@ from tensorflow.keras.layers import UpSampling2D
 from typing import Optional, Union, Tuple
 from cvnn.layers.core import ComplexLayer
 from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.utils import view_as_real, view_as_complex
 
 
 class ComplexUpSampling2D(UpSampling2D, ComplexLayer):
@@ -28,14 +29,44 @@ class ComplexUpSampling2D(UpSampling2D, ComplexLayer):
                                                   dtype=self.my_dtype.real_dtype, **kwargs)
 
     def call(self, inputs):
-        result = tf.complex(
-            backend.resize_images(tf.math.real(inputs), self.size[0], self.size[1], self.data_format,
-                                  interpolation=self.interpolation),
-            backend.resize_images(tf.math.imag(inputs), self.size[0], self.size[1], self.data_format,
-                                  interpolation=self.interpolation),
-        )
-        casted_value = inputs.dtype if not inputs.dtype.is_integer else tf.float32
-        return tf.cast(result, dtype=casted_value)
+        """
+        Both the real and imag parts are resized with a single call over the interleaved view of the input:
+            - channels_last: the trailing [..., channels, 2] are merged into 2 * channels channels.
+            - channels_first: the channels are merged with the batch and the [..., 2] view is resized as channels_last.
+        The interpolation is linear on each channel, so this is the same as resizing both parts separately.
+        """
+        input_shape = tf.shape(inputs)
+        parts = 2 if inputs.dtype.is_complex else 1
+        images = view_as_real(inputs) if inputs.dtype.is_complex else inputs
+        if self.data_format == 'channels_last':
+            channels = inputs.shape[-1] if inputs.shape[-1] is not None else input_shape[-1]  # Keep the static shape
+            if inputs.dtype.is_complex:
+                images = tf.reshape(images, tf.concat([input_shape[:-1], [2 * channels]], axis=0))
+        else:
+            images = tf.reshape(images, tf.concat([[-1], input_shape[2:], [parts]], axis=0))
+        result = self._resize_channels_last(images)
+        if self.data_format == 'channels_last':
+            if inputs.dtype.is_complex:
+                result = tf.reshape(result, tf.concat([tf.shape(result)[:-1], [channels, 2]], axis=0))
+        else:
+            result = tf.reshape(result, tf.concat([input_shape[:2], tf.shape(result)[1:3],
+                                                   [2] if inputs.dtype.is_complex else []], axis=0))
+        if not inputs.dtype.is_complex:
+            return tf.cast(result, dtype=inputs.dtype if not inputs.dtype.is_integer else tf.float32)
+        # Bilinear resize outputs float32
+        return view_as_complex(tf.cast(result, dtype=inputs.dtype.real_dtype))
+
+    def _resize_channels_last(self, images):
+        if self.interpolation != 'nearest':
+            return backend.resize_images(images, self.size[0], self.size[1], 'channels_last',
+                                         interpolation=self.interpolation)
+        # With integer factors the nearest neighbour is a repetition of each pixel (tf.image.resize gradient,
+        #   ResizeNearestNeighborGrad, can't be compiled with XLA)
+        batch_size, height, width, channels = [dim if dim is not None else tf.shape(images)[i]
+                                               for i, dim in enumerate(images.shape)]
+        repeated = tf.broadcast_to(images[:, :, tf.newaxis, :, tf.newaxis, :],
+                                   [batch_size, height, self.size[0], width, self.size[1], channels])
+        return tf.reshape(repeated, [batch_size, height * self.size[0], width * self.size[1], channels])
 
     def get_real_equivalent(self):
         return ComplexUpSampling2D(size=self.factor_upsample, data_format=self.data_format,
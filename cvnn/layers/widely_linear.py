@@ -0,0 +1,169 @@
+from abc import abstractmethod
+import tensorflow as tf
+from tensorflow.keras import activations
+from tensorflow.keras.layers import Layer
+from tensorflow.python.keras.utils import conv_utils
+# Own modules
+from cvnn.layers.core import ComplexLayer, ComplexDense, DEFAULT_COMPLEX_TYPE
+from cvnn.layers.convolutional import ComplexConv1D, ComplexConv2D, ComplexConv3D
+
+
+class ComplexWidelyLinearLayer(Layer, ComplexLayer):
+    """
+    Base class of the inference-only widely-linear layers:
+        activation(K * x + L * conj(x) + bias)
+    Both kernels are stored as a single real-valued block matrix acting on the input packed as [Re, Im]:
+        [y_r, y_i] = [x_r, x_i] * [[A, C], [B, D]] + [bias_r, bias_i]
+    The standard complex product is the particular case A = D = k_r and C = -B = k_i.
+    These layers are generated by `cvnn.inference_tools.fold_batch_normalization` when a
+        `ComplexBatchNormalization` can't be folded into a complex kernel.
+    The real equivalent is the real-valued layer acting on the packed inputs, as the block kernel does.
+    """
+
+    def __init__(self, activation=None, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+        super(ComplexWidelyLinearLayer, self).__init__(**kwargs)
+        self.my_dtype = tf.dtypes.as_dtype(dtype)
+        if not self.my_dtype.is_complex:
+            raise ValueError(f"{self.__class__.__name__} only supports complex dtypes. Received {self.my_dtype}")
+        self.activation = activations.get(activation)
+
+    def _channel_axis(self):
+        return -1
+
+    @abstractmethod
+    def _output_channels(self):
+        pass
+
+    @abstractmethod
+    def _block_kernel_shape(self, input_channel):
+        """
+        :return: Shape of the real-valued block kernel, acting on `2 * input_channel` packed channels.
+        """
+        pass
+
+    @abstractmethod
+    def _product(self, packed_inputs):
+        """
+        :param packed_inputs: Real-valued inputs with the real and imaginary parts concatenated on the channel axis.
+        :return: Real-valued outputs packed as [Re, Im] on the channel axis (without bias).
+        """
+        pass
+
+    def build(self, input_shape):
+        input_shape = tf.TensorShape(input_shape)
+        input_channel = int(input_shape[self._channel_axis()])
+        self.kernel = self.add_weight(name='kernel', shape=self._block_kernel_shape(input_channel),
+                                      initializer='zeros', dtype=self.my_dtype.real_dtype, trainable=False)
+        self.bias = self.add_weight(name='bias', shape=(2 * self._output_channels(),),
+                                    initializer='zeros', dtype=self.my_dtype.real_dtype, trainable=False)
+        self.built = True
+
+    def call(self, inputs):
+        inputs = tf.cast(inputs, self.my_dtype)
+        packed_inputs = tf.concat((tf.math.real(inputs), tf.math.imag(inputs)), axis=self._channel_axis())
+        outputs = self._product(packed_inputs)
+        outputs_r, outputs_i = tf.split(outputs, 2, axis=self._channel_axis())
+        bias_shape = [-1 if ax == self._channel_axis() % outputs.shape.rank else 1
+                      for ax in range(outputs.shape.rank)]
+        bias_r, bias_i = tf.split(self.bias, 2)
+        outputs = tf.complex(outputs_r + tf.reshape(bias_r, bias_shape), outputs_i + tf.reshape(bias_i, bias_shape))
+        return self.activation(outputs)
+
+    def get_config(self):
+        config = super(ComplexWidelyLinearLayer, self).get_config()
+        config.update({
+            'activation': activations.serialize(self.activation),
+            'dtype': self.my_dtype
+        })
+        return config
+
+
+class ComplexWidelyLinearDense(ComplexWidelyLinearLayer):
+    """
+    Widely-linear fully connected layer. Kernel of shape (2 * input_units, 2 * units).
+    """
+
+    def __init__(self, units: int, **kwargs):
+        super(ComplexWidelyLinearDense, self).__init__(**kwargs)
+        self.units = units
+
+    def _output_channels(self):
+        return self.units
+
+    def _block_kernel_shape(self, input_channel):
+        return 2 * input_channel, 2 * self.units
+
+    def _product(self, packed_inputs):
+        return tf.matmul(packed_inputs, self.kernel)
+
+    def compute_output_shape(self, input_shape):
+        return tf.TensorShape(input_shape)[:-1].concatenate([self.units])
+
+    def get_real_equivalent(self, output_multiplier=2):
+        return ComplexDense(units=int(round(self.units * output_multiplier)), activation=self.activation,
+                            dtype=self.my_dtype.real_dtype, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexWidelyLinearDense, self).get_config()
+        config.update({'units': self.units})
+        return config
+
+
+class ComplexWidelyLinearConv(ComplexWidelyLinearLayer):
+    """
+    Widely-linear convolution computed with a single real convolution.
+        Kernel of shape kernel_size + (2 * input_channels, 2 * filters).
+    Padding, strides, dilation and data format behave as in `ComplexConv`. Only `groups=1` is supported.
+    """
+
+    def __init__(self, rank: int, filters: int, kernel_size, strides=1, padding='valid', data_format=None,
+                 dilation_rate=1, **kwargs):
+        super(ComplexWidelyLinearConv, self).__init__(**kwargs)
+        self.rank = rank
+        self.filters = filters
+        self.kernel_size = conv_utils.normalize_tuple(kernel_size, rank, 'kernel_size')
+        self.strides = conv_utils.normalize_tuple(strides, rank, 'strides')
+        self.padding = conv_utils.normalize_padding(padding)
+        self.data_format = conv_utils.normalize_data_format(data_format)
+        self.dilation_rate = conv_utils.normalize_tuple(dilation_rate, rank, 'dilation_rate')
+        self._tf_data_format = conv_utils.convert_data_format(self.data_format, self.rank + 2)
+
+    def _channel_axis(self):
+        return 1 if self.data_format == 'channels_first' else -1
+
+    def _output_channels(self):
+        return self.filters
+
+    def _block_kernel_shape(self, input_channel):
+        return self.kernel_size + (2 * input_channel, 2 * self.filters)
+
+    def _product(self, packed_inputs):
+        if self.padding == 'causal':
+            left_pad = self.dilation_rate[0] * (self.kernel_size[0] - 1)
+            spatial_axis = 2 if self.data_format == 'channels_first' else 1
+            paddings = [[0, 0]] * (self.rank + 2)
+            paddings[spatial_axis] = [left_pad, 0]
+            packed_inputs = tf.pad(packed_inputs, paddings)
+        return tf.nn.convolution(packed_inputs, self.kernel, strides=list(self.strides),
+                                 padding='VALID' if self.padding == 'causal' else self.padding.upper(),
+                                 dilations=list(self.dilation_rate), data_format=self._tf_data_format)
+
+    def get_real_equivalent(self):
+        # The rank specific class, ComplexConv only accepts causal padding from ComplexConv1D
+        conv_class = {1: ComplexConv1D, 2: ComplexConv2D, 3: ComplexConv3D}[self.rank]
+        return conv_class(filters=self.filters, kernel_size=self.kernel_size, strides=self.strides,
+                          padding=self.padding, data_format=self.data_format, dilation_rate=self.dilation_rate,
+                          activation=self.activation, dtype=self.my_dtype.real_dtype, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexWidelyLinearConv, self).get_config()
+        config.update({
+            'rank': self.rank,
+            'filters': self.filters,
+            'kernel_size': self.kernel_size,
+            'strides': self.strides,
+            'padding': self.padding,
+            'data_format': self.data_format,
+            'dilation_rate': self.dilation_rate
+        })
+        return config
@@ -1,18 +1,64 @@
 import tensorflow as tf
 from tensorflow.keras import backend
 from tensorflow.keras.losses import Loss, categorical_crossentropy
+from cvnn.activations import act_dispatcher, SOFTMAX_REAL_LOG_PROBABILITIES
 
 
 class ComplexAverageCrossEntropy(Loss):
 
+    def __init__(self, from_logits: bool = False, **kwargs):
+        """
+        :param from_logits: If True, y_pred are the logits of a `cart_softmax` output (the output of the last layer
+            without activation). The softmax of each part and its cross-entropy are computed in a single stable op,
+            as `categorical_crossentropy(..., from_logits=True)`.
+        """
+        super(ComplexAverageCrossEntropy, self).__init__(**kwargs)
+        self.from_logits = from_logits
+
     def call(self, y_true, y_pred):
-        real_loss = categorical_crossentropy(y_true, tf.math.real(y_pred))
-        if y_pred.dtype.is_complex:
-            imag_loss = categorical_crossentropy(y_true, tf.math.imag(y_pred))
-        else:
-            imag_loss = real_loss
+        real_loss = categorical_crossentropy(y_true, tf.math.real(y_pred), from_logits=self.from_logits)
+        if not y_pred.dtype.is_complex:
+            return real_loss
+        imag_loss = categorical_crossentropy(y_true, tf.math.imag(y_pred), from_logits=self.from_logits)
         return (real_loss + imag_loss) / 2.
 
+    def get_config(self):
+        config = super(ComplexAverageCrossEntropy, self).get_config()
+        config.update({'from_logits': self.from_logits})
+        return config
+
+
+class SoftmaxRealCrossEntropy(Loss):
+    """
+    Categorical cross-entropy of the probabilities of a softmax_real activation (`softmax_real_with_abs`,
+        `softmax_real_with_avg`, ...) computed from its logits, the output of the last layer without activation.
+    It is the same loss as `categorical_crossentropy` after the activation, but the log probabilities are computed
+        directly with log_softmax (see `cvnn.activations.SOFTMAX_REAL_LOG_PROBABILITIES`) instead of computing the
+        probabilities and taking their (clipped) log, which is faster and does not saturate for confident logits.
+    """
+
+    def __init__(self, activation='softmax_real_with_abs', **kwargs):
+        """
+        :param activation: softmax_real activation (name or function) fused into the loss.
+        """
+        super(SoftmaxRealCrossEntropy, self).__init__(**kwargs)
+        activation_fun = act_dispatcher.get(activation) if isinstance(activation, str) else activation
+        if activation_fun not in SOFTMAX_REAL_LOG_PROBABILITIES:
+            raise ValueError(f"Unsuported activation {activation}, supported activations are "
+                             f"{[fun.__name__ for fun in SOFTMAX_REAL_LOG_PROBABILITIES]}")
+        self.activation = activation_fun.__name__
+        self._log_probabilities = SOFTMAX_REAL_LOG_PROBABILITIES[activation_fun]
+
+    def call(self, y_true, y_pred):
+        log_probabilities = self._log_probabilities(tf.convert_to_tensor(y_pred))
+        y_true = tf.cast(y_true, log_probabilities.dtype)
+        return -tf.reduce_sum(y_true * log_probabilities, axis=-1)
+
+    def get_config(self):
+        config = super(SoftmaxRealCrossEntropy, self).get_config()
+        config.update({'activation': self.activation})
+        return config
+
 
 class ComplexMeanSquareError(Loss):
 
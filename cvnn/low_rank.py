@@ -0,0 +1,124 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import Sequential
+from cvnn import logger
+import cvnn.layers as layers
+from cvnn.initializers import ComplexGlorotUniform, Zeros
+from typing import Type, Optional
+
+DEFAULT_ENERGY = 0.99
+
+
+def energy_rank(singular_values: np.ndarray, energy: float = DEFAULT_ENERGY) -> int:
+    """
+    :param singular_values: Singular values in descending order (as returned by np.linalg.svd)
+    :param energy: Fraction in (0, 1] of the energy (squared Frobenius norm, sum of the squared singular values)
+        to keep.
+    :return: The smallest rank r such that the r largest singular values hold at least `energy` of the energy.
+    """
+    if not 0 < energy <= 1:
+        raise ValueError(f"energy must be in (0, 1]. Received {energy}")
+    cumulative_energy = np.cumsum(np.square(singular_values))
+    if cumulative_energy[-1] == 0:      # Zero kernel
+        return 1
+    # Tolerance so energy=1 keeps the numerical rank and not all the round-off singular values
+    rank = np.searchsorted(cumulative_energy, energy * cumulative_energy[-1] * (1 - 1e-6)) + 1
+    return int(min(rank, len(singular_values)))
+
+
+def _factorize(layer, energy: float, max_rank: Optional[int] = None):
+    """
+    Truncated SVD of the (complex) kernel of the ComplexDense `layer`: kernel ~= u * v with
+        u = U_r * sqrt(S_r) and v = sqrt(S_r) * V_r^H
+    :return: Tuple (new_layer, weights) with the ComplexLowRankDense and its weights (in the order of get_weights)
+    """
+    if layer.my_dtype.is_complex:
+        kernel_r, kernel_i = [w.numpy() for w in layer._get_complex_weight_parts('w')]
+        kernel = kernel_r + 1j * kernel_i
+    else:
+        kernel = layer.w.numpy()
+    left, singular_values, right = np.linalg.svd(kernel, full_matrices=False)
+    rank = energy_rank(singular_values, energy)
+    if max_rank is not None:
+        rank = min(rank, max_rank)
+    sqrt_singular_values = np.sqrt(singular_values[:rank])
+    factors = [left[:, :rank] * sqrt_singular_values, sqrt_singular_values[:, None] * right[:rank]]
+    if layer.my_dtype.is_complex:
+        real_dtype = layer.my_dtype.real_dtype.as_numpy_dtype
+        factors = [(np.real(f).astype(real_dtype), np.imag(f).astype(real_dtype)) for f in factors]
+        if layer.use_bias:
+            factors.append(tuple(w.numpy() for w in layer._get_complex_weight_parts('b')))
+        if layer.weight_storage == 'interleaved':
+            weights = [np.stack(parts, axis=-1) for parts in factors]
+        else:
+            weights = [part for parts in factors for part in parts]
+    else:
+        weights = [f.astype(layer.my_dtype.as_numpy_dtype) for f in factors]
+        if layer.use_bias:
+            weights.append(layer.b.numpy())
+    # Initializers are not used (weights are set afterwards) and cvnn Zeros can't be deserialized
+    config = layer.get_config()
+    config.update({'rank': rank, 'kernel_initializer': ComplexGlorotUniform(), 'bias_initializer': Zeros(),
+                   'name': layer.name + "_low_rank"})
+    return layers.ComplexLowRankDense.from_config(config), weights
+
+
+def _reduces_size(low_rank_layer, input_units: int) -> bool:
+    return low_rank_layer.rank * (input_units + low_rank_layer.units) < input_units * low_rank_layer.units
+
+
+def to_low_rank_dense(layer, energy: float = DEFAULT_ENERGY, max_rank: Optional[int] = None):
+    """
+    Factorizes a trained ComplexDense into a ComplexLowRankDense with a truncated (complex) SVD of its kernel.
+    The rank is the smallest one keeping `energy` of the kernel energy, so the relative (Frobenius) error of the
+        kernel is sqrt(1 - kept energy).
+    The new layer is trainable so it can be fine-tuned to recover the accuracy lost by the truncation.
+    :param layer: Built ComplexDense
+    :param energy: Fraction in (0, 1] of the kernel energy (sum of the squared singular values) to keep.
+    :param max_rank: Optional upper bound of the rank.
+    :return: Built ComplexLowRankDense with the same activation, bias, dtype and weight storage than `layer`.
+    """
+    if type(layer) is not layers.ComplexDense:
+        raise ValueError(f"Unsuported layer {layer.__class__.__name__}, supported layers are ComplexDense")
+    new_layer, weights = _factorize(layer, energy, max_rank)
+    input_units = weights[0].shape[0]
+    if not _reduces_size(new_layer, input_units):
+        logger.warning(f"{layer.name} needs rank {new_layer.rank} to keep {energy} of the energy, "
+                       f"the low rank layer is not smaller than the original one")
+    new_layer(tf.zeros((1, input_units), dtype=layer.my_dtype))    # Build
+    new_layer.set_weights(weights)
+    return new_layer
+
+
+def low_rank_model(model: Type[Sequential], energy: float = DEFAULT_ENERGY, max_rank: Optional[int] = None,
+                   name: Optional[str] = None):
+    """
+    Creates a copy of `model` where each ComplexDense is replaced by the ComplexLowRankDense of
+        `to_low_rank_dense` if it has less weights than the original layer.
+    Other layers are shared with the original model.
+    :param model: Sequential model
+    :param energy: Fraction in (0, 1] of the energy of each kernel to keep.
+    :param max_rank: Optional upper bound of the rank.
+    :param name: Name of the new model. Default `{model.name}_low_rank`
+    :return: Sequential model
+    """
+    assert isinstance(model, Sequential), "Sorry, only sequential models supported for the moment"
+    new_layers = []
+    for layer in model.layers:
+        if type(layer) is layers.ComplexDense:
+            new_layer, weights = _factorize(layer, energy, max_rank)
+            input_units = weights[0].shape[0]
+            if _reduces_size(new_layer, input_units):
+                logger.debug(f"{layer.name} factorized with rank {new_layer.rank}")
+                new_layers.append((new_layer, weights))
+                continue
+            logger.info(f"{layer.name} needs rank {new_layer.rank} to keep {energy} of the energy, it is not reduced")
+        new_layers.append((layer, None))
+    if name is None:
+        name = f"{model.name}_low_rank"
+    new_model = Sequential([layers.ComplexInput(input_shape=model.input_shape[1:], dtype=model.input.dtype)] +
+                           [new_layer for new_layer, _ in new_layers], name=name)
+    for new_layer, weights in new_layers:
+        if weights is not None:
+            new_layer.set_weights(weights)
+    return new_model
@@ -0,0 +1,186 @@
+import numpy as np
+import tensorflow as tf
+from time import perf_counter
+from tensorflow.keras import Sequential
+from cvnn import logger
+import cvnn.layers as layers
+from cvnn.layers.quantized import QUANTIZED_MAX
+from typing import Type, Optional, Dict, Tuple
+
+CALIBRATION_BATCH_SIZE = 32
+REPORT_REPETITIONS = 20
+
+
+def quantize_per_channel(kernel_r: np.ndarray, kernel_i: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Symmetric int8 quantization of a complex kernel with one scale per output channel (last axis).
+    The scale is shared by the real and imaginary parts so the quantized kernel is a complex number times the scale:
+        kernel_r + j kernel_i ~= scale * (q_r + j q_i)
+    :return: Tuple (q_r, q_i, scale). q_r and q_i are int8 arrays of the kernel shape and scale has shape (channels,)
+    """
+    max_abs = np.max(np.maximum(np.abs(kernel_r), np.abs(kernel_i)).reshape((-1, kernel_r.shape[-1])), axis=0)
+    scale = np.where(max_abs > 0, max_abs / QUANTIZED_MAX, 1.).astype(kernel_r.dtype)
+    q_r, q_i = [np.clip(np.round(part / scale), -QUANTIZED_MAX, QUANTIZED_MAX).astype(np.int8)
+                for part in (kernel_r, kernel_i)]
+    return q_r, q_i, scale
+
+
+def _is_quantizable(layer) -> bool:
+    if type(layer) is layers.ComplexDense:
+        return layer.my_dtype.is_complex
+    if type(layer) is layers.ComplexConv2D:
+        if not layer.my_dtype.is_complex:
+            return False
+        if layer.groups != 1 or layer.data_format != 'channels_last':
+            logger.warning(f"{layer.name} uses groups={layer.groups} and {layer.data_format}, "
+                           f"only groups=1 and channels_last are quantized. It will stay float")
+            return False
+        return True
+    return False
+
+
+def _batches(representative_data, batch_size: int):
+    """
+    Yields the inputs of `representative_data`: a tf.data.Dataset (of inputs or (inputs, labels) tuples) or an array.
+    """
+    if isinstance(representative_data, tf.data.Dataset):
+        for batch in representative_data:
+            yield batch[0] if isinstance(batch, tuple) else batch
+    else:
+        for start in range(0, len(representative_data), batch_size):
+            yield representative_data[start:start + batch_size]
+
+
+def calibrate(model: Type[Sequential], representative_data,
+              batch_size: int = CALIBRATION_BATCH_SIZE) -> Dict[str, Tuple[float, float]]:
+    """
+    Runs `representative_data` through `model` (inference mode) and records the range (maximum absolute value) of the
+        real and imaginary parts of the inputs of each layer that `quantize_model` quantizes.
+    :param model: Sequential model
+    :param representative_data: Array or tf.data.Dataset with samples of the model inputs
+    :param batch_size: Batch size used if `representative_data` is an array
+    :return: Dictionary {layer name: (max |Re(x)|, max |Im(x)|)}
+    """
+    assert isinstance(model, Sequential), "Sorry, only sequential models supported for the moment"
+    ranges = {layer.name: np.zeros(2) for layer in model.layers if _is_quantizable(layer)}
+    for inputs in _batches(representative_data, batch_size):
+        outputs = tf.convert_to_tensor(inputs)
+        for layer in model.layers:
+            if layer.name in ranges:
+                outputs = tf.cast(outputs, layer.my_dtype)
+                ranges[layer.name] = np.maximum(ranges[layer.name],
+                                                [np.max(np.abs(tf.math.real(outputs))),
+                                                 np.max(np.abs(tf.math.imag(outputs)))])
+            outputs = layer(outputs, training=False)
+    return {name: tuple(float(r) for r in layer_range) for name, layer_range in ranges.items()}
+
+
+def _quantize_layer(layer, input_range):
+    """
+    :return: Tuple (quantized_layer, weights)
+    """
+    kernel_r, kernel_i = [w.numpy() for w in layer._get_complex_weight_parts(
+        'w' if isinstance(layer, layers.ComplexDense) else 'kernel')]
+    q_r, q_i, kernel_scale = quantize_per_channel(kernel_r, kernel_i)
+    if layer.use_bias:
+        bias = np.stack([w.numpy() for w in layer._get_complex_weight_parts(
+            'b' if isinstance(layer, layers.ComplexDense) else 'bias')], axis=-1)
+    else:
+        bias = np.zeros(kernel_r.shape[-1:] + (2,), dtype=kernel_r.dtype)
+    input_scale = np.array([r / QUANTIZED_MAX if r > 0 else 1. for r in input_range], dtype=kernel_r.dtype)
+    weights = [np.concatenate((q_r, q_i), axis=-1), kernel_scale, input_scale, bias]
+    kwargs = {'activation': layer.activation, 'dtype': layer.my_dtype, 'name': layer.name + "_quantized",
+              'float_config': layer.get_config()}
+    if isinstance(layer, layers.ComplexDense):
+        return layers.ComplexQuantizedDense(units=layer.units, **kwargs), weights
+    return layers.ComplexQuantizedConv2D(filters=layer.filters, kernel_size=layer.kernel_size, strides=layer.strides,
+                                         padding=layer.padding, dilation_rate=layer.dilation_rate,
+                                         **kwargs), weights
+
+
+def quantize_model(model: Type[Sequential], representative_data, batch_size: int = CALIBRATION_BATCH_SIZE,
+                   name: Optional[str] = None):
+    """
+    Post-training int8 quantization.
+    Creates an inference copy of `model` where each complex ComplexDense and ComplexConv2D is replaced by a
+        ComplexQuantizedDense or ComplexQuantizedConv2D:
+        - Kernels are quantized to int8 with one scale per output channel (see `quantize_per_channel`),
+            4 times smaller than the float32 real and imaginary parts.
+        - The input scales of the real and imaginary parts are calibrated with `representative_data`
+            (see `calibrate`).
+        - Products accumulate in int32 and are requantized to float, where bias and activation are applied.
+    Other layers are shared with the original model.
+    It can be applied after `cvnn.inference_tools.fold_batch_normalization`.
+    :param model: Sequential model
+    :param representative_data: Array or tf.data.Dataset with samples of the model inputs, used for calibration.
+    :param batch_size: Calibration batch size if `representative_data` is an array
+    :param name: Name of the new model. Default `{model.name}_quantized`
+    :return: Sequential model
+    """
+    input_ranges = calibrate(model, representative_data, batch_size=batch_size)
+    new_layers = []
+    for layer in model.layers:
+        if layer.name in input_ranges:
+            new_layers.append(_quantize_layer(layer, input_ranges[layer.name]))
+            logger.debug(f"{layer.name} quantized with input range {input_ranges[layer.name]}")
+        else:
+            new_layers.append((layer, None))
+    if name is None:
+        name = f"{model.name}_quantized"
+    quantized_model = Sequential([layers.ComplexInput(input_shape=model.input_shape[1:], dtype=model.input.dtype)] +
+                                 [new_layer for new_layer, _ in new_layers], name=name)
+    for new_layer, weights in new_layers:
+        if weights is not None:
+            new_layer.set_weights(weights)
+    return quantized_model
+
+
+def _time_inference(model, inputs, repetitions: int) -> float:
+    predict = tf.function(lambda x: model(x, training=False))
+    predict(inputs)     # Trace and warm up
+    start_time = perf_counter()
+    for _ in range(repetitions):
+        outputs = predict(inputs)
+    outputs.numpy()
+    return (perf_counter() - start_time) / repetitions
+
+
+def _accuracy(outputs: np.ndarray, labels) -> float:
+    labels = np.asarray(labels)
+    if labels.ndim == outputs.ndim:     # One hot encoded
+        labels = np.argmax(labels, axis=-1)
+    return float(np.mean(np.argmax(np.abs(outputs), axis=-1) == labels))
+
+
+def quantization_report(model: Type[Sequential], quantized_model: Type[Sequential], x, y=None,
+                        batch_size: int = CALIBRATION_BATCH_SIZE, repetitions: int = REPORT_REPETITIONS) -> dict:
+    """
+    Compares `quantized_model` against the float `model`.
+    :param x: Evaluation inputs
+    :param y: Optional labels (integers or one hot encoded) to compute the accuracy of the argmax of the outputs
+        (of their absolute value if complex)
+    :param batch_size: Batch size of the latency measurements
+    :param repetitions: Number of timed inference calls of a batch
+    :return: Dictionary with:
+        - 'float' and 'quantized': Dictionaries with the 'weights_bytes' of the model, the 'latency' (seconds per
+            batch of `batch_size`) and the 'accuracy' (only if `y` is given).
+        - 'max_abs_error': Maximum absolute difference of the outputs.
+        - 'sqnr_db': Signal to quantization noise ratio of the outputs in dB.
+    """
+    report = {}
+    outputs = {}
+    for key, m in (('float', model), ('quantized', quantized_model)):
+        outputs[key] = m.predict(x, batch_size=batch_size, verbose=0)
+        report[key] = {
+            'weights_bytes': int(sum(w.nbytes for w in m.get_weights())),
+            'latency': _time_inference(m, x[:batch_size], repetitions)
+        }
+        if y is not None:
+            report[key]['accuracy'] = _accuracy(outputs[key], y)
+    error = outputs['quantized'] - outputs['float']
+    report['max_abs_error'] = float(np.max(np.abs(error)))
+    noise_power = np.sum(np.abs(error) ** 2)
+    report['sqnr_db'] = float(10 * np.log10(np.sum(np.abs(outputs['float']) ** 2) / noise_power)) \
+        if noise_power > 0 else float('inf')
+    logger.info(f"Quantization report of {quantized_model.name}: {report}")
+    return report
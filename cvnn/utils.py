@@ -5,6 +5,7 @@ from pdb import set_trace
 import sys
 from tensorflow.python.keras import Model
 import tensorflow as tf     # TODO: Imported only for dtype
+from tensorflow.python.ops import control_flow_util
 import os
 from os.path import join
 from scipy.io import loadmat
@@ -168,6 +169,52 @@ def polar2cart(rho, angle):
     return rho * np.exp(1j*angle)
 
 
+def in_xla_context() -> bool:
+    return control_flow_util.GraphOrParentsInXlaContext(tf.compat.v1.get_default_graph())
+
+
+def view_as_real(z):
+    """
+    Reinterprets a complex tensor as its interleaved real and imaginary parts without copying the data.
+        complex64 (complex128) of shape (...) -> float32 (float64) of shape (..., 2) with [..., 0] the real part and
+        [..., 1] the imaginary part.
+    Cartesian (element-wise) operations can then be done with a single real-valued op instead of one per part.
+    Inside an XLA compiled function (which has no complex bitcast) the parts are stacked instead and XLA fuses them.
+    :param z: Complex tensor
+    :return: Real tensor with an extra trailing dimension of size 2
+    """
+    if in_xla_context():
+        return tf.stack((tf.math.real(z), tf.math.imag(z)), axis=-1)
+    return _view_as_real(tf.convert_to_tensor(z))
+
+
+@tf.custom_gradient
+def _view_as_real(z):
+    def grad(upstream):     # tf.bitcast has no registered gradient
+        return tf.bitcast(upstream, z.dtype)
+    return tf.bitcast(z, z.dtype.real_dtype), grad
+
+
+def view_as_complex(x):
+    """
+    Inverse of `view_as_real`: reinterprets a float32 (float64) tensor of shape (..., 2) as complex64 (complex128)
+        of shape (...) without copying the data.
+    :param x: Real tensor (or variable) whose last dimension has size 2
+    :return: Complex tensor
+    """
+    if in_xla_context():
+        return tf.complex(x[..., 0], x[..., 1])
+    # Variables are read outside the custom gradient (distributed variables are not converted automatically)
+    return _view_as_complex(tf.convert_to_tensor(x))
+
+
+@tf.custom_gradient
+def _view_as_complex(x):
+    def grad(upstream):
+        return tf.bitcast(upstream, x.dtype)
+    return tf.bitcast(x, tf.complex64 if x.dtype == tf.float32 else tf.complex128), grad
+
+
 def randomize(x, y):
     """
     Randomizes the order of data samples and their corresponding labels
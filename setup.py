@@ -2,7 +2,7 @@ from setuptools import setup
 import versioneer
 
 requirements = [
-    'tensorflow>=2.0', 'tensorflow-probability',    # tfp for the Batch Norm (covariance)
+    'tensorflow>=2.0',
     'numpy', 'six', 'packaging',
     'pandas', 'scipy',                   # Data
     'colorlog', 'openpyxl',              # Logging
@@ -37,7 +37,8 @@ setup(
     long_description=open('README.md').read(),
     extras_require={
         'plotter': ['matplotlib', 'seaborn', 'plotly', 'tikzplotlib'],
-        'full': ['prettytable', 'matplotlib', 'seaborn', 'plotly', 'tikzplotlib']
+        'full': ['tensorflow-probability',          # tfp for the reference Batch Norm covariance methods
+                 'prettytable', 'matplotlib', 'seaborn', 'plotly', 'tikzplotlib']
     }
 
 )
@@ -1,7 +1,130 @@
+import numpy as np
 import tensorflow as tf
 from cvnn import layers, activations
 
+
+def _cartesian_reference(z, fun):
+    return tf.complex(fun(tf.math.real(z)), fun(tf.math.imag(z)))
+
+
+def test_cartesian_activations():
+    z = tf.complex(tf.random.normal((4, 3, 5)), tf.random.normal((4, 3, 5)))
+    cases = [
+        (activations.cart_sigmoid, tf.keras.activations.sigmoid),
+        (activations.cart_elu, tf.keras.activations.elu),
+        (activations.cart_exponential, tf.keras.activations.exponential),
+        (activations.cart_hard_sigmoid, lambda t: tf.clip_by_value(0.2 * t + 0.5, 0., 1.)),
+        (activations.cart_relu, tf.keras.activations.relu),
+        (lambda t: activations.cart_relu(t, alpha=0.1, max_value=1.), lambda t: tf.keras.activations.relu(t, 0.1, 1.)),
+        (activations.cart_leaky_relu, lambda t: tf.nn.leaky_relu(t, 0.2)),
+        (activations.cart_selu, tf.keras.activations.selu),
+        (activations.cart_softplus, tf.keras.activations.softplus),
+        (activations.cart_softsign, tf.keras.activations.softsign),
+        (activations.cart_tanh, tf.keras.activations.tanh),
+        (activations.cart_softmax, tf.keras.activations.softmax),
+        (lambda t: activations.cart_softmax(t, axis=1), lambda t: tf.keras.activations.softmax(t, axis=1)),
+        (lambda t: activations.cart_softmax(t, axis=-2), lambda t: tf.keras.activations.softmax(t, axis=-2)),
+    ]
+    for activation, real_activation in cases:
+        with tf.GradientTape(persistent=True) as tape:
+            tape.watch(z)
+            result = activation(z)
+            expected = _cartesian_reference(z, real_activation)
+            loss = tf.reduce_sum(tf.math.real(result) * tf.math.imag(result))
+            expected_loss = tf.reduce_sum(tf.math.real(expected) * tf.math.imag(expected))
+        assert result.dtype == z.dtype
+        assert np.allclose(result, expected)
+        assert np.allclose(tape.gradient(loss, z), tape.gradient(expected_loss, z))
+        # Real inputs
+        assert np.allclose(activation(tf.math.real(z)), real_activation(tf.math.real(z)))
+    z = tf.cast(z, tf.complex128)
+    assert np.allclose(activations.cart_tanh(z), _cartesian_reference(z, tf.math.tanh))
+
+
+def _polar_reference(z, amp_fun):
+    amp, pha = amp_fun(tf.math.abs(z)), tf.math.angle(z)
+    return tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha))
+
+
+def _phasor_reference(phase):
+    return tf.math.exp(tf.complex(tf.zeros_like(phase), phase))
+
+
+def test_polar_activations():
+    z = tf.complex(tf.random.normal((4, 3, 5)), tf.random.normal((4, 3, 5)))
+    z = tf.tensor_scatter_nd_update(z, [[0, 0, 0], [1, 2, 3]], [0., 2.])     # Zero and positive real values
+    sector = lambda k, offset: (tf.math.floor(tf.math.angle(z) * k / (2 * np.pi)) + offset) * 2 * np.pi / k
+    cases = [
+        (activations.pol_tanh, _polar_reference(z, tf.math.tanh)),
+        (activations.pol_sigmoid, _polar_reference(z, tf.math.sigmoid)),
+        (activations.pol_selu, _polar_reference(z, tf.keras.activations.selu)),
+        (activations.complex_cardioid, tf.cast(1 + tf.math.cos(tf.math.angle(z)), z.dtype) * z / 2.),
+        (activations.complex_signum, _phasor_reference(tf.math.angle(z))),
+        (activations.mvn_activation, _phasor_reference(tf.math.angle(z))),
+        (lambda t: activations.complex_signum(t, k=6), _phasor_reference(sector(6, 0.))),
+        (lambda t: activations.mvn_activation(t, k=5), _phasor_reference(sector(5, 0.5))),
+    ]
+    for activation, expected in cases:
+        with tf.GradientTape() as tape:
+            tape.watch(z)
+            result = activation(z)
+            loss = tf.reduce_sum(tf.math.real(result) * tf.math.imag(result))
+        assert result.dtype == z.dtype
+        assert np.allclose(result, expected, atol=1e-6)
+        gradient = tape.gradient(loss, z)
+        assert gradient is None or np.all(np.isfinite(gradient))     # Including at z = 0
+    # Real inputs
+    x = tf.constant([-2., 0., 3.])
+    assert np.allclose(activations.pol_tanh(x), [-np.tanh(2.), 0., np.tanh(3.)])
+    assert np.allclose(activations.complex_cardioid(x), [0., 0., 3.])
+    assert np.allclose(activations.complex_cardioid(tf.cast(z, tf.complex128)),
+                       tf.cast(1 + tf.math.cos(tf.math.angle(z)), z.dtype) * z / 2., atol=1e-6)
+
+
+def test_custom_gradients():
+    """
+    Activations with a custom gradient against the autodiff gradient of their direct (op by op) definition.
+    """
+    z = tf.complex(tf.random.normal((4, 3, 5)), tf.random.normal((4, 3, 5)))
+    cases = [
+        (activations.modrelu, lambda t: tf.cast(tf.nn.relu(tf.math.abs(t) + 1.), t.dtype) * t /
+         tf.cast(tf.math.abs(t) + 1e-3, t.dtype)),
+        (lambda t: activations.modrelu(t, b=-0.8, c=0.1), lambda t: tf.cast(tf.nn.relu(tf.math.abs(t) - 0.8), t.dtype) *
+         t / tf.cast(tf.math.abs(t) + 0.1, t.dtype)),
+        (activations.georgiou_cdbp, lambda t: t / tf.cast(1e-3 + tf.math.abs(t), t.dtype)),
+        (activations.zrelu, lambda t: tf.complex(
+            tf.nn.relu(tf.math.imag(t)) * tf.nn.relu(tf.math.real(t)) / (tf.nn.relu(tf.math.imag(t)) + 1e-7),
+            tf.nn.relu(tf.math.imag(t)) * tf.nn.relu(tf.math.real(t)) / (tf.nn.relu(tf.math.real(t)) + 1e-7))),
+        (activations.pol_tanh, lambda t: _polar_reference(t, tf.math.tanh)),
+        (activations.pol_sigmoid, lambda t: _polar_reference(t, tf.math.sigmoid)),
+        (activations.pol_selu, lambda t: _polar_reference(t, tf.keras.activations.selu)),
+        (lambda t: activations.cart_elu(t, alpha=0.5), lambda t: _cartesian_reference(
+            t, lambda x: tf.keras.activations.elu(x, 0.5))),
+        (lambda t: activations.cart_leaky_relu(t, alpha=0.), lambda t: _cartesian_reference(t, tf.nn.relu)),
+    ]
+    for activation, reference in cases:
+        for inputs in [z, tf.cast(z, tf.complex128), tf.math.real(z)]:
+            with tf.GradientTape(persistent=True) as tape:
+                tape.watch(inputs)
+                result = activation(inputs)
+                expected = reference(inputs)
+                loss, expected_loss = [tf.reduce_sum(tf.math.real(w) * tf.math.imag(w) + 0.3 * tf.math.real(w) -
+                                                     tf.math.imag(w) ** 2) for w in (result, expected)]
+            assert np.allclose(result, expected, atol=1e-5)
+            assert np.allclose(tape.gradient(loss, inputs), tape.gradient(expected_loss, inputs), rtol=1e-4,
+                               atol=1e-4)
+    zeros = tf.zeros((3,), dtype=tf.complex64)
+    for activation in [activations.modrelu, activations.georgiou_cdbp, activations.zrelu]:
+        with tf.GradientTape() as tape:
+            tape.watch(zeros)
+            loss = tf.reduce_sum(tf.math.real(activation(zeros)))
+        assert np.all(np.isfinite(tape.gradient(loss, zeros)))
+
+
 if __name__ == '__main__':
+    test_cartesian_activations()
+    test_polar_activations()
+    test_custom_gradients()
     for activation in activations.act_dispatcher.keys():
         print(activation)
         model = tf.keras.Sequential([
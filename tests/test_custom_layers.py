@@ -1,8 +1,9 @@
 import numpy as np
 from cvnn.layers import ComplexDense, ComplexFlatten, ComplexInput, ComplexConv2D, ComplexMaxPooling2D, \
     ComplexAvgPooling2D, ComplexConv2DTranspose, ComplexUnPooling2D, ComplexMaxPooling2DWithArgmax, \
-    ComplexUpSampling2D, ComplexBatchNormalization, ComplexAvgPooling1D
+    ComplexUpSampling2D, ComplexBatchNormalization, ComplexAvgPooling1D, ComplexConv1D, ComplexConv3D
 import cvnn.layers as complex_layers
+from cvnn.layers.pooling import UNPOOLING_COLLISIONS
 from tensorflow.keras.models import Sequential
 import tensorflow as tf
 import tensorflow_datasets as tfds
@@ -56,6 +57,89 @@ def dense_example():
     res = model(img.astype(np.complex64))
 
 
+@tf.autograph.experimental.do_not_convert
+def dense_block_real():
+    x = tf.complex(tf.random.normal((8, 3, 16)), tf.random.normal((8, 3, 16)))
+    c_dense = ComplexDense(units=10)
+    block_dense = ComplexDense(units=10, execution='block_real')
+    c_dense(x)
+    block_dense(x)
+    block_dense.set_weights([w + 0.1 for w in c_dense.get_weights()])
+    c_dense.set_weights(block_dense.get_weights())
+    with tf.GradientTape(persistent=True) as tape:
+        c_out = c_dense(x)
+        block_out = block_dense(x)
+        c_loss = tf.reduce_sum(tf.math.abs(c_out) ** 2)
+        block_loss = tf.reduce_sum(tf.math.abs(block_out) ** 2)
+    assert block_out.dtype == tf.complex64
+    assert np.allclose(c_out.numpy(), block_out.numpy(), atol=1e-4)
+    c_grads = tape.gradient(c_loss, c_dense.trainable_variables)
+    block_grads = tape.gradient(block_loss, block_dense.trainable_variables)
+    for c_grad, block_grad in zip(c_grads, block_grads):
+        assert np.allclose(c_grad.numpy(), block_grad.numpy(), rtol=1e-4, atol=1e-3)
+
+
+@tf.autograph.experimental.do_not_convert
+def low_rank_dense():
+    x = tf.complex(tf.random.normal((8, 3, 16)), tf.random.normal((8, 3, 16)))
+    for kwargs in [{}, {'execution': 'block_real'}, {'weight_storage': 'interleaved'}]:
+        low_rank = complex_layers.ComplexLowRankDense(units=10, rank=3, bias_initializer='ones', **kwargs)
+        out = low_rank(x)
+        assert out.shape == (8, 3, 10) and out.dtype == tf.complex64
+        assert sum(int(np.prod(w.shape)) for w in low_rank.trainable_weights) == 2 * (3 * (16 + 10) + 10)
+        kernel = low_rank._get_complex_weight('u') @ low_rank._get_complex_weight('v')
+        assert np.linalg.matrix_rank(kernel.numpy()) == 3
+        dense = ComplexDense(units=10, **kwargs)
+        dense(x)
+        dense.set_weights([np.stack((np.real(kernel), np.imag(kernel)), axis=-1), np.ones((10, 2))]
+                          if kwargs.get('weight_storage') == 'interleaved' else
+                          [np.real(kernel), np.imag(kernel), np.ones(10), np.ones(10)])
+        assert np.allclose(out, dense(x), atol=1e-5)
+        assert complex_layers.ComplexLowRankDense.from_config(low_rank.get_config()).rank == 3
+    real_layer = low_rank.get_real_equivalent()
+    real_out = real_layer(tf.math.real(x))
+    assert real_out.shape == (8, 3, 20) and real_out.dtype == tf.float32
+    assert [w.shape for w in real_layer.trainable_weights] == [(16, 3), (3, 20), (20,)]
+
+
+@tf.autograph.experimental.do_not_convert
+def fused_epilogue():
+    x = tf.complex(tf.random.normal((8, 3, 16)), tf.random.normal((8, 3, 16)))
+    images = tf.complex(tf.random.normal((4, 9, 9, 3)), tf.random.normal((4, 9, 9, 3)))
+    for activation in ['cart_relu', 'cart_sigmoid', 'modrelu']:     # modrelu is applied to the complex output
+        for weight_storage in ['split', 'interleaved']:
+            for get_layer, inputs in [
+                (lambda **kwargs: ComplexDense(10, **kwargs), x),
+                (lambda **kwargs: complex_layers.ComplexLowRankDense(10, 3, **kwargs), x),
+                (lambda **kwargs: ComplexConv2D(5, 3, strides=2, padding='same', **kwargs), images)
+            ]:
+                layer = get_layer(activation=activation, weight_storage=weight_storage)
+                fused = get_layer(activation=activation, weight_storage=weight_storage, fused_epilogue=True)
+                layer(inputs)
+                fused(inputs)
+                fused.set_weights([w + 0.1 for w in layer.get_weights()])
+                layer.set_weights(fused.get_weights())
+                with tf.GradientTape(persistent=True) as tape:
+                    tape.watch(inputs)
+                    out = layer(inputs)
+                    fused_out = fused(inputs)
+                    loss = tf.reduce_sum(tf.math.abs(out) ** 2)
+                    fused_loss = tf.reduce_sum(tf.math.abs(fused_out) ** 2)
+                assert fused_out.shape == out.shape and fused_out.dtype == tf.complex64
+                assert np.allclose(out.numpy(), fused_out.numpy(), atol=1e-4)
+                grads = tape.gradient(loss, [inputs] + layer.trainable_variables)
+                fused_grads = tape.gradient(fused_loss, [inputs] + fused.trainable_variables)
+                for grad, fused_grad in zip(grads, fused_grads):
+                    assert np.allclose(grad.numpy(), fused_grad.numpy(), rtol=1e-4, atol=1e-3)
+    assert fused.get_config()['fused_epilogue']
+    for kwargs in [{'groups': 3}, {'data_format': 'channels_first'}, {'algorithm': 'fft'}]:
+        try:
+            ComplexConv2D(6, 3, fused_epilogue=True, **kwargs)
+            assert False, f"fused_epilogue with {kwargs} should raise"
+        except ValueError:
+            pass
+
+
 @tf.autograph.experimental.do_not_convert
 def serial_layers():
     model = Sequential()
@@ -211,11 +295,18 @@ def complex_max_pool_2d(test_unpool=True):
     ])
     assert np.all(res.numpy() == res2.numpy())
     assert (res.numpy() == expected_res.astype(np.complex64)).all()
+    for removed in (max_pool_2.get_max_index, lambda: max_pool_2.argmax):
+        try:
+            removed()
+            assert False, "The argmax is no longer stored"
+        except AttributeError as error:
+            assert "ComplexMaxPooling2DWithArgmax" in str(error)
     if test_unpool:
         max_unpooling = ComplexUnPooling2D(img.shape[1:])
         unpooled = max_unpooling([res, argmax])
+        # Overlapping windows select the same index twice, the value is kept (not added)
         expected_unpooled = np.array([[[0. + 0.j, 0. + 0.j, 0. + 0.j],
-                                       [0. + 0.j, 4. + 14.j, 4. + 18.j],
+                                       [0. + 0.j, 2. + 7.j, 2. + 9.j],
                                        [0. + 0.j, 0. + 0.j, 0. + 0.j]],
                                       [[0. + 0.j, 7. + 4.j, 0. + 0.j],
                                        [0. + 0.j, 0. + 0.j, 9. + 2.j],
@@ -231,6 +322,22 @@ def complex_max_pool_2d(test_unpool=True):
     assert np.all(max_pool_2d(x) == complex_max_pool_2d(x))
 
 
+@tf.autograph.experimental.do_not_convert
+def complex_max_pool_2d_magnitude():
+    x = tf.complex(tf.random.normal((4, 9, 8, 3)), tf.random.normal((4, 9, 8, 3)))
+    for kwargs in [{}, {'strides': 1}, {'pool_size': 3, 'strides': 2, 'padding': 'same'}]:
+        layer = ComplexMaxPooling2DWithArgmax(**kwargs)
+        res, argmax = tf.function(layer)(x)
+        # Reference: absolute value ranking and gather from the flattened batch
+        ref_abs, ref_argmax = tf.nn.max_pool_with_argmax(tf.math.abs(x), ksize=layer.pool_size,
+                                                         strides=layer.strides, padding=layer.padding.upper(),
+                                                         include_batch_in_index=True)
+        assert np.all(argmax.numpy() == ref_argmax.numpy())
+        assert np.all(res.numpy() == tf.reshape(tf.gather(tf.reshape(x, [-1]), ref_argmax), ref_abs.shape).numpy())
+        assert np.all(ComplexMaxPooling2D(**kwargs)(x).numpy() == res.numpy())
+        assert not hasattr(layer, 'argmax')
+
+
 def new_max_unpooling_2d_test():
     img = get_img()
     new_imag = tf.stack((img.reshape((2, 3, 3)), img.reshape((2, 3, 3))), axis=-1)
@@ -240,6 +347,55 @@ def new_max_unpooling_2d_test():
     unpooled = max_unpooling([res, argmax])
 
 
+@tf.autograph.experimental.do_not_convert
+def complex_unpooling():
+    def reference(values, indices, size, collision):
+        output = np.zeros(size, dtype=values.dtype)
+        written = np.zeros(size, dtype=bool)
+        for value, index in zip(values.flatten(), indices.flatten()):
+            if collision == 'last_write' or not written[index] or np.abs(value) > np.abs(output[index]):
+                output[index] = value
+            written[index] = True
+        return output
+    # Without collisions it matches the previous scatter_nd implementation
+    x = tf.complex(tf.random.normal((4, 8, 6, 3)), tf.random.normal((4, 8, 6, 3)))
+    pooled, argmax = ComplexMaxPooling2DWithArgmax()(x)
+    expected = tf.reshape(tf.scatter_nd(tf.reshape(argmax, [-1, 1]), tf.reshape(pooled, [-1]), [tf.size(x)]), x.shape)
+    for unpool in [ComplexUnPooling2D(x.shape[1:]), ComplexUnPooling2D(upsampling_factor=2),
+                   ComplexUnPooling2D(upsampling_factor=2, collision='max_magnitude')]:
+        assert np.all(unpool([pooled, argmax]).numpy() == expected.numpy())
+    unpool = tf.function(ComplexUnPooling2D(upsampling_factor=2),
+                         input_signature=[[tf.TensorSpec((None, None, None, 3), tf.complex64),
+                                           tf.TensorSpec((None, None, None, 3), tf.int64)]])
+    assert np.all(unpool([pooled, argmax]).numpy() == expected.numpy())
+    # Overlapping windows with values that differ from the pooled ones (as the decoder features)
+    _, argmax = ComplexMaxPooling2DWithArgmax(pool_size=3, strides=1)(x)
+    values = tf.complex(tf.random.normal(argmax.shape), tf.random.normal(argmax.shape))
+    for collision in UNPOOLING_COLLISIONS:
+        unpooled = ComplexUnPooling2D(x.shape[1:], collision=collision)([values, argmax])
+        expected = reference(values.numpy(), argmax.numpy(), np.prod(x.shape), collision).reshape(x.shape)
+        assert np.all(unpooled.numpy() == expected)
+    # 1D and 3D indices flattened for each batch element
+    for input_shape, output_shape in [((3, 5, 2), (10, 2)), ((2, 3, 2, 4, 2), (6, 4, 8, 2))]:
+        values = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        indices = np.random.randint(np.prod(output_shape), size=input_shape)
+        for collision in UNPOOLING_COLLISIONS:
+            unpooled = ComplexUnPooling2D(output_shape, collision=collision,
+                                          include_batch_in_index=False)([values, tf.constant(indices)])
+            for batch in range(input_shape[0]):
+                expected = reference(values[batch].numpy(), indices[batch], np.prod(output_shape), collision)
+                assert np.all(unpooled[batch].numpy() == expected.reshape(output_shape))
+    unpooled = ComplexUnPooling2D(upsampling_factor=2, data_format='channels_first',
+                                  include_batch_in_index=False)([values, tf.constant(indices)])
+    assert unpooled.shape == (2, 3, 4, 8, 4)
+    # Real dtype
+    real_values = tf.math.real(values)
+    unpooled = ComplexUnPooling2D((6, 4, 8, 2), collision='max_magnitude', dtype=np.float32,
+                                  include_batch_in_index=False)([real_values, tf.constant(indices)])
+    expected = reference(real_values[0].numpy(), indices[0], 6 * 4 * 8 * 2, 'max_magnitude')
+    assert np.all(unpooled[0].numpy() == expected.reshape((6, 4, 8, 2)))
+
+
 @tf.autograph.experimental.do_not_convert
 def complex_avg_pool():
     img = get_img()
@@ -250,6 +406,34 @@ def complex_avg_pool():
     assert (res.numpy() == expected_res.astype(np.complex64)).all()
 
 
+@tf.autograph.experimental.do_not_convert
+def complex_avg_pool_interleaved():
+    def reference(x, layer, pool):
+        # Previous implementation: one pooling per part (channels_last as CPU only supports NHWC average pooling)
+        perm = [0] + list(range(2, x.shape.rank)) + [1] if layer.data_format == 'channels_first' else None
+        if perm is not None:
+            x = tf.transpose(x, perm)
+        ksize, strides = layer.pool_size, layer.strides
+        output = tf.complex(pool(tf.math.real(x), ksize, strides, layer.padding.upper()),
+                            pool(tf.math.imag(x), ksize, strides, layer.padding.upper()))
+        return output if perm is None else tf.transpose(output, np.argsort(perm))
+    for layer_class, pool, shape in [(ComplexAvgPooling2D, tf.nn.avg_pool2d, (3, 9, 8, 5)),
+                                     (ComplexAvgPooling1D, tf.nn.avg_pool1d, (3, 11, 5))]:
+        x = tf.complex(tf.random.normal(shape), tf.random.normal(shape))
+        for kwargs in [{}, {'strides': 1}, {'pool_size': 3, 'strides': 2, 'padding': 'same'}]:
+            for data_format in ['channels_last', 'channels_first']:
+                layer = layer_class(data_format=data_format, **kwargs)
+                res = layer(x)
+                assert res.dtype == x.dtype and res.shape == layer.compute_output_shape(x.shape)
+                assert np.allclose(res, reference(x, layer, pool), atol=1e-6)
+                assert np.allclose(tf.function(layer)(x), res)
+        layer = layer_class(dtype=np.float32)
+        assert np.allclose(layer(tf.math.real(x)), tf.math.real(reference(x, layer, pool)))
+        # Static shape is kept inside graphs
+        inputs = complex_layers.complex_input(shape=shape[1:])
+        assert layer_class()(inputs).shape[1:] == layer_class().compute_output_shape((None,) + shape[1:])[1:]
+
+
 @tf.autograph.experimental.do_not_convert
 def complex_conv_2d_transpose():
     value = [[1, 2, 1], [2, 1, 2], [1, 1, 2]]
@@ -426,6 +610,30 @@ def upsampling_bilinear_corner_not_aligned():
     assert np.all(y_tf == y_own)
 
 
+@tf.autograph.experimental.do_not_convert
+def upsampling_stacked_channels():
+    def reference(z, layer):
+        # Previous implementation: one resize per part
+        return tf.complex(
+            tf.keras.backend.resize_images(tf.math.real(z), layer.size[0], layer.size[1], layer.data_format,
+                                           interpolation=layer.interpolation),
+            tf.keras.backend.resize_images(tf.math.imag(z), layer.size[0], layer.size[1], layer.data_format,
+                                           interpolation=layer.interpolation))
+    z = tf.complex(tf.random.normal((3, 5, 6, 4)), tf.random.normal((3, 5, 6, 4)))
+    for interpolation in ['nearest', 'bilinear']:
+        for data_format in ['channels_last', 'channels_first']:
+            for size in [2, (3, 1)]:
+                layer = ComplexUpSampling2D(size=size, interpolation=interpolation, data_format=data_format)
+                result = layer(z)
+                assert result.dtype == z.dtype and result.shape == layer.compute_output_shape(z.shape)
+                assert np.allclose(result, reference(z, layer), atol=1e-6)
+                assert np.allclose(tf.function(layer)(z), result)
+        layer = ComplexUpSampling2D(interpolation=interpolation, dtype=np.complex128)
+        assert layer(tf.cast(z, tf.complex128)).dtype == tf.complex128
+        inputs = complex_layers.complex_input(shape=(5, 6, 4))
+        assert layer(inputs).shape[1:] == (10, 12, 4)
+
+
 @tf.autograph.experimental.do_not_convert
 def upsampling():
     x = tf.convert_to_tensor([[[[1., 2.], [3., 4.]]]])
@@ -436,6 +644,159 @@ def upsampling():
     upsampling_near_neighbour()
     # test_upsampling_bilinear_corners_aligned()
     upsampling_bilinear_corner_not_aligned()
+    upsampling_stacked_channels()
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_conv_mult_methods():
+    for conv_class, input_shape in [(ComplexConv1D, (3, 20, 4)), (ComplexConv2D, (3, 12, 12, 4)),
+                                    (ComplexConv3D, (2, 6, 6, 6, 4))]:
+        x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+        standard = conv_class(5, 3, padding='same')
+        standard(x)
+        standard.kernel_i.assign(tf.random.normal(standard.kernel_i.shape))
+        standard.bias_r.assign(standard.bias_r + 1.)
+        expected = standard(x).numpy()
+        for method in ['gauss', 'stacked', 'auto']:
+            layer = conv_class(5, 3, padding='same', complex_mult=method)
+            layer(x)
+            layer.set_weights(standard.get_weights())
+            assert np.allclose(expected, layer(x).numpy(), atol=1e-4)
+        assert layer._complex_mult in {'standard', 'gauss', 'stacked'}
+    x = tf.complex(tf.random.normal((3, 4, 20)), tf.random.normal((3, 4, 20)))
+    standard = ComplexConv1D(6, 3, padding='causal', data_format='channels_first')
+    stacked = ComplexConv1D(6, 3, padding='causal', data_format='channels_first', complex_mult='stacked')
+    standard(x)
+    stacked(x)
+    stacked.set_weights(standard.get_weights())
+    assert np.allclose(standard(x).numpy(), stacked(x).numpy(), atol=1e-4)
+    x = tf.random.normal((3, 12, 12, 4))
+    standard = ComplexConv2D(5, 3, dtype=np.float32, kernel_initializer=tf.constant_initializer(0.3))
+    gauss = ComplexConv2D(5, 3, dtype=np.float32, kernel_initializer=tf.constant_initializer(0.3),
+                          complex_mult='gauss')
+    assert np.allclose(standard(x).numpy(), gauss(x).numpy(), atol=1e-4)
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_conv_2d_transpose_gauss():
+    x = tf.complex(tf.random.normal((3, 7, 9, 4)), tf.random.normal((3, 7, 9, 4)))
+    for kwargs in [{'strides': 2}, {'strides': 2, 'padding': 'same'}, {'dilation_rate': 2}]:
+        standard = ComplexConv2DTranspose(5, kernel_size=3, **kwargs)
+        gauss = ComplexConv2DTranspose(5, kernel_size=3, complex_mult='gauss', **kwargs)
+        channels_first = ComplexConv2DTranspose(5, kernel_size=3, data_format='channels_first', **kwargs)
+        standard(x)
+        gauss(x)
+        channels_first(tf.transpose(x, (0, 3, 1, 2)))
+        gauss.kernel_i.assign(tf.random.normal(gauss.kernel_i.shape))
+        for layer in (gauss, channels_first):
+            layer.kernel_r.assign(standard.kernel_r)
+        for layer in (standard, channels_first):
+            layer.kernel_i.assign(gauss.kernel_i)
+        expected = standard(x).numpy()
+        assert np.allclose(expected, gauss(x).numpy(), atol=1e-4)
+        assert np.allclose(expected, tf.transpose(channels_first(tf.transpose(x, (0, 3, 1, 2))), (0, 2, 3, 1)),
+                           atol=1e-4)
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_conv_fft():
+    for conv_class, input_shape, kernel_size, paddings in [
+            (ComplexConv1D, (3, 40, 4), 9, ['valid', 'same', 'causal']),
+            (ComplexConv2D, (2, 17, 15, 3), (5, 4), ['valid', 'same'])]:
+        for padding in paddings:
+            for kwargs in [{}, {'strides': 3}, {'dilation_rate': 2}, {'data_format': 'channels_first'}]:
+                x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+                if kwargs.get('data_format') == 'channels_first':
+                    x = tf.transpose(x, [0, len(input_shape) - 1] + list(range(1, len(input_shape) - 1)))
+                direct = conv_class(5, kernel_size, padding=padding, **kwargs)
+                fft = conv_class(5, kernel_size, padding=padding, algorithm='fft', **kwargs)
+                direct(x)
+                fft(x)
+                direct.bias_i.assign(direct.bias_i + 1.)
+                fft.set_weights(direct.get_weights())
+                expected = direct(x).numpy()
+                result = fft(x).numpy()
+                assert expected.shape == result.shape
+                assert np.allclose(expected, result, atol=1e-4)
+    x = tf.random.normal((3, 30, 4))
+    direct = ComplexConv1D(5, 7, dtype=np.float32)
+    fft = ComplexConv1D(5, 7, dtype=np.float32, algorithm='fft')
+    direct(x)
+    fft(x)
+    fft.set_weights(direct.get_weights())
+    result = fft(x)
+    assert result.dtype == tf.float32
+    assert np.allclose(direct(x).numpy(), result.numpy(), atol=1e-4)
+    assert ComplexConv2D(5, 9, algorithm='auto')._use_fft
+    assert not ComplexConv2D(5, 3, algorithm='auto')._use_fft
+
+
+@tf.autograph.experimental.do_not_convert
+def no_host_ops_in_call():
+    model = Sequential([
+        ComplexConv2D(4, 3), ComplexBatchNormalization(), ComplexFlatten(),
+        ComplexDense(8), complex_layers.ComplexDropout(0.5), ComplexDense(2)
+    ])
+    x = tf.complex(tf.random.normal((3, 6, 6, 2)), tf.random.normal((3, 6, 6, 2)))
+    model(x)
+    for training in [None, True, False]:
+        graph = tf.function(lambda inputs: model(inputs, training=training)).get_concrete_function(x).graph
+        assert not [op for op in graph.get_operations() if op.type in ('PrintV2', 'StringFormat')]
+    # Dtype mismatches are checked when tracing, the graph only contains the cast
+    layer = ComplexDense(3)
+    graph = tf.function(layer).get_concrete_function(tf.random.normal((2, 4))).graph
+    assert not [op for op in graph.get_operations() if op.type in ('PrintV2', 'StringFormat')]
+    assert layer(tf.random.normal((2, 4))).dtype == tf.complex64
+
+
+@tf.autograph.experimental.do_not_convert
+def interleaved_weight_storage():
+    def to_interleaved(weights, complex_weights):
+        pairs = [np.stack(weights[2 * i:2 * i + 2], axis=-1) for i in range(complex_weights)]
+        return pairs + weights[2 * complex_weights:]
+    x = tf.complex(tf.random.normal((4, 8, 8, 3)), tf.random.normal((4, 8, 8, 3)))
+    for get_layer, inputs, complex_weights in [
+            (lambda **kwargs: ComplexDense(5, **kwargs), x[:, 0, 0], 2),
+            (lambda **kwargs: ComplexDense(5, execution='block_real', **kwargs), x[:, 0, 0], 2),
+            (lambda **kwargs: ComplexConv2D(5, 3, padding='same', **kwargs), x, 2),
+            (lambda **kwargs: ComplexConv2D(5, 3, algorithm='fft', **kwargs), x, 2),
+            (lambda **kwargs: ComplexConv2D(6, 3, complex_mult='stacked', **kwargs), x, 2),
+            (lambda **kwargs: ComplexConv2DTranspose(5, 3, strides=2, **kwargs), x, 2),
+            (lambda **kwargs: ComplexBatchNormalization(**kwargs), x, 2)]:
+        split = get_layer()
+        interleaved = get_layer(weight_storage='interleaved')
+        split(inputs)
+        interleaved(inputs)
+        split.set_weights([np.random.randn(*w.shape).astype(w.dtype) for w in split.get_weights()])
+        interleaved.set_weights(to_interleaved(split.get_weights(), complex_weights))
+        assert len(interleaved.trainable_variables) == len(split.trainable_variables) // 2
+        assert interleaved.get_config()['weight_storage'] == 'interleaved'
+        outputs, gradients = [], []
+        for layer in (split, interleaved):
+            with tf.GradientTape() as tape:
+                outputs.append(layer(inputs, training=True))
+                loss = tf.reduce_sum(tf.abs(outputs[-1]) ** 2)
+            gradients.append([g.numpy() for g in tape.gradient(loss, layer.trainable_variables)])
+        assert np.allclose(outputs[0], outputs[1], atol=1e-4)
+        for expected, result in zip(to_interleaved(gradients[0], complex_weights), gradients[1]):
+            assert np.allclose(expected, result, rtol=1e-4, atol=1e-3)
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_regularizers():
+    x = tf.complex(tf.random.normal((4, 6, 6, 3)), tf.random.normal((4, 6, 6, 3)))
+    for get_layer, inputs in [(lambda **kwargs: ComplexDense(5, **kwargs), x[:, 0, 0]),
+                              (lambda **kwargs: ComplexConv2D(5, 3, **kwargs), x),
+                              (lambda **kwargs: ComplexConv2DTranspose(5, 3, **kwargs), x)]:
+        for weight_storage in ['split', 'interleaved']:
+            layer = get_layer(kernel_regularizer=tf.keras.regularizers.L2(0.1),
+                              bias_regularizer=tf.keras.regularizers.L1(0.2), bias_initializer='ones',
+                              weight_storage=weight_storage)
+            layer(inputs)
+            kernel = layer._get_complex_weight('w' if isinstance(layer, ComplexDense) else 'kernel')
+            # L2 of the real and imaginary parts is the squared modulus, bias is 1 + 1j
+            expected = 0.1 * np.sum(np.abs(kernel.numpy()) ** 2) + 0.2 * 2 * 5
+            assert np.allclose(tf.add_n(layer.losses), expected, rtol=1e-5)
 
 
 def check_proximity(x1, x2, name: str):
@@ -483,21 +844,76 @@ def batch_norm():
     assert check_proximity(c_bn_2.beta, c_bn.beta, "Method comparison Beta after training")
 
 
+@tf.autograph.experimental.do_not_convert
+def complex_batch_norm_whitening():
+    x_r = np.random.randn(500, 3, 4)
+    x = (x_r + 0.6j * np.random.randn(500, 3, 4) + 0.4j * x_r + 2.).astype(np.complex64)
+    c_bn = ComplexBatchNormalization(epsilon=0)
+    out = c_bn(x, training=True).numpy()
+    assert out.dtype == np.complex64
+    out = np.stack((out.real, out.imag), axis=-1).reshape((-1, 4, 2))
+    assert np.allclose(np.mean(out, axis=0), 0., atol=1e-4)
+    assert np.allclose(np.einsum('nci,ncj->cij', out, out) / out.shape[0], np.eye(2), atol=1e-3)
+    # Compare against the matrix inverse square root
+    var = c_bn.moving_var.numpy() + np.eye(2)
+    eigenvalues, eigenvectors = np.linalg.eigh(var)
+    expected = eigenvectors @ (eigenvectors / np.sqrt(eigenvalues[..., np.newaxis, :])).swapaxes(-1, -2)
+    x = tf.complex(tf.random.normal((5, 4)), tf.random.normal((5, 4)))
+    zero_mean = x - c_bn.moving_mean
+    expected = np.einsum('cij,ncj->nci', expected,
+                         np.stack((tf.math.real(zero_mean), tf.math.imag(zero_mean)), axis=-1))
+    c_bn.epsilon = 1.
+    result = c_bn(x, training=False).numpy()
+    assert np.allclose(result, expected[..., 0] + 1j * expected[..., 1], atol=1e-4)
+    # Fused moments against the tfp covariance
+    x = tf.complex(tf.random.normal((7, 5, 5, 3)), tf.random.normal((7, 5, 5, 3)) + 1.)
+    fused = ComplexBatchNormalization()
+    reference = ComplexBatchNormalization(cov_method=2)
+    assert np.allclose(fused(x, training=True), reference(x, training=True), atol=1e-4)
+    assert np.allclose(fused.moving_mean, reference.moving_mean)
+    assert np.allclose(fused.moving_var, reference.moving_var, atol=1e-5)
+    # Large mean and small deviation, where E[x²] - E[x]² cancels catastrophically
+    x = tf.complex(300. + 0.01 * tf.random.normal((256, 16)), -200. + 0.01 * tf.random.normal((256, 16)))
+    # First training step with the default momentum, while the moving mean is still far from the batch mean
+    fused = ComplexBatchNormalization(epsilon=1e-6)
+    reference = ComplexBatchNormalization(epsilon=1e-6, cov_method=2)
+    out = fused(x, training=True)
+    assert np.all(np.isfinite(out))
+    assert np.allclose(out, reference(x, training=True), atol=1e-2)
+    assert np.allclose(fused.moving_var, reference.moving_var, atol=1e-8)
+    _, var = fused._fused_moments(x)
+    assert np.allclose(var[..., 0, 0], np.var(np.real(x), axis=0), rtol=1e-2, atol=0)
+    assert np.allclose(var[..., 1, 1], np.var(np.imag(x), axis=0), rtol=1e-2, atol=0)
+
+
 def pooling_layers():
     complex_max_pool_2d()
+    complex_max_pool_2d_magnitude()
     complex_avg_pool_1d()
     complex_avg_pool()
+    complex_avg_pool_interleaved()
 
 
 @tf.autograph.experimental.do_not_convert
 def test_layers():
     new_max_unpooling_2d_test()
+    no_host_ops_in_call()
+    complex_unpooling()
     pooling_layers()
     batch_norm()
+    complex_batch_norm_whitening()
     upsampling()
     complex_conv_2d_transpose()
     shape_ad_dtype_of_conv2d()
+    complex_conv_mult_methods()
+    complex_conv_2d_transpose_gauss()
+    complex_conv_fft()
     dense_example()
+    dense_block_real()
+    low_rank_dense()
+    fused_epilogue()
+    interleaved_weight_storage()
+    complex_regularizers()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from cvnn.utils import transform_to_real_map_function
+from cvnn.utils import transform_to_real_map_function, view_as_real, view_as_complex
 import numpy as np
 from pdb import set_trace
 import tensorflow as tf
@@ -38,6 +38,30 @@ def test_image_real_conversion():
     assert np.all(tf.math.imag(c_elem)[:, :, 0] == r_elem[:, :, 1])
 
 
+def test_view_as_real():
+    for dtype in (np.complex64, np.complex128):
+        z = tf.constant((np.random.randn(3, 4, 5) + 1j * np.random.randn(3, 4, 5)).astype(dtype))
+        x = view_as_real(z)
+        assert x.dtype == z.dtype.real_dtype and x.shape == (3, 4, 5, 2)
+        assert np.all(x[..., 0].numpy() == np.real(z)) and np.all(x[..., 1].numpy() == np.imag(z))
+        assert view_as_complex(x).dtype == z.dtype and np.all(view_as_complex(x).numpy() == z.numpy())
+        # Gradients match the ones of tf.math.real / tf.math.imag and tf.complex
+        weights = tf.constant(np.random.randn(3, 4, 5, 2), dtype=x.dtype)
+        with tf.GradientTape(persistent=True) as tape:
+            tape.watch([z, x])
+            loss = tf.reduce_sum(view_as_real(z) * weights)
+            expected_loss = tf.reduce_sum(tf.math.real(z) * weights[..., 0] + tf.math.imag(z) * weights[..., 1])
+            loss_c = tf.reduce_sum(tf.math.real(view_as_complex(x) * tf.complex(weights[..., 0], weights[..., 1])))
+            expected_loss_c = tf.reduce_sum(tf.math.real(tf.complex(x[..., 0], x[..., 1]) *
+                                                         tf.complex(weights[..., 0], weights[..., 1])))
+        assert np.allclose(tape.gradient(loss, z), tape.gradient(expected_loss, z))
+        assert np.allclose(tape.gradient(loss_c, x), tape.gradient(expected_loss_c, x))
+    # XLA has no complex bitcast
+    z = tf.complex(tf.random.normal((2, 3)), tf.random.normal((2, 3)))
+    jit_round_trip = tf.function(lambda t: view_as_complex(tf.nn.relu(view_as_real(t))), jit_compile=True)
+    assert np.all(jit_round_trip(z).numpy() == view_as_complex(tf.nn.relu(view_as_real(z))).numpy())
+
+
 if __name__ == '__main__':
     test_image_real_conversion()
-
+    test_view_as_real()
@@ -0,0 +1,97 @@
+import numpy as np
+import tensorflow as tf
+import cvnn.layers as layers
+from tensorflow.keras.models import Sequential
+
+REPLICAS = 2
+try:
+    tf.config.set_logical_device_configuration(tf.config.list_physical_devices('CPU')[0],
+                                               [tf.config.LogicalDeviceConfiguration()] * REPLICAS)
+except RuntimeError:
+    pass    # The runtime was already initialized (by another test module), the existing devices are used
+
+
+def _get_strategy():
+    # Collective all-reduce instances can clash between the training functions of different models on CPU
+    return tf.distribute.MirroredStrategy([device.name for device in tf.config.list_logical_devices('CPU')],
+                                          cross_device_ops=tf.distribute.ReductionToOneDevice())
+
+
+def _get_model(batch_norm: bool = True, weight_storage: str = 'split'):
+    model_layers = [
+        layers.ComplexInput(input_shape=(8, 8, 2)),
+        layers.ComplexConv2D(4, 3, activation='cart_relu', weight_storage=weight_storage,
+                             kernel_regularizer=tf.keras.regularizers.L2(1e-3)),
+        layers.ComplexBatchNormalization(weight_storage=weight_storage),
+        layers.ComplexConv2DTranspose(2, 3, strides=2, weight_storage=weight_storage),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(3, activation='softmax_real_with_abs', weight_storage=weight_storage)
+    ]
+    if not batch_norm:
+        model_layers.pop(2)
+    return Sequential(model_layers)
+
+
+def _get_data(samples=16):
+    x = tf.complex(tf.random.normal((samples, 8, 8, 2)), tf.random.normal((samples, 8, 8, 2)))
+    return x, tf.one_hot(np.arange(samples) % 3, 3)
+
+
+def test_variables_created_by_strategy():
+    strategy = _get_strategy()
+    for weight_storage in ['split', 'interleaved']:
+        with strategy.scope():
+            model = _get_model(weight_storage=weight_storage)
+        assert all(strategy.extended.variable_created_in_scope(variable) for variable in model.weights)
+        assert len(model.trainable_weights) == (16 if weight_storage == 'split' else 8)
+        assert len(model.losses) == (2 if weight_storage == 'split' else 1)    # Kernel regularizer
+
+
+def test_mirrored_training_matches_single_device():
+    x, y = _get_data()
+    strategy = _get_strategy()
+    with strategy.scope():
+        distributed = _get_model(batch_norm=False)
+        distributed.compile(optimizer=tf.keras.optimizers.SGD(0.1), loss='categorical_crossentropy')
+    single = _get_model(batch_norm=False)
+    single.compile(optimizer=tf.keras.optimizers.SGD(0.1), loss='categorical_crossentropy')
+    single.set_weights(distributed.get_weights())
+    # A single batch, split among the replicas
+    distributed.fit(x, y, batch_size=16, epochs=1, verbose=0)
+    single.fit(x, y, batch_size=16, epochs=1, verbose=0)
+    for expected, result in zip(single.get_weights(), distributed.get_weights()):
+        assert np.allclose(expected, result, atol=1e-5)
+
+
+def test_mirrored_fit():
+    x, y = _get_data()
+    strategy = _get_strategy()
+    for weight_storage in ['split', 'interleaved']:
+        with strategy.scope():
+            model = _get_model(weight_storage=weight_storage)
+            model.compile(optimizer='sgd', loss='categorical_crossentropy')
+        history = model.fit(x, y, batch_size=8, epochs=2, verbose=0)
+        assert np.all(np.isfinite(history.history['loss']))
+        batch_norm = model.layers[1]
+        assert not np.allclose(batch_norm.moving_mean.numpy(), 0.)
+        # Each replica updates its own moving statistics, the read ones are their mean (both the mean and covariance)
+        local_means = [v.numpy() for v in strategy.experimental_local_results(batch_norm.moving_mean_ri)]
+        local_vars = [v.numpy() for v in strategy.experimental_local_results(batch_norm.moving_var)]
+        assert not np.allclose(local_means[0], local_means[1])
+        assert np.allclose(batch_norm.moving_mean_ri.numpy(), np.mean(local_means, axis=0), atol=1e-7)
+        assert np.allclose(batch_norm.moving_var.numpy(), np.mean(local_vars, axis=0), atol=1e-7)
+        # Each replica predicts its part of the batch with its own statistics
+        single = _get_model(weight_storage=weight_storage)
+        single.set_weights(model.get_weights())
+        predictions = model.predict(x, batch_size=len(x), verbose=0)
+        for replica, (mean, var) in enumerate(zip(local_means, local_vars)):
+            single.layers[1].moving_mean_ri.assign(mean)
+            single.layers[1].moving_var.assign(var)
+            replica_batch = slice(replica * len(x) // REPLICAS, (replica + 1) * len(x) // REPLICAS)
+            assert np.allclose(predictions[replica_batch], single(x[replica_batch]), atol=1e-6)
+
+
+if __name__ == '__main__':
+    test_variables_created_by_strategy()
+    test_mirrored_training_matches_single_device()
+    test_mirrored_fit()
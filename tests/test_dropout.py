@@ -36,30 +36,46 @@ def get_dataset():
 
 @tf.autograph.experimental.do_not_convert
 def simple_random_example():
-    tf.random.set_seed(0)
     layer = complex_layers.ComplexDropout(.2, input_shape=(2,), seed=0)
-    data = np.arange(10).reshape(5, 2).astype(np.float32)
+    data = np.arange(1, 2001).reshape(1000, 2).astype(np.float32)
     data = tf.complex(data, data)
     outputs = layer(data, training=True)
-    expected_out = np.array([[0. + 0.j, 0. + 0.j],
-                             [0. + 0.j, 3.75 + 3.75j],
-                             [5. + 5.j, 6.25 + 6.25j],
-                             [7.5 + 7.5j, 8.75 + 8.75j],
-                             [10. + 10.j, 11.25 + 11.25j]])
     assert np.all(data == layer(data, training=False))
-    assert np.all(outputs == expected_out)
-    tf.random.set_seed(0)
-    layer = tf.keras.layers.Dropout(.2, input_shape=(2,), seed=0)
-    real_outputs = layer(tf.math.real(data), training=True)
-    assert np.all(real_outputs == tf.math.real(outputs))
+    assert np.all(np.logical_or(outputs == 0, np.isclose(outputs, data / 0.8)))
+    assert 0.15 < np.mean(outputs == 0) < 0.25
+    assert np.any(outputs != layer(data, training=True)), "Mask should change at each step"
+    # Reproducible without global seed
+    same_seed_layer = complex_layers.ComplexDropout(.2, input_shape=(2,), seed=0)
+    assert np.all(outputs == same_seed_layer(data, training=True))
+    # Noise shape broadcasting
+    layer = complex_layers.ComplexDropout(.5, noise_shape=(None, 1), seed=0)
+    outputs = layer(data, training=True).numpy()
+    assert np.all((outputs[:, 0] == 0) == (outputs[:, 1] == 0))
+    assert np.all(tf.function(layer)(data, training=True).shape == data.shape)
+
+
+@tf.autograph.experimental.do_not_convert
+def keras_dropout_statistics():
+    # ComplexDropout and tf.keras.layers.Dropout draw from different random streams, so only the statistics that
+    #   do not depend on the mask itself are compared
+    rate = 0.3
+    data = tf.random.uniform((200, 500), minval=1., maxval=2.)
+    for layer in [complex_layers.ComplexDropout(rate, seed=0, dtype=np.float32), tf.keras.layers.Dropout(rate, seed=0)]:
+        assert np.all(layer(data, training=False) == data)
+        outputs = layer(data, training=True).numpy()
+        kept = outputs != 0
+        assert abs(np.mean(kept) - (1. - rate)) < 0.01
+        assert np.allclose(outputs[kept], data.numpy()[kept] / (1. - rate))
+        assert np.isclose(np.mean(outputs), np.mean(data), rtol=0.01)
 
 
 def get_real_mnist_model():
     in1 = tf.keras.layers.Input(shape=(28, 28, 1))
     flat = tf.keras.layers.Flatten(input_shape=(28, 28, 1))(in1)
     dense = tf.keras.layers.Dense(128, activation='cart_relu')(flat)
-    # drop = complex_layers.ComplexDropout(rate=0.5)(dense)
-    drop = tf.keras.layers.Dropout(0.5)(dense)
+    # ComplexDropout does not use the same random generator than tf.keras.layers.Dropout.
+    # The same seed is used on both models so the dropped units are the same.
+    drop = complex_layers.ComplexDropout(rate=0.5, seed=0)(dense)
     out = tf.keras.layers.Dense(10, activation='softmax_real_with_abs', kernel_initializer="ComplexGlorotUniform")(drop)
     real_model = tf.keras.Model(in1, out, name="tf_rvnn")
     real_model.compile(
@@ -75,7 +91,7 @@ def get_complex_mnist_model():
     inputs = complex_layers.complex_input(shape=(28, 28, 1), dtype=np.float32)
     flat = complex_layers.ComplexFlatten(input_shape=(28, 28, 1), dtype=np.float32)(inputs)
     dense = complex_layers.ComplexDense(128, activation='cart_relu', dtype=np.float32)(flat)
-    drop = complex_layers.ComplexDropout(rate=0.5)(dense)
+    drop = complex_layers.ComplexDropout(rate=0.5, seed=0)(dense)
     out = complex_layers.ComplexDense(10, activation='softmax_real_with_abs', dtype=np.float32)(drop)
     complex_model = tf.keras.Model(inputs, out, name="rvnn")
     complex_model.compile(
@@ -218,6 +234,7 @@ def test_dropout():
     mnist(False)
     fashion_mnist()
     simple_random_example()
+    keras_dropout_statistics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+import numpy as np
+import tensorflow as tf
+import cvnn.layers as layers
+from cvnn.inference_tools import fold_batch_normalization
+from tensorflow.keras.models import Sequential
+
+
+def _train_batch_norms(model, x, isotropic: bool = False):
+    for _ in range(3):
+        model(x, training=True)
+    for layer in model.layers:
+        if isinstance(layer, layers.ComplexBatchNormalization):
+            variables = (layer.gamma_r, layer.gamma_i, layer.beta_r, layer.beta_i) \
+                if layer.my_dtype.is_complex else (layer.gamma, layer.beta)
+            for variable in variables:
+                variable.assign(tf.random.normal(variable.shape))
+            if isotropic:       # V^(-1/2) is a multiple of the identity
+                layer.moving_var.assign(tf.random.uniform(layer.moving_var.shape[:-2] + (1, 1), 0.5, 2.) *
+                                        tf.eye(2))
+
+
+def fold_tst(model, x, expected_classes, isotropic: bool = False):
+    _train_batch_norms(model, x, isotropic)
+    folded = fold_batch_normalization(model)
+    assert [layer.__class__ for layer in folded.layers] == expected_classes
+    expected = model(x, training=False).numpy()
+    assert np.allclose(expected, folded(x).numpy(), atol=1e-4 * np.max(np.abs(expected)))
+
+
+def test_fold_widely_linear():
+    x = tf.complex(tf.random.normal((6, 12, 12, 3)), tf.random.normal((6, 12, 12, 3)))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(12, 12, 3)),
+        layers.ComplexConv2D(4, 3, strides=2, padding='same'), layers.ComplexBatchNormalization(),
+        layers.ComplexConv2D(5, 3, activation='cart_relu'), layers.ComplexBatchNormalization(),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(7, use_bias=False), layers.ComplexBatchNormalization(),
+        layers.ComplexDense(3)
+    ])
+    fold_tst(model, x, [layers.ComplexWidelyLinearConv, layers.ComplexConv2D, layers.ComplexBatchNormalization,
+                        layers.ComplexFlatten, layers.ComplexWidelyLinearDense, layers.ComplexDense])
+    x = tf.complex(tf.random.normal((4, 20, 3)), tf.random.normal((4, 20, 3)))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(20, 3)),
+        layers.ComplexConv1D(4, 5, padding='causal', dilation_rate=2),
+        layers.ComplexBatchNormalization()
+    ])
+    fold_tst(model, x, [layers.ComplexWidelyLinearConv])
+
+
+def test_widely_linear_real_equivalent():
+    real_dense = layers.ComplexWidelyLinearDense(7, activation='cart_relu').get_real_equivalent()
+    assert isinstance(real_dense, layers.ComplexDense)
+    assert real_dense.units == 14 and real_dense.my_dtype == tf.float32
+    real_conv = layers.ComplexWidelyLinearConv(1, 4, 5, padding='causal', dilation_rate=2).get_real_equivalent()
+    assert real_conv.rank == 1 and real_conv.filters == 4 and real_conv.padding == 'causal'
+    assert real_conv.my_dtype == tf.float32
+    assert real_conv(tf.random.normal((4, 20, 6))).shape == (4, 20, 4)
+
+
+def test_fold_complex_scale():
+    x = tf.complex(tf.random.normal((6, 10)), tf.random.normal((6, 10)))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(10,)),
+        layers.ComplexDense(8), layers.ComplexBatchNormalization(),
+        layers.ComplexDense(4, use_bias=False), layers.ComplexBatchNormalization(),
+        layers.ComplexDense(4, weight_storage='interleaved'), layers.ComplexBatchNormalization()
+    ])
+    fold_tst(model, x, [layers.ComplexDense, layers.ComplexDense, layers.ComplexDense], isotropic=True)
+    x = tf.random.normal((6, 10, 10, 2))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(10, 10, 2), dtype=np.float32),
+        layers.ComplexConv2D(3, 3, dtype=np.float32), layers.ComplexBatchNormalization(dtype=np.float32)
+    ])
+    fold_tst(model, x, [layers.ComplexConv2D])
+
+
+if __name__ == '__main__':
+    test_fold_widely_linear()
+    test_widely_linear_real_equivalent()
+    test_fold_complex_scale()
@@ -1,6 +1,8 @@
+import numpy as np
 import tensorflow as tf
 from cvnn import logger
 import cvnn.initializers as initializers
+import cvnn.layers as layers
 from pdb import set_trace
 import sys
 
@@ -35,5 +37,43 @@ def test_inits():
         compare(key, value[0], value[1])
 
 
+def test_complex_draws():
+    for init in [initializers.ComplexGlorotUniform, initializers.ComplexHeNormal, initializers.ComplexRayleigh]:
+        values = init(seed=100)(shape=(64, 64)).numpy()
+        assert values.dtype == np.complex64
+        assert np.array_equal(values, init(seed=100)(shape=(64, 64)).numpy())
+        assert abs(np.corrcoef(np.real(values).ravel(), np.imag(values).ravel())[0, 1]) < 0.1     # Independent parts
+    x = tf.complex(tf.random.normal((2, 3, 3, 4)), tf.random.normal((2, 3, 3, 4)))
+    for get_layer in [lambda **kwargs: layers.ComplexDense(8, **kwargs),
+                      lambda **kwargs: layers.ComplexConv2D(8, 3, **kwargs)]:
+        split = get_layer(kernel_initializer=initializers.ComplexGlorotUniform(seed=2))
+        interleaved = get_layer(kernel_initializer=initializers.ComplexGlorotUniform(seed=2),
+                                weight_storage='interleaved')
+        split(x)
+        interleaved(x)
+        kernel_r, kernel_i = split.get_weights()[:2]
+        assert not np.array_equal(kernel_r, kernel_i)
+        assert np.array_equal(np.stack((kernel_r, kernel_i), axis=-1), interleaved.get_weights()[0])
+
+
+def test_rayleigh():
+    shape = (3, 3, 100, 200)
+    fan_in, fan_out = 9 * 100, 9 * 200
+    for criterion, variance in [('glorot', 2. / (fan_in + fan_out)), ('he', 2. / fan_in)]:
+        values = initializers.ComplexRayleigh(criterion=criterion)(shape=shape).numpy()
+        assert np.isclose(np.mean(np.abs(values) ** 2), variance, rtol=0.02)
+        assert abs(np.mean(np.angle(values))) < 0.05 and np.std(np.angle(values)) > 1.7     # U[-pi, pi): std 1.81
+        real_values = initializers.ComplexRayleigh(criterion=criterion)(shape=shape, dtype=tf.float32).numpy()
+        assert real_values.dtype == np.float32 and np.isclose(np.mean(real_values ** 2), variance, rtol=0.02)
+        assert abs(np.mean(real_values > 0) - 0.5) < 0.01
+    try:
+        initializers.ComplexRayleigh(criterion='lecun')
+        assert False, "Unsupported criterion should raise"
+    except ValueError:
+        pass
+
+
 if __name__ == "__main__":
     test_inits()
+    test_complex_draws()
+    test_rayleigh()
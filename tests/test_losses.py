@@ -1,7 +1,8 @@
-from cvnn.losses import ComplexAverageCrossEntropy, ComplexWeightedAverageCrossEntropy
+from cvnn.losses import ComplexAverageCrossEntropy, ComplexWeightedAverageCrossEntropy, SoftmaxRealCrossEntropy
+from cvnn.activations import SOFTMAX_REAL_LOG_PROBABILITIES, cart_softmax
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras.losses import CategoricalCrossentropy
+from tensorflow.keras.losses import CategoricalCrossentropy, categorical_crossentropy
 import cvnn.dataset as dp
 from cvnn.layers import ComplexDense, complex_input
 from pdb import set_trace
@@ -59,8 +60,33 @@ def weighted_loss():
     assert ace.numpy() < wace.numpy(), f"ACE {ace.numpy()} > WACE {wace.numpy()}"
 
 
+def from_logits():
+    logits = tf.complex(tf.random.normal((16, 10)), tf.random.normal((16, 10)))
+    y_true = tf.one_hot(np.random.randint(10, size=16), 10)
+    for activation in SOFTMAX_REAL_LOG_PROBABILITIES:
+        expected = categorical_crossentropy(y_true, activation(logits))
+        assert SOFTMAX_REAL_LOG_PROBABILITIES[activation](logits).shape == (16, 10)
+        assert np.allclose(SoftmaxRealCrossEntropy(activation)(y_true, logits), np.mean(expected), atol=1e-5)
+        assert np.allclose(SoftmaxRealCrossEntropy(activation.__name__)(y_true, tf.math.real(logits)),
+                           CategoricalCrossentropy(from_logits=True)(y_true, tf.math.real(logits)), atol=1e-5)
+        large_logits = 100. * logits    # The probabilities underflow and their clipped log has zero gradient
+        with tf.GradientTape() as tape:
+            tape.watch(large_logits)
+            loss = SoftmaxRealCrossEntropy(activation)(y_true, large_logits)
+        gradient = tape.gradient(loss, large_logits)
+        assert np.isfinite(loss.numpy()) and np.all(np.isfinite(gradient.numpy()))
+    assert np.allclose(ComplexAverageCrossEntropy(from_logits=True)(y_true, logits),
+                       ComplexAverageCrossEntropy()(y_true, cart_softmax(logits)), atol=1e-5)
+    try:
+        SoftmaxRealCrossEntropy('cart_softmax')
+        assert False, "SoftmaxRealCrossEntropy should only accept softmax_real activations"
+    except ValueError:
+        pass
+
+
 def test_losses():
     weighted_loss()
+    from_logits()
     ace()
 
 
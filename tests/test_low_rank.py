@@ -0,0 +1,79 @@
+import numpy as np
+import tensorflow as tf
+import cvnn.layers as layers
+from cvnn.low_rank import energy_rank, to_low_rank_dense, low_rank_model
+from tensorflow.keras.models import Sequential
+
+
+def test_energy_rank():
+    singular_values = np.array([3., 2., 1., 0.])
+    assert energy_rank(singular_values, energy=1.) == 3
+    assert energy_rank(singular_values, energy=9 / 14) == 1
+    assert energy_rank(singular_values, energy=0.65) == 2
+    assert energy_rank(np.zeros(4), energy=0.5) == 1
+    for energy in [0., 1.5]:
+        try:
+            energy_rank(singular_values, energy=energy)
+            assert False, f"energy {energy} should raise"
+        except ValueError:
+            pass
+
+
+def test_to_low_rank_dense():
+    x = tf.complex(tf.random.normal((16, 40)), tf.random.normal((16, 40)))
+    left = np.random.randn(40, 4) + 1j * np.random.randn(40, 4)
+    right = np.random.randn(4, 30) + 1j * np.random.randn(4, 30)
+    kernel = left @ right
+    for weight_storage in ['split', 'interleaved']:
+        dense = layers.ComplexDense(30, activation='cart_relu', bias_initializer='ones', weight_storage=weight_storage)
+        dense(x)
+        weights = [np.real(kernel), np.imag(kernel)]
+        weights = [np.stack(weights, axis=-1), np.ones((30, 2))] if weight_storage == 'interleaved' \
+            else weights + [np.ones(30)] * 2
+        dense.set_weights([w.astype(np.float32) for w in weights])
+        low_rank = to_low_rank_dense(dense, energy=1.)     # Exact factorization of a rank 4 kernel
+        assert isinstance(low_rank, layers.ComplexLowRankDense)
+        assert low_rank.rank == 4 and low_rank.weight_storage == weight_storage
+        assert np.allclose(low_rank(x), dense(x), atol=1e-3)
+        truncated = to_low_rank_dense(dense, energy=0.5)
+        assert truncated.rank < 4
+        approximation = truncated._get_complex_weight('u') @ truncated._get_complex_weight('v')
+        relative_error = np.linalg.norm(approximation - kernel) / np.linalg.norm(kernel)
+        singular_values = np.linalg.svd(kernel, compute_uv=False)
+        assert np.isclose(relative_error, np.sqrt(np.sum(singular_values[truncated.rank:] ** 2) /
+                                                  np.sum(singular_values ** 2)), atol=1e-4)
+    real_dense = layers.ComplexDense(30, dtype=np.float32)
+    real_dense(tf.math.real(x))
+    real_low_rank = to_low_rank_dense(real_dense, energy=0.9, max_rank=5)
+    assert real_low_rank.rank == 5 and real_low_rank.my_dtype == tf.float32
+
+
+def test_low_rank_model():
+    x = tf.complex(tf.random.normal((32, 6, 6, 2)), tf.random.normal((32, 6, 6, 2)))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(6, 6, 2)),
+        layers.ComplexConv2D(4, 3, activation='cart_relu'),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(128, activation='cart_relu'),
+        layers.ComplexDense(3, activation='softmax_real_with_abs')
+    ])
+    new_model = low_rank_model(model, energy=0.999, max_rank=32)
+    assert [layer.__class__ for layer in new_model.layers] == [
+        layers.ComplexConv2D, layers.ComplexFlatten, layers.ComplexLowRankDense, layers.ComplexDense]
+    assert new_model.layers[0] is model.layers[0] and new_model.layers[3] is model.layers[3]
+    assert new_model.layers[2].rank == 32
+    assert new_model.count_params() < model.count_params()
+    # The full rank (64 inputs) factorization is larger than the kernel, the layers are kept
+    full_rank = low_rank_model(model, energy=1.)
+    assert all(new_layer is layer for new_layer, layer in zip(full_rank.layers, model.layers))
+    assert np.allclose(full_rank(x), model(x))
+    # The low rank layers are trainable
+    new_model.compile(optimizer='sgd', loss='categorical_crossentropy')
+    history = new_model.fit(x, tf.one_hot(np.arange(32) % 3, 3), epochs=1, verbose=0)
+    assert np.all(np.isfinite(history.history['loss']))
+
+
+if __name__ == '__main__':
+    test_energy_rank()
+    test_to_low_rank_dense()
+    test_low_rank_model()
@@ -0,0 +1,109 @@
+import numpy as np
+import tensorflow as tf
+import cvnn.layers as layers
+from cvnn.quantization import quantize_per_channel, calibrate, quantize_model, quantization_report
+from cvnn.layers.quantized import QUANTIZED_MAX
+from tensorflow.keras.models import Sequential
+
+
+def _complex_random(shape):
+    return tf.complex(tf.random.normal(shape), tf.random.normal(shape))
+
+
+def test_quantize_per_channel():
+    kernel_r, kernel_i = np.random.randn(2, 3, 3, 4, 5).astype(np.float32)
+    kernel_r[..., 2] *= 10.
+    kernel_i[..., 4] = kernel_r[..., 4] = 0.
+    q_r, q_i, scale = quantize_per_channel(kernel_r, kernel_i)
+    assert q_r.dtype == q_i.dtype == np.int8 and scale.shape == (5,)
+    assert np.max(np.maximum(np.abs(q_r), np.abs(q_i)).reshape((-1, 5))[:, :4], axis=0).tolist() == [QUANTIZED_MAX] * 4
+    assert scale[4] == 1. and not np.any(q_r[..., 4]) and not np.any(q_i[..., 4])
+    assert np.all(np.abs(q_r * scale - kernel_r) <= scale / 2 + 1e-7)
+    assert np.all(np.abs(q_i * scale - kernel_i) <= scale / 2 + 1e-7)
+
+
+def _integer_reference(quantized, x):
+    """
+    Float64 numpy computation of the int32 products (exact for these sizes) with the layer quantization
+    """
+    kernel, kernel_scale, input_scale, bias = quantized.get_weights()
+    q_kr, q_ki = np.split(kernel.astype(np.int64).reshape((-1, kernel.shape[-1])), 2, axis=-1)   # Patches layout
+    q_xr = np.clip(np.round(np.real(x) / input_scale[0]), -QUANTIZED_MAX, QUANTIZED_MAX).astype(np.int64)
+    q_xi = np.clip(np.round(np.imag(x) / input_scale[1]), -QUANTIZED_MAX, QUANTIZED_MAX).astype(np.int64)
+    real = input_scale[0] * (q_xr @ q_kr) - input_scale[1] * (q_xi @ q_ki)
+    imag = input_scale[0] * (q_xr @ q_ki) + input_scale[1] * (q_xi @ q_kr)
+    outputs = kernel_scale * (real + 1j * imag) + bias[..., 0] + 1j * bias[..., 1]
+    return quantized.activation(tf.constant(outputs, dtype=quantized.my_dtype)).numpy()
+
+
+def test_quantized_dense():
+    x = tf.complex(tf.random.normal((64, 20)), 0.2 * tf.random.normal((64, 20)))  # Smaller imaginary range
+    for weight_storage in ['split', 'interleaved']:
+        model = Sequential([layers.ComplexInput(input_shape=(20,)),
+                            layers.ComplexDense(16, activation='cart_relu', weight_storage=weight_storage),
+                            layers.ComplexDense(4, bias_initializer='ones')])
+        quantized = quantize_model(model, x)
+        assert [layer.__class__ for layer in quantized.layers] == [layers.ComplexQuantizedDense] * 2
+        assert quantized.layers[0].input_scale.numpy()[1] < quantized.layers[0].input_scale.numpy()[0]
+        hidden = model.layers[0](x).numpy()
+        assert np.allclose(quantized.layers[1](hidden), _integer_reference(quantized.layers[1], hidden), atol=1e-5)
+        expected = model(x).numpy()
+        assert np.max(np.abs(quantized(x).numpy() - expected)) < 0.05 * np.max(np.abs(expected))
+
+
+def test_quantized_conv_model():
+    x = _complex_random((16, 12, 12, 3))
+    model = Sequential([
+        layers.ComplexInput(input_shape=(12, 12, 3)),
+        layers.ComplexConv2D(8, 3, padding='same', activation='cart_relu'),
+        layers.ComplexBatchNormalization(),
+        layers.ComplexMaxPooling2D(),
+        layers.ComplexConv2D(8, 3, strides=2, dilation_rate=1, weight_storage='interleaved'),
+        layers.ComplexConv2D(8, 3, padding='same', groups=2),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(3, activation='softmax_real_with_abs')
+    ])
+    ranges = calibrate(model, tf.data.Dataset.from_tensor_slices((x, tf.zeros(16))).batch(4))
+    assert list(ranges) == [model.layers[i].name for i in (0, 3, 6)]
+    quantized = quantize_model(model, x)
+    assert [layer.__class__ for layer in quantized.layers] == [
+        layers.ComplexQuantizedConv2D, layers.ComplexBatchNormalization, layers.ComplexMaxPooling2D,
+        layers.ComplexQuantizedConv2D, layers.ComplexConv2D, layers.ComplexFlatten, layers.ComplexQuantizedDense]
+    conv = quantized.layers[0]
+    assert conv.kernel.dtype == tf.int8
+    assert np.allclose(conv(x), _integer_reference(conv, np.asarray(
+        tf.image.extract_patches(tf.pad(x, [[0, 0], [1, 1], [1, 1], [0, 0]]), [1, 3, 3, 1], [1] * 4, [1] * 4,
+                                 'VALID'))), atol=1e-4)
+    report = quantization_report(model, quantized, x, y=np.arange(16) % 3, batch_size=8, repetitions=2)
+    assert report['sqnr_db'] > 20
+    assert report['quantized']['weights_bytes'] < report['float']['weights_bytes']
+    assert set(report['float']) == {'weights_bytes', 'latency', 'accuracy'}
+
+
+def test_quantized_real_equivalent():
+    model = Sequential([layers.ComplexInput(input_shape=(8, 8, 3)),
+                        layers.ComplexConv2D(4, 3, activation='cart_relu'),
+                        layers.ComplexFlatten(),
+                        layers.ComplexDense(5)])
+    quantized = quantize_model(model, _complex_random((4, 8, 8, 3)))
+    conv, dense = quantized.layers[0], quantized.layers[2]
+    real_conv = conv.get_real_equivalent()
+    assert real_conv.__class__ is model.layers[0].get_real_equivalent().__class__
+    assert real_conv.filters == 4 and real_conv.my_dtype == tf.float32
+    real_dense = dense.get_real_equivalent(output_multiplier=1)
+    assert isinstance(real_dense, layers.ComplexDense) and real_dense.units == 5
+    assert real_dense.my_dtype == tf.float32
+    # Without the float config the layer cannot be converted
+    no_config = layers.ComplexQuantizedDense(5)
+    try:
+        no_config.get_real_equivalent()
+        assert False, "Expected a ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test_quantize_per_channel()
+    test_quantized_dense()
+    test_quantized_conv_model()
+    test_quantized_real_equivalent()
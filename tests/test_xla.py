@@ -0,0 +1,135 @@
+import numpy as np
+import tensorflow as tf
+import cvnn.layers as layers
+from tensorflow.keras.models import Sequential
+
+
+def _complex_random(shape, dtype=tf.complex64):
+    return tf.cast(tf.complex(tf.random.normal(shape), tf.random.normal(shape)), dtype)
+
+
+LAYER_CASES = [
+    (lambda: layers.ComplexDense(4), (3, 5), {}),
+    (lambda: layers.ComplexDense(4, execution='block_real', activation='cart_relu'), (3, 5), {}),
+    (lambda: layers.ComplexDense(4, dtype=np.float32), (3, 5), {}),
+    (lambda: layers.ComplexDense(4, weight_storage='interleaved'), (3, 5), {}),
+    (lambda: layers.ComplexDense(4, activation='cart_relu', fused_epilogue=True), (2, 3, 5), {}),
+    (lambda: layers.ComplexFlatten(), (2, 3, 4), {}),
+    (lambda: layers.ComplexDropout(0.5, seed=1), (10, 5), {'training': True}),
+    (lambda: layers.ComplexDropout(0.5, noise_shape=(3, 1)), (3, 5), {'training': False}),
+    (lambda: layers.ComplexBatchNormalization(), (6, 5, 3), {'training': True}),
+    (lambda: layers.ComplexBatchNormalization(), (6, 5, 3), {'training': False}),
+    (lambda: layers.ComplexConv1D(4, 3, padding='causal', dilation_rate=2), (2, 10, 3), {}),
+    (lambda: layers.ComplexConv2D(4, 3, strides=2, padding='same', activation='cart_tanh'), (2, 9, 9, 3), {}),
+    (lambda: layers.ComplexConv2D(4, 3, algorithm='fft'), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexConv2D(4, 3, complex_mult='gauss'), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexConv2D(4, 3, activation='modrelu', weight_storage='interleaved', fused_epilogue=True),
+     (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexConv2D(6, 3, groups=3), (2, 3, 8, 8, 3), {}),    # Extra batch dimension
+    (lambda: layers.ComplexConv2D(4, 3, algorithm='fft', weight_storage='interleaved'), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexBatchNormalization(weight_storage='interleaved'), (6, 5, 3), {'training': True}),
+    (lambda: layers.ComplexConv3D(4, 3), (2, 6, 6, 6, 3), {}),
+    (lambda: layers.ComplexConv2DTranspose(4, 3, strides=2), (2, 5, 5, 3), {}),
+    (lambda: layers.ComplexMaxPooling2D(), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexMaxPooling2D(pool_size=3, strides=2, padding='same'), (2, 9, 7, 3), {}),
+    (lambda: layers.ComplexMaxPooling2D(dtype=np.float32), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexMaxPooling2DWithArgmax(strides=1), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexAvgPooling2D(), (2, 8, 8, 3), {}),
+    (lambda: layers.ComplexAvgPooling2D(data_format='channels_first', padding='same'), (2, 3, 7, 7), {}),
+    (lambda: layers.ComplexAvgPooling1D(), (2, 8, 3), {}),
+    (lambda: layers.ComplexUpSampling2D(), (2, 4, 4, 3), {}),
+    (lambda: layers.ComplexUpSampling2D(interpolation='bilinear', data_format='channels_first'), (2, 3, 4, 4), {}),
+    (lambda: layers.ComplexWidelyLinearDense(4), (3, 5), {}),
+    (lambda: layers.ComplexWidelyLinearConv(2, 4, 3, padding='same'), (2, 8, 8, 3), {}),
+]
+
+
+def _check_dropout(inputs, outputs, rate):
+    # XLA generates different random numbers than the TF kernels, so only the mask semantics are compared
+    kept = np.abs(outputs.numpy()) > 0
+    assert 0 < np.mean(kept) < 1
+    assert np.allclose(outputs.numpy()[kept], inputs.numpy()[kept] / (1 - rate))
+
+
+def _compare_jit(layer, inputs, **kwargs):
+    eager = layer(inputs, **kwargs)
+    jit = tf.function(lambda x: layer(x, **kwargs), jit_compile=True)(inputs)
+    if isinstance(layer, layers.ComplexDropout) and kwargs.get('training', False):
+        _check_dropout(inputs, jit, layer.rate)
+        return
+    for eager_result, jit_result in zip(tf.nest.flatten(eager), tf.nest.flatten(jit)):
+        assert eager_result.dtype == jit_result.dtype and eager_result.shape == jit_result.shape, layer.name
+        assert np.allclose(eager_result, jit_result, atol=1e-5), layer.name
+
+
+def test_layers_jit_compile():
+    for get_layer, input_shape, kwargs in LAYER_CASES:
+        layer = get_layer()
+        dtype = tf.dtypes.as_dtype(getattr(layer, 'my_dtype', tf.complex64))
+        inputs = _complex_random(input_shape, dtype) if dtype.is_complex else tf.random.normal(input_shape)
+        _compare_jit(layer, inputs, **kwargs)
+    inputs = _complex_random((2, 8, 8, 3))
+    pooled, argmax = layers.ComplexMaxPooling2DWithArgmax()(inputs)
+    for unpool in [layers.ComplexUnPooling2D((8, 8, 3)), layers.ComplexUnPooling2D(upsampling_factor=2),
+                   layers.ComplexUnPooling2D(upsampling_factor=2, collision='max_magnitude')]:
+        eager = unpool([pooled, argmax])
+        jit = tf.function(lambda x, indices: unpool([x, indices]), jit_compile=True)(pooled, argmax)
+        assert np.all(eager.numpy() == jit.numpy())
+
+
+def test_training_tensor_jit_compile():
+    inputs = _complex_random((20, 5))
+    for layer in [layers.ComplexDropout(0.5, seed=3), layers.ComplexBatchNormalization()]:
+        layer(inputs)
+        call = tf.function(lambda x, training: layer(x, training=training), jit_compile=True)
+        for training in [True, False]:
+            result = call(inputs, tf.constant(training))
+            if isinstance(layer, layers.ComplexDropout) and training:
+                _check_dropout(inputs, result, layer.rate)
+            else:
+                assert np.allclose(result, layer(inputs, training=training), atol=1e-5)
+
+
+def _get_model():
+    return Sequential([
+        layers.ComplexInput(input_shape=(12, 12, 2)),
+        layers.ComplexConv2D(4, 3, padding='same', activation='cart_relu'),
+        layers.ComplexBatchNormalization(),
+        layers.ComplexMaxPooling2D(),
+        layers.ComplexConv2D(4, 3, padding='same', activation='cart_relu'),
+        layers.ComplexAvgPooling2D(),
+        layers.ComplexUpSampling2D(),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(8, activation='cart_relu'),
+        layers.ComplexDense(3, activation='convert_to_real_with_abs')
+    ])
+
+
+def test_gradients_jit_compile():
+    model = _get_model()
+    inputs = _complex_random((4, 12, 12, 2))
+    labels = tf.one_hot([0, 1, 2, 1], 3)
+
+    def gradients(x, y):
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(y, model(x, training=True)))
+        return tape.gradient(loss, model.trainable_variables)
+    for eager, jit in zip(gradients(inputs, labels), tf.function(gradients, jit_compile=True)(inputs, labels)):
+        assert np.allclose(eager, jit, atol=1e-4)
+
+
+def test_model_compile_jit():
+    model = _get_model()
+    model.compile(optimizer='sgd', loss='categorical_crossentropy', jit_compile=True)
+    inputs = _complex_random((8, 12, 12, 2))
+    labels = tf.one_hot(np.arange(8) % 3, 3)
+    history = model.fit(inputs, labels, epochs=2, batch_size=4, verbose=0)
+    assert np.all(np.isfinite(history.history['loss']))
+    assert np.allclose(model.predict(inputs, verbose=0), model(inputs), atol=1e-5)
+
+
+if __name__ == '__main__':
+    test_layers_jit_compile()
+    test_training_tensor_jit_compile()
+    test_gradients_jit_compile()
+    test_model_compile_jit()